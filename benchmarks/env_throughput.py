@@ -0,0 +1,211 @@
+"""Steps/sec, reset latency and per-step allocation of the registered envs.
+
+Every env id runs against benchmarks/standin.py instead of Gazebo: a
+roscore and the stand-in are started on a private port, and the env
+attaches to them (GYM_GAZEBO_ATTACH=1). Results are printed as JSON and
+can be written to a file to compare versions. With --in-process the envs
+run against gym_gazebo.fake_ros instead, without roscore or any ROS
+install, which measures the env code alone.
+
+    python benchmarks/env_throughput.py --num-steps 500 --output before.json
+    python benchmarks/env_throughput.py GazeboCircuit2TurtlebotLidar-v0 --scan-rate 100
+    python benchmarks/env_throughput.py --in-process
+
+The ErleCopter and ErleRover envs need mavros and ArduPilot SITL, which the
+stand-in does not provide, so they are not part of the default set.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+from multiprocessing import Process, Pipe
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gym_gazebo.envs.timing import TimingHistogram
+from gym_gazebo.tracing import clock
+
+try:
+    import tracemalloc
+except ImportError: # Python 2
+    tracemalloc = None
+
+DEFAULT_ENV_IDS = [
+    'GazeboCircuit2TurtlebotLidar-v0',
+    'GazeboCircuit2TurtlebotLidarNn-v0',
+    'GazeboCircuitTurtlebotLidar-v0',
+    'GazeboMazeTurtlebotLidar-v0',
+    'GazeboRoundTurtlebotLidar-v0',
+    'GazeboCircuit2cTurtlebotCameraNnEnv-v0',
+    'GazeboErleCopterNavigateFakeSim-v0',
+]
+
+STANDIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'standin.py')
+
+
+def _max_rss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _live_objects():
+    """Objects the garbage collector tracks once the garbage is gone.
+
+    Python 2 has no tracemalloc, this count is its allocation measure.
+    """
+    gc.collect()
+    return len(gc.get_objects())
+
+
+def _measure(remote, env_id, num_steps, num_resets, phases, fake_world=None):
+    if fake_world is not None:
+        from gym_gazebo import fake_ros
+        fake_ros.install(fake_ros.ArenaWorld(**fake_world))
+    import gym
+    import gym_gazebo
+    env = gym.make(env_id)
+    if phases and hasattr(env.unwrapped, 'enable_timing'):
+        env.unwrapped.enable_timing()
+    env.reset() # warm up connections and caches
+
+    resets = TimingHistogram()
+    for _ in range(num_resets):
+        start = clock()
+        env.reset()
+        resets.add(clock() - start)
+
+    steps = TimingHistogram()
+    episodes = 0
+    peaks = []
+    rss_before = _max_rss_kb()
+    objects_before = _live_objects()
+    if tracemalloc is not None:
+        tracemalloc.start()
+        retained_before = tracemalloc.get_traced_memory()[0]
+    env.reset()
+    for _ in range(num_steps):
+        action = env.action_space.sample()
+        if tracemalloc is not None and hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+        start = clock()
+        observation, reward, done, info = env.step(action)
+        steps.add(clock() - start)
+        if tracemalloc is not None and hasattr(tracemalloc, 'reset_peak'):
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        if done:
+            episodes += 1
+            env.reset()
+
+    result = {
+        'env_id': env_id,
+        'steps': num_steps,
+        'steps_per_sec': num_steps / steps.total if steps.total else None,
+        'step_latency': steps.stats(),
+        'reset_latency': resets.stats(),
+        'episodes': episodes,
+        # Highest extra memory held during a step, and what stayed allocated
+        'alloc_peak_bytes_per_step': sum(peaks) / float(len(peaks)) if peaks else None,
+        'alloc_retained_bytes_per_step': None,
+        'alloc_retained_objects_per_step': None,
+        'max_rss_growth_kb': None,
+    }
+    result['alloc_retained_objects_per_step'] = (_live_objects() - objects_before) / float(num_steps)
+    if tracemalloc is not None:
+        result['alloc_retained_bytes_per_step'] = (tracemalloc.get_traced_memory()[0] - retained_before) / float(num_steps)
+        tracemalloc.stop()
+    if rss_before is not None:
+        result['max_rss_growth_kb'] = _max_rss_kb() - rss_before
+    if phases and hasattr(env.unwrapped, 'get_timing_stats'):
+        result['phases'] = env.unwrapped.get_timing_stats()
+    env.close()
+    remote.send(result)
+    remote.close()
+
+
+def _collect(env_id, args, fake_world=None):
+    # The measuring process owns the env's ROS node
+    remote, work_remote = Pipe()
+    process = Process(target=_measure, args=(work_remote, env_id, args.num_steps, args.num_resets,
+                                             args.phases, fake_world))
+    process.start()
+    work_remote.close()
+    try:
+        result = remote.recv()
+    except EOFError:
+        result = {'env_id': env_id, 'error': 'benchmark process exited without a result'}
+    process.join()
+    return result
+
+
+def run(env_id, args):
+    standin = {'scan_rate': args.scan_rate, 'camera_rate': args.camera_rate,
+               'odom_rate': args.odom_rate, 'image_shape': args.image_shape}
+    if args.in_process:
+        result = _collect(env_id, args, fake_world=dict(standin, image_shape=tuple(args.image_shape)))
+        result['standin'] = dict(standin, backend='fake_ros')
+        return result
+
+    # Imports rospy, which --in-process runs without
+    from gym_gazebo.envs.gazebo_env import master_ports
+    from gym_gazebo.envs.supervisor import ProcessSupervisor, GAZEBO_SERVICES
+    ros_port, gazebo_port = master_ports(args.instance)
+    master_uri = "http://localhost:%d" % ros_port
+    environ = dict(os.environ, ROS_MASTER_URI=master_uri,
+                   GYM_GAZEBO_INSTANCE=str(args.instance), GYM_GAZEBO_ATTACH='1')
+
+    supervisor = ProcessSupervisor()
+    try:
+        supervisor.launch("roscore", ["roscore", "-p", str(ros_port)], env=environ)
+        supervisor.wait_for_master(master_uri, watch=["roscore"])
+        supervisor.launch("standin", [sys.executable, STANDIN,
+                                      "--scan-rate", str(args.scan_rate),
+                                      "--camera-rate", str(args.camera_rate),
+                                      "--odom-rate", str(args.odom_rate),
+                                      "--image-shape"] + [str(n) for n in args.image_shape], env=environ)
+        os.environ.update(environ)
+        supervisor.wait_for_services(GAZEBO_SERVICES, timeout=30, watch=["roscore", "standin"])
+        result = _collect(env_id, args)
+    finally:
+        supervisor.shutdown()
+
+    result['standin'] = dict(standin, backend='ros')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('env_ids', nargs='*', default=DEFAULT_ENV_IDS)
+    parser.add_argument('--num-steps', type=int, default=500)
+    parser.add_argument('--num-resets', type=int, default=20)
+    parser.add_argument('--scan-rate', type=float, default=30.0)
+    parser.add_argument('--camera-rate', type=float, default=30.0)
+    parser.add_argument('--odom-rate', type=float, default=50.0)
+    parser.add_argument('--image-shape', type=int, nargs=3, default=[480, 640, 3])
+    parser.add_argument('--instance', type=int, default=50, help='instance id of the private ROS master')
+    parser.add_argument('--in-process', action='store_true',
+                        help='run against gym_gazebo.fake_ros instead of roscore and the stand-in')
+    parser.add_argument('--phases', action='store_true', help='include the per-phase step timing')
+    parser.add_argument('--output', help='also write the results to this file')
+    args = parser.parse_args()
+
+    report = {
+        'time': time.time(),
+        'python': platform.python_version(),
+        'results': [run(env_id, args) for env_id in args.env_ids],
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+
+if __name__ == '__main__':
+    main()
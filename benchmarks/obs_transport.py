@@ -0,0 +1,83 @@
+"""Throughput of pickled pipes vs. SharedObservationBuffer.
+
+Workers produce frames of the given shape as fast as the parent asks for
+them, so the numbers measure the transport alone. Results are printed as
+JSON.
+
+    python benchmarks/obs_transport.py --shape 480 640 3 --num-envs 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+from multiprocessing import Process, Pipe
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gym_gazebo.obs_transport import SharedObservationBuffer
+
+
+def _worker(remote, shape, env_index, obs_buffer):
+    frame = np.random.randint(0, 255, size=shape).astype(np.uint8)
+    while True:
+        cmd = remote.recv()
+        if cmd is None:
+            break
+        if obs_buffer is None:
+            remote.send((frame, 0.0, False))
+        else:
+            remote.send((obs_buffer.write(env_index, frame), 0.0, False))
+    remote.close()
+
+
+def run(shape, num_envs, num_steps, shared):
+    obs_buffer = SharedObservationBuffer(num_envs, shape) if shared else None
+    remotes, work_remotes = zip(*[Pipe() for _ in range(num_envs)])
+    processes = [Process(target=_worker, args=(work_remotes[i], shape, i, obs_buffer)) for i in range(num_envs)]
+    for process in processes:
+        process.daemon = True
+        process.start()
+
+    start = time.time()
+    for _ in range(num_steps):
+        for remote in remotes:
+            remote.send('step')
+        results = [remote.recv() for remote in remotes]
+        if shared:
+            batch = obs_buffer.batch([result[0] for result in results])
+        else:
+            batch = np.stack([result[0] for result in results])
+        batch.sum(dtype=np.uint64) # touch the data like a learner would
+    elapsed = time.time() - start
+
+    for remote in remotes:
+        remote.send(None)
+    for process in processes:
+        process.join()
+
+    return {
+        'transport': 'shared_memory' if shared else 'pickle',
+        'shape': list(shape),
+        'num_envs': num_envs,
+        'steps_per_sec': num_steps / elapsed,
+        'frames_per_sec': num_steps * num_envs / elapsed,
+        'megabytes_per_sec': num_steps * num_envs * int(np.prod(shape)) / elapsed / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--shape', type=int, nargs='+', default=[480, 640, 3])
+    parser.add_argument('--num-envs', type=int, default=4)
+    parser.add_argument('--num-steps', type=int, default=500)
+    args = parser.parse_args()
+
+    shape = tuple(args.shape)
+    results = [run(shape, args.num_envs, args.num_steps, shared) for shared in (False, True)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Scripted stand-in for Gazebo, for benchmarking the envs without a simulator.
+
+A ROS node that publishes synthetic /scan, /camera/rgb/image_raw and
+odometry at fixed rates and answers the /gazebo services the envs call.
+The robot is a point in a circular arena driven by the velocity commands
+of the turtlebot and FakeSim envs; the scan measures the distance to the
+arena wall. Like Gazebo, nothing is published while physics is paused.
+
+    roscore -p 11311 &
+    python benchmarks/standin.py --scan-rate 30 --camera-rate 30
+
+Envs started with GYM_GAZEBO_ATTACH=1 then use it instead of Gazebo, see
+benchmarks/env_throughput.py. The world is the ArenaWorld of
+gym_gazebo.fake_ros, which runs it in-process without ROS.
+"""
+import argparse
+import math
+import os
+import sys
+import threading
+import time
+
+import rospy
+
+from geometry_msgs.msg import Twist
+from nav_msgs.msg import Odometry
+from sensor_msgs.msg import Image, LaserScan
+from std_srvs.srv import Empty, EmptyResponse
+from gazebo_msgs.srv import GetModelState, GetModelStateResponse, GetPhysicsProperties, \
+    GetPhysicsPropertiesResponse, SetModelState, SetModelStateResponse, SetPhysicsProperties, \
+    SetPhysicsPropertiesResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from gym_gazebo.fake_ros.world import ArenaWorld
+
+
+class StandIn(object):
+
+    def __init__(self, world, scan_rate=30.0, camera_rate=30.0, odom_rate=50.0, physics_rate=100.0):
+        self.world = world
+        self.paused = False
+        self.lock = threading.Lock()
+        self.last_advance = time.time()
+        self.physics = GetPhysicsPropertiesResponse(time_step=1.0 / physics_rate, pause=False,
+                                                    max_update_rate=physics_rate, success=True)
+
+        self.scan_pub = rospy.Publisher('/scan', LaserScan, queue_size=1)
+        self.image_pub = rospy.Publisher('/camera/rgb/image_raw', Image, queue_size=1)
+        self.odom_pubs = [rospy.Publisher(topic, Odometry, queue_size=1)
+                          for topic in ('/odom', '/dji_sim/odometry')]
+
+        for topic in ('/mobile_base/commands/velocity', '/dji_sim/target_velocity'):
+            rospy.Subscriber(topic, Twist, self.on_command)
+
+        rospy.Service('/gazebo/pause_physics', Empty, self.on_pause)
+        rospy.Service('/gazebo/unpause_physics', Empty, self.on_unpause)
+        rospy.Service('/gazebo/reset_simulation', Empty, self.on_reset)
+        rospy.Service('/gazebo/reset_world', Empty, self.on_reset)
+        rospy.Service('/gazebo/get_physics_properties', GetPhysicsProperties, self.on_get_physics)
+        rospy.Service('/gazebo/set_physics_properties', SetPhysicsProperties, self.on_set_physics)
+        rospy.Service('/gazebo/get_model_state', GetModelState, self.on_get_model_state)
+        rospy.Service('/gazebo/set_model_state', SetModelState, self.on_set_model_state)
+
+        self.scan = LaserScan(angle_min=float(world.angles[0]), angle_max=float(world.angles[-1]),
+                              angle_increment=float(world.angles[1] - world.angles[0]),
+                              range_min=0.1, range_max=world.range_max)
+        self.scan.header.frame_id = 'base_scan'
+        height, width, _ = world.image.shape
+        self.frame = Image(height=height, width=width, encoding='bgr8', step=width * 3,
+                           data=world.image.tobytes())
+        self.frame.header.frame_id = 'camera'
+
+        self.timers = []
+        for rate, callback in ((scan_rate, self.publish_scan), (camera_rate, self.publish_image),
+                               (odom_rate, self.publish_odometry)):
+            if rate > 0:
+                self.timers.append(rospy.Timer(rospy.Duration(1.0 / rate), callback))
+
+    def _advance(self):
+        now = time.time()
+        if not self.paused:
+            self.world.advance(now - self.last_advance)
+        self.last_advance = now
+
+    def on_command(self, twist):
+        with self.lock:
+            self._advance()
+            self.world.command(twist)
+
+    def on_pause(self, request):
+        with self.lock:
+            self._advance()
+            self.paused = True
+        return EmptyResponse()
+
+    def on_unpause(self, request):
+        with self.lock:
+            self._advance()
+            self.paused = False
+        return EmptyResponse()
+
+    def on_reset(self, request):
+        with self.lock:
+            self.world.reset()
+            self.last_advance = time.time()
+        return EmptyResponse()
+
+    def on_get_physics(self, request):
+        self.physics.pause = self.paused
+        return self.physics
+
+    def on_set_physics(self, request):
+        self.physics.time_step = request.time_step
+        self.physics.max_update_rate = request.max_update_rate
+        self.physics.gravity = request.gravity
+        self.physics.ode_config = request.ode_config
+        return SetPhysicsPropertiesResponse(success=True)
+
+    def on_get_model_state(self, request):
+        response = GetModelStateResponse(success=True)
+        with self.lock:
+            response.pose.position.x, response.pose.position.y = self.world.x, self.world.y
+            response.pose.position.z = self.world.z
+        return response
+
+    def on_set_model_state(self, request):
+        with self.lock:
+            success = self.world.set_model_state(request.model_state)
+        return SetModelStateResponse(success=success)
+
+    def publish_scan(self, event):
+        with self.lock:
+            if self.paused:
+                return
+            self._advance()
+            ranges = self.world.ranges()
+        self.scan.header.stamp = rospy.get_rostime()
+        self.scan.ranges = ranges.tolist()
+        self.scan_pub.publish(self.scan)
+
+    def publish_image(self, event):
+        if self.paused:
+            return
+        self.frame.header.stamp = rospy.get_rostime()
+        self.image_pub.publish(self.frame)
+
+    def publish_odometry(self, event):
+        with self.lock:
+            if self.paused:
+                return
+            self._advance()
+            odometry = Odometry()
+            odometry.header.stamp = rospy.get_rostime()
+            odometry.pose.pose.position.x = self.world.x
+            odometry.pose.pose.position.y = self.world.y
+            odometry.pose.pose.position.z = self.world.z
+            odometry.pose.pose.orientation.z = math.sin(self.world.yaw / 2)
+            odometry.pose.pose.orientation.w = math.cos(self.world.yaw / 2)
+        for publisher in self.odom_pubs:
+            publisher.publish(odometry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scan-rate', type=float, default=30.0, help='Hz, 0 disables the topic')
+    parser.add_argument('--camera-rate', type=float, default=30.0, help='Hz, 0 disables the topic')
+    parser.add_argument('--odom-rate', type=float, default=50.0, help='Hz, 0 disables the topic')
+    parser.add_argument('--image-shape', type=int, nargs=3, default=[480, 640, 3])
+    parser.add_argument('--num-beams', type=int, default=100)
+    parser.add_argument('--arena-radius', type=float, default=2.0)
+    args = parser.parse_args()
+
+    rospy.init_node('gazebo_standin')
+    # Only the kinematics, the topics are published by StandIn
+    world = ArenaWorld(args.arena_radius, args.num_beams, image_shape=tuple(args.image_shape),
+                       scan_rate=0, camera_rate=0, odom_rate=0)
+    StandIn(world, args.scan_rate, args.camera_rate, args.odom_rate)
+    rospy.spin()
+
+
+if __name__ == '__main__':
+    main()
@@ -20,6 +20,7 @@ import matplotlib.pyplot as plt
 import cPickle as pkl
 import os
 from gym import wrappers
+from gym_gazebo.tracing import span
 import timeit
 config = tf.ConfigProto()
 config.gpu_options.per_process_gpu_memory_fraction = 0.5
@@ -434,12 +435,14 @@ class DQNAgent:
                     if not(self.train_iter_ctr%save_model_every_nth):
                         # self.q_network.save(os.path.join(self.log_dir, 'weights/q_network_{}.h5'.format(str(self.train_iter_ctr).zfill(7))))
                         # output = open(os.path.join(self.log_dir, 'replay_memory/iter_{}.pkl'.format(str(self.train_iter_ctr).zfill(7))), 'wb')
-                        self.q_network.save(os.path.join(self.log_dir, 'q_network.h5'))
+                        with span('q_network.save', cat='agent'):
+                            self.q_network.save(os.path.join(self.log_dir, 'q_network.h5'))
                         
                     if not(self.train_iter_ctr%save_replay_mem_every_nth): # this takes a lot of time if big and causes ghost mode
-                        output = open(os.path.join(self.log_dir, 'mem.pkl'), 'wb')
-                        pkl.dump(self.replay_memory, output)
-                        output.close()
+                        with span('pkl.dump replay_memory', cat='agent'):
+                            output = open(os.path.join(self.log_dir, 'mem.pkl'), 'wb')
+                            pkl.dump(self.replay_memory, output)
+                            output.close()
 
                     if is_terminal or (num_timesteps_in_curr_episode > max_episode_length-1):
                         # state = self.env.reset()
@@ -460,7 +463,8 @@ class DQNAgent:
 
                     if not(self.train_iter_ctr % self.train_freq):
                         # print "update_policy() called"
-                        self.update_policy()
+                        with span('update_policy', cat='agent'):
+                            self.update_policy()
                         # print "update_policy() finished"
 
                 state = next_state
@@ -8,56 +8,7 @@ import time
 
 import matplotlib
 import matplotlib.pyplot as plt
-
-class QLearn:
-    def __init__(self, actions, epsilon, alpha, gamma):
-        self.q = {}
-        self.epsilon = epsilon  # exploration constant
-        self.alpha = alpha      # discount constant
-        self.gamma = gamma      # discount factor
-        self.actions = actions
-
-    def getQ(self, state, action):
-        return self.q.get((state, action), 0.0)
-
-    def learnQ(self, state, action, reward, value):
-        '''
-        Q-learning:
-            Q(s, a) += alpha * (reward(s,a) + max(Q(s') - Q(s,a))            
-        '''
-        oldv = self.q.get((state, action), None)
-        if oldv is None:
-            self.q[(state, action)] = reward
-        else:
-            self.q[(state, action)] = oldv + self.alpha * (value - oldv)
-
-    def chooseAction(self, state, return_q=False):
-        q = [self.getQ(state, a) for a in self.actions]
-        maxQ = max(q)
-
-        if random.random() < self.epsilon:
-            minQ = min(q); mag = max(abs(minQ), abs(maxQ))
-            # add random values to all the actions, recalculate maxQ
-            q = [q[i] + random.random() * mag - .5 * mag for i in range(len(self.actions))] 
-            maxQ = max(q)
-
-        count = q.count(maxQ)
-        # In case there're several state-action max values 
-        # we select a random one among them
-        if count > 1:
-            best = [i for i in range(len(self.actions)) if q[i] == maxQ]
-            i = random.choice(best)
-        else:
-            i = q.index(maxQ)
-
-        action = self.actions[i]        
-        if return_q: # if they want it, give it!
-            return action, q
-        return action
-
-    def learn(self, state1, action1, reward, state2):
-        maxqnew = max([self.getQ(state2, a) for a in self.actions])
-        self.learnQ(state1, action1, reward, reward + self.gamma*maxqnew)
+import qlearn
 
 class LivePlot(object):
     def __init__(self, outdir, data_key='episode_rewards', line_color='blue'):
@@ -106,6 +57,8 @@ def render():
 if __name__ == '__main__':
 
     env = gym.make('GazeboMazeErleRoverLidar-v0')
+    # Observations numbered 0 .. observation_space.n - 1, rays past 6 m count as 6 m
+    env.set_integer_state(max_range=6)
 
     outdir = '/tmp/gazebo_gym_experiments'
     env.monitor.start(outdir, force=True, seed=None)
@@ -113,8 +66,9 @@ if __name__ == '__main__':
 
     last_time_steps = numpy.ndarray(0)
 
-    qlearn = QLearn(actions=range(env.action_space.n),
-                    alpha=0.2, gamma=0.8, epsilon=0.9)
+    qlearn = qlearn.ArrayQLearn(actions=range(env.action_space.n),
+                    alpha=0.2, gamma=0.8, epsilon=0.9,
+                    num_states=env.observation_space.n)
 
     initial_epsilon = qlearn.epsilon
 
@@ -136,7 +90,7 @@ if __name__ == '__main__':
 
         #render() #defined above, not env.render()
 
-        state = ''.join(map(str, observation))
+        state = observation
 
         for i in range(1500):
 
@@ -150,7 +104,7 @@ if __name__ == '__main__':
             if highest_reward < cumulated_reward:
                 highest_reward = cumulated_reward
 
-            nextState = ''.join(map(str, observation))
+            nextState = observation
 
             qlearn.learn(state, action, reward, nextState)
 
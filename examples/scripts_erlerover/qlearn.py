@@ -1,3 +1,4 @@
+import numpy
 import random
 
 class QLearn:
@@ -48,4 +49,29 @@ class QLearn:
 
     def learn(self, state1, action1, reward, state2):
         maxqnew = max([self.getQ(state2, a) for a in self.actions])
-        self.learnQ(state1, action1, reward, reward + self.gamma*maxqnew)
\ No newline at end of file
+        self.learnQ(state1, action1, reward, reward + self.gamma*maxqnew)
+
+
+class ArrayQLearn(QLearn):
+    """QLearn for the integer states 0 .. num_states - 1 of env.set_integer_state().
+
+    The values live in a NumPy array indexed by state and action instead
+    of a dict keyed by (state, action) tuples.
+    """
+    def __init__(self, actions, epsilon, alpha, gamma, num_states):
+        QLearn.__init__(self, actions, epsilon, alpha, gamma)
+        self.q = numpy.zeros((num_states, len(self.actions)))
+        # Like QLearn, the first update of a value sets it to the reward
+        self.learned = numpy.zeros(self.q.shape, dtype=bool)
+        self.action_index = dict((a, i) for i, a in enumerate(self.actions))
+
+    def getQ(self, state, action):
+        return self.q[state, self.action_index[action]]
+
+    def learnQ(self, state, action, reward, value):
+        i = self.action_index[action]
+        if self.learned[state, i]:
+            self.q[state, i] += self.alpha * (value - self.q[state, i])
+        else:
+            self.q[state, i] = reward
+            self.learned[state, i] = True
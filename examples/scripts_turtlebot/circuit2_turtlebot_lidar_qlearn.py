@@ -23,6 +23,8 @@ def render():
 if __name__ == '__main__':
 
     env = gym.make('GazeboCircuit2TurtlebotLidar-v0')
+    # Observations numbered 0 .. observation_space.n - 1
+    env.set_integer_state()
 
     outdir = '/tmp/gazebo_gym_experiments'
     env.monitor.start(outdir, force=True, seed=None)
@@ -30,8 +32,9 @@ if __name__ == '__main__':
 
     last_time_steps = numpy.ndarray(0)
 
-    qlearn = qlearn.QLearn(actions=range(env.action_space.n),
-                    alpha=0.2, gamma=0.8, epsilon=0.9)
+    qlearn = qlearn.ArrayQLearn(actions=range(env.action_space.n),
+                    alpha=0.2, gamma=0.8, epsilon=0.9,
+                    num_states=env.observation_space.n)
 
     initial_epsilon = qlearn.epsilon
 
@@ -53,7 +56,7 @@ if __name__ == '__main__':
 
         #render() #defined above, not env.render()
 
-        state = ''.join(map(str, observation))
+        state = observation
 
         for i in range(1500):
 
@@ -67,7 +70,7 @@ if __name__ == '__main__':
             if highest_reward < cumulated_reward:
                 highest_reward = cumulated_reward
 
-            nextState = ''.join(map(str, observation))
+            nextState = observation
 
             qlearn.learn(state, action, reward, nextState)
 
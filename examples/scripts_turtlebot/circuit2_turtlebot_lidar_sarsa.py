@@ -14,6 +14,8 @@ import sarsa
 if __name__ == '__main__':
 
     env = gym.make('GazeboCircuit2TurtlebotLidar-v0')
+    # Observations numbered 0 .. observation_space.n - 1
+    env.set_integer_state()
 
     outdir = '/tmp/gazebo_gym_experiments'
     env.monitor.start(outdir, force=True, seed=None)
@@ -21,8 +23,9 @@ if __name__ == '__main__':
 
     last_time_steps = numpy.ndarray(0)
 
-    sarsa = sarsa.Sarsa(actions=range(env.action_space.n),
-                    epsilon=0.9, alpha=0.2, gamma=0.9)
+    sarsa = sarsa.ArraySarsa(actions=range(env.action_space.n),
+                    epsilon=0.9, alpha=0.2, gamma=0.9,
+                    num_states=env.observation_space.n)
 
     initial_epsilon = sarsa.epsilon
 
@@ -44,7 +47,7 @@ if __name__ == '__main__':
 
         #render() #defined above, not env.render()
 
-        state = ''.join(map(str, observation))
+        state = observation
 
         for i in range(1500):
 
@@ -58,7 +61,7 @@ if __name__ == '__main__':
             if highest_reward < cumulated_reward:
                 highest_reward = cumulated_reward
 
-            nextState = ''.join(map(str, observation))
+            nextState = observation
             nextAction = sarsa.chooseAction(nextState)
        
             #sarsa.learn(state, action, reward, nextState)
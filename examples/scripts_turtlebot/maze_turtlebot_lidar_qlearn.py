@@ -106,6 +106,8 @@ def render():
 if __name__ == '__main__':
 
     env = gym.make('GazeboMazeTurtlebotLidar-v0')
+    # Observations numbered 0 .. observation_space.n - 1
+    env.set_integer_state()
 
     outdir = '/tmp/gazebo_gym_experiments'
     env.monitor.start(outdir, force=True, seed=None)
@@ -136,7 +138,7 @@ if __name__ == '__main__':
 
         #render() #defined above, not env.render()
 
-        state = ''.join(map(str, observation))
+        state = observation
 
         for i in range(1000):
 
@@ -150,7 +152,7 @@ if __name__ == '__main__':
             if highest_reward < cumulated_reward:
                 highest_reward = cumulated_reward
 
-            nextState = ''.join(map(str, observation))
+            nextState = observation
 
             qlearn.learn(state, action, reward, nextState)
 
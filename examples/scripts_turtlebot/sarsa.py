@@ -1,3 +1,4 @@
+import numpy
 import random
 
 class Sarsa:
@@ -37,4 +38,29 @@ class Sarsa:
 
     def learn(self, state1, action1, reward, state2, action2):
         qnext = self.getQ(state2, action2)
-        self.learnQ(state1, action1, reward, reward + self.gamma * qnext)
\ No newline at end of file
+        self.learnQ(state1, action1, reward, reward + self.gamma * qnext)
+
+
+class ArraySarsa(Sarsa):
+    """Sarsa for the integer states 0 .. num_states - 1 of env.set_integer_state().
+
+    The values live in a NumPy array indexed by state and action instead
+    of a dict keyed by (state, action) tuples.
+    """
+    def __init__(self, actions, epsilon, alpha, gamma, num_states):
+        Sarsa.__init__(self, actions, epsilon, alpha, gamma)
+        self.q = numpy.zeros((num_states, len(self.actions)))
+        # Like Sarsa, the first update of a value sets it to the reward
+        self.learned = numpy.zeros(self.q.shape, dtype=bool)
+        self.action_index = dict((a, i) for i, a in enumerate(self.actions))
+
+    def getQ(self, state, action):
+        return self.q[state, self.action_index[action]]
+
+    def learnQ(self, state, action, reward, value):
+        i = self.action_index[action]
+        if self.learned[state, i]:
+            self.q[state, i] += self.alpha * (value - self.q[state, i])
+        else:
+            self.q[state, i] = reward
+            self.learned[state, i] = True
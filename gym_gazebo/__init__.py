@@ -9,52 +9,52 @@ logger = logging.getLogger(__name__)
 # Turtlebot envs
 register(
     id='GazeboMazeTurtlebotLidar-v0',
-    entry_point='gym_gazebo.envs:GazeboMazeTurtlebotLidarEnv',
+    entry_point='gym_gazebo.envs.gazebo_maze_turtlebot_lidar:GazeboMazeTurtlebotLidarEnv',
     # More arguments here
 )
 register(
     id='GazeboCircuitTurtlebotLidar-v0',
-    entry_point='gym_gazebo.envs:GazeboCircuitTurtlebotLidarEnv',
+    entry_point='gym_gazebo.envs.gazebo_circuit_turtlebot_lidar:GazeboCircuitTurtlebotLidarEnv',
     # More arguments here
 )
 register(
     id='GazeboCircuit2TurtlebotLidar-v0',
-    entry_point='gym_gazebo.envs:GazeboCircuit2TurtlebotLidarEnv',
+    entry_point='gym_gazebo.envs.gazebo_circuit2_turtlebot_lidar:GazeboCircuit2TurtlebotLidarEnv',
     # More arguments here
 )
 register(
     id='GazeboCircuit2TurtlebotLidarNn-v0',
-    entry_point='gym_gazebo.envs:GazeboCircuit2TurtlebotLidarNnEnv',
+    entry_point='gym_gazebo.envs.gazebo_circuit2_turtlebot_lidar_nn:GazeboCircuit2TurtlebotLidarNnEnv',
     # More arguments here
 )
 register(
     id='GazeboCircuit2cTurtlebotCameraNnEnv-v0',
-    entry_point='gym_gazebo.envs:GazeboCircuit2cTurtlebotCameraNnEnv',
+    entry_point='gym_gazebo.envs.gazebo_circuit2c_turtlebot_camera_nn:GazeboCircuit2cTurtlebotCameraNnEnv',
     # More arguments here
 )
 register(
     id='GazeboRoundTurtlebotLidar-v0',
-    entry_point='gym_gazebo.envs:GazeboRoundTurtlebotLidarEnv',
+    entry_point='gym_gazebo.envs.gazebo_round_turtlebot_lidar:GazeboRoundTurtlebotLidarEnv',
     # More arguments here
 )
 
 # Erle-Copter envs
 register(
     id='GazeboErleCopterHover-v0',
-    entry_point='gym_gazebo.envs:GazeboErleCopterHoverEnv',
+    entry_point='gym_gazebo.envs.gazebo_erlecopter_hover:GazeboErleCopterHoverEnv',
 )
 
 register(
     id='GazeboErleCopterNavigate-v0',
-    entry_point='gym_gazebo.envs:GazeboErleCopterNavigateEnv',
+    entry_point='gym_gazebo.envs.navigate_erlecopter_env:GazeboErleCopterNavigateEnv',
 )
 
 register(
     id='GazeboErleCopterNavigateFakeSim-v0',
-    entry_point='gym_gazebo.envs:GazeboErleCopterNavigateEnvFakeSim',
+    entry_point='gym_gazebo.envs.navigate_fakesim_env:GazeboErleCopterNavigateEnvFakeSim',
 )
 #Erle-Rover envs
 register(
     id='GazeboMazeErleRoverLidar-v0',
-    entry_point='gym_gazebo.envs:GazeboMazeErleRoverLidarEnv',
+    entry_point='gym_gazebo.envs.gazebo_maze_erlerover_lidar:GazeboMazeErleRoverLidarEnv',
 )
\ No newline at end of file
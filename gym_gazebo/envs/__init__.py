@@ -1,17 +1,53 @@
-from gym_gazebo.envs.gazebo_env import GazeboEnv
-
-# Turtlebot
-from gym_gazebo.envs.gazebo_maze_turtlebot_lidar import GazeboMazeTurtlebotLidarEnv
-from gym_gazebo.envs.gazebo_circuit_turtlebot_lidar import GazeboCircuitTurtlebotLidarEnv
-from gym_gazebo.envs.gazebo_circuit2_turtlebot_lidar import GazeboCircuit2TurtlebotLidarEnv
-from gym_gazebo.envs.gazebo_circuit2_turtlebot_lidar_nn import GazeboCircuit2TurtlebotLidarNnEnv
-from gym_gazebo.envs.gazebo_circuit2c_turtlebot_camera_nn import GazeboCircuit2cTurtlebotCameraNnEnv
-from gym_gazebo.envs.gazebo_round_turtlebot_lidar import GazeboRoundTurtlebotLidarEnv
-
-# Erle-Copter
-from gym_gazebo.envs.gazebo_erlecopter_hover import GazeboErleCopterHoverEnv
-from gym_gazebo.envs.navigate_erlecopter_env import GazeboErleCopterNavigateEnv
-from gym_gazebo.envs.navigate_fakesim_env import GazeboErleCopterNavigateEnvFakeSim
-
-#Erle-Rover
-from gym_gazebo.envs.gazebo_maze_erlerover_lidar import GazeboMazeErleRoverLidarEnv
+import importlib
+import sys
+import types
+
+# Env modules are imported on first use, not here: they pull in cv2,
+# cv_bridge, skimage, tf and the mavros/gazebo messages, and gym.make
+# imports just the module named in the registered entry point.
+ENV_MODULES = {
+    'GazeboEnv': 'gazebo_env',
+
+    # Turtlebot
+    'GazeboMazeTurtlebotLidarEnv': 'gazebo_maze_turtlebot_lidar',
+    'GazeboCircuitTurtlebotLidarEnv': 'gazebo_circuit_turtlebot_lidar',
+    'GazeboCircuit2TurtlebotLidarEnv': 'gazebo_circuit2_turtlebot_lidar',
+    'GazeboCircuit2TurtlebotLidarNnEnv': 'gazebo_circuit2_turtlebot_lidar_nn',
+    'GazeboCircuit2cTurtlebotCameraNnEnv': 'gazebo_circuit2c_turtlebot_camera_nn',
+    'GazeboRoundTurtlebotLidarEnv': 'gazebo_round_turtlebot_lidar',
+
+    # Erle-Copter
+    'GazeboErleCopterHoverEnv': 'gazebo_erlecopter_hover',
+    'GazeboErleCopterNavigateEnv': 'navigate_erlecopter_env',
+    'GazeboErleCopterNavigateEnvFakeSim': 'navigate_fakesim_env',
+
+    # Erle-Rover
+    'GazeboMazeErleRoverLidarEnv': 'gazebo_maze_erlerover_lidar',
+}
+
+
+class _LazyEnvs(types.ModuleType):
+    """This package, importing the module of an env class on first access.
+
+    Keeps "from gym_gazebo.envs import SomeEnv" working without a module
+    __getattr__, which Python 2 does not have.
+    """
+
+    def __getattr__(self, name):
+        module_name = ENV_MODULES.get(name)
+        if module_name is None:
+            raise AttributeError("module %r has no attribute %r" % (self.__name__, name))
+        value = getattr(importlib.import_module('%s.%s' % (self.__name__, module_name)), name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(ENV_MODULES))
+
+
+_lazy = _LazyEnvs(__name__, __doc__)
+_lazy.__dict__.update(sys.modules[__name__].__dict__)
+# Python 2 clears the globals of a module once it is freed, and the
+# methods above still use them
+_lazy._module = sys.modules[__name__]
+sys.modules[__name__] = _lazy
@@ -6,8 +6,8 @@ import numpy as np
 
 from gym import utils, spaces
 from gym_gazebo.envs import gazebo_env
+from gym_gazebo.envs.laser import ScanDiscretizer
 from geometry_msgs.msg import Twist
-from std_srvs.srv import Empty
 
 from sensor_msgs.msg import LaserScan
 
@@ -15,123 +15,56 @@ from gym.utils import seeding
 
 class GazeboCircuit2TurtlebotLidarEnv(gazebo_env.GazeboEnv):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         # Launch the simulation with the given launchfile name
-        gazebo_env.GazeboEnv.__init__(self, "GazeboCircuit2TurtlebotLidar_v0.launch")
-        self.vel_pub = rospy.Publisher('/mobile_base/commands/velocity', Twist, queue_size=5)
-        self.unpause = rospy.ServiceProxy('/gazebo/unpause_physics', Empty)
-        self.pause = rospy.ServiceProxy('/gazebo/pause_physics', Empty)
-        self.reset_proxy = rospy.ServiceProxy('/gazebo/reset_simulation', Empty)
+        gazebo_env.GazeboEnv.__init__(self, "GazeboCircuit2TurtlebotLidar_v0.launch", **kwargs)
+        self.backend.add_command('/mobile_base/commands/velocity', Twist)
 
         self.action_space = spaces.Discrete(3) #F,L,R
+        # Linear and angular velocity of every action
+        self.velocities = [(0.3, 0.0), (0.05, 0.3), (0.05, -0.3)]
         self.reward_range = (-np.inf, np.inf)
+        # 5 integer ranges, collision under 0.2m
+        self.discretizer = ScanDiscretizer(bins=5, min_range=0.2)
 
         self._seed()
 
-    def discretize_observation(self,data,new_ranges):
-        discretized_ranges = []
-        min_range = 0.2
-        done = False
-        mod = len(data.ranges)/new_ranges
-        for i, item in enumerate(data.ranges):
-            if (i%mod==0):
-                if data.ranges[i] == float ('Inf') or np.isinf(data.ranges[i]):
-                    discretized_ranges.append(6)
-                elif np.isnan(data.ranges[i]):
-                    discretized_ranges.append(0)
-                else:
-                    discretized_ranges.append(int(data.ranges[i]))
-            if (min_range > data.ranges[i] > 0):
-                done = True
-        return discretized_ranges,done
-
     def _seed(self, seed=None):
         self.np_random, seed = seeding.np_random(seed)
         return [seed]
 
     def _step(self, action):
 
-        rospy.wait_for_service('/gazebo/unpause_physics')
-        try:
-            self.unpause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/unpause_physics service call failed")
-
-        if action == 0: #FORWARD
-            vel_cmd = Twist()
-            vel_cmd.linear.x = 0.3
-            vel_cmd.angular.z = 0.0
-            self.vel_pub.publish(vel_cmd)
-        elif action == 1: #LEFT
-            vel_cmd = Twist()
-            vel_cmd.linear.x = 0.05
-            vel_cmd.angular.z = 0.3
-            self.vel_pub.publish(vel_cmd)
-        elif action == 2: #RIGHT
-            vel_cmd = Twist()
-            vel_cmd.linear.x = 0.05
-            vel_cmd.angular.z = -0.3
-            self.vel_pub.publish(vel_cmd)
-
-        data = None
-        while data is None:
-            try:
-                data = rospy.wait_for_message('/scan', LaserScan, timeout=5)
-            except:
-                pass
-
-        rospy.wait_for_service('/gazebo/pause_physics')
-        try:
-            #resp_pause = pause.call()
-            self.pause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/pause_physics service call failed")
-
-        state,done = self.discretize_observation(data,5)
-
-        if not done:
-            if action == 0:
-                reward = 5
+        vel_cmd = Twist()
+        vel_cmd.linear.x, vel_cmd.angular.z = self.velocities[action]
+        self.backend.apply_action({'/mobile_base/commands/velocity': vel_cmd})
+
+        # Run until the first scan taken after the action was sent
+        data = self.backend.advance({'/scan': LaserScan})['/scan']
+
+        with self.timing.phase('observation'):
+            state,done = self.discretizer(data)
+
+        with self.timing.phase('reward'):
+            if not done:
+                if action == 0:
+                    reward = 5
+                else:
+                    reward = 1
             else:
-                reward = 1
-        else:
-            reward = -200
+                reward = -200
 
         return state, reward, done, {}
 
     def _reset(self):
 
         # Resets the state of the environment and returns an initial observation.
-        rospy.wait_for_service('/gazebo/reset_simulation')
-        try:
-            #reset_proxy.call()
-            self.reset_proxy()
-        except rospy.ServiceException, e:
-            print ("/gazebo/reset_simulation service call failed")
-
-        # Unpause simulation to make observation
-        rospy.wait_for_service('/gazebo/unpause_physics')
-        try:
-            #resp_pause = pause.call()
-            self.unpause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/unpause_physics service call failed")
+        self.backend.reset_world()
 
         #read laser data
-        data = None
-        while data is None:
-            try:
-                data = rospy.wait_for_message('/scan', LaserScan, timeout=5)
-            except:
-                pass
-
-        rospy.wait_for_service('/gazebo/pause_physics')
-        try:
-            #resp_pause = pause.call()
-            self.pause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/pause_physics service call failed")
-
-        state = self.discretize_observation(data,5) 
+        data = self.backend.advance({'/scan': LaserScan})['/scan']
+
+        with self.timing.phase('observation'):
+            state,done = self.discretizer(data)
 
         return state
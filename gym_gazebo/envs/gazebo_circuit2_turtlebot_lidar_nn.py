@@ -6,8 +6,8 @@ import numpy as np
 
 from gym import utils, spaces
 from gym_gazebo.envs import gazebo_env
+from gym_gazebo.envs.laser import collision
 from geometry_msgs.msg import Twist
-from std_srvs.srv import Empty
 
 from sensor_msgs.msg import LaserScan
 
@@ -15,101 +15,57 @@ from gym.utils import seeding
 
 class GazeboCircuit2TurtlebotLidarNnEnv(gazebo_env.GazeboEnv):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         # Launch the simulation with the given launchfile name
-        gazebo_env.GazeboEnv.__init__(self, "GazeboCircuit2TurtlebotLidar_v0.launch")
-        self.vel_pub = rospy.Publisher('/mobile_base/commands/velocity', Twist, queue_size=5)
-        self.unpause = rospy.ServiceProxy('/gazebo/unpause_physics', Empty)
-        self.pause = rospy.ServiceProxy('/gazebo/pause_physics', Empty)
-        self.reset_proxy = rospy.ServiceProxy('/gazebo/reset_simulation', Empty)
+        gazebo_env.GazeboEnv.__init__(self, "GazeboCircuit2TurtlebotLidar_v0.launch", **kwargs)
+        self.backend.add_command('/mobile_base/commands/velocity', Twist)
 
+        self.action_space = spaces.Discrete(21) #angular velocity from -0.3 to 0.3
         self.reward_range = (-np.inf, np.inf)
 
         self._seed()
 
     def calculate_observation(self,data):
         min_range = 0.2
-        done = False
-        for i, item in enumerate(data.ranges):
-            if (min_range > data.ranges[i] > 0):
-                done = True
-        return data.ranges,done
+        return data.ranges, collision(data.ranges, min_range)
 
     def _seed(self, seed=None):
         self.np_random, seed = seeding.np_random(seed)
         return [seed]
 
     def _step(self, action):
-        rospy.wait_for_service('/gazebo/unpause_physics')
-        try:
-            self.unpause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/unpause_physics service call failed")
-
         max_ang_speed = 0.3
         ang_vel = (action-10)*max_ang_speed*0.1 #from (-0.33 to + 0.33)
 
         vel_cmd = Twist()
         vel_cmd.linear.x = 0.2
         vel_cmd.angular.z = ang_vel
-        self.vel_pub.publish(vel_cmd)
-
-        data = None
-        while data is None:
-            try:
-                data = rospy.wait_for_message('/scan', LaserScan, timeout=5)
-            except:
-                pass
-
-        rospy.wait_for_service('/gazebo/pause_physics')
-        try:
-            #resp_pause = pause.call()
-            self.pause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/pause_physics service call failed")
-
-        state,done = self.calculate_observation(data)
-
-        if not done:
-            # Straight reward = 5, Max angle reward = 0.5
-            reward = round(15*(max_ang_speed - abs(ang_vel) +0.0335), 2)
-            # print ("Action : "+str(action)+" Ang_vel : "+str(ang_vel)+" reward="+str(reward))
-        else:
-            reward = -200
+        self.backend.apply_action({'/mobile_base/commands/velocity': vel_cmd})
+
+        # Run until the first scan taken after the action was sent
+        data = self.backend.advance({'/scan': LaserScan})['/scan']
+
+        with self.timing.phase('observation'):
+            state,done = self.calculate_observation(data)
+
+        with self.timing.phase('reward'):
+            if not done:
+                # Straight reward = 5, Max angle reward = 0.5
+                reward = round(15*(max_ang_speed - abs(ang_vel) +0.0335), 2)
+                # print ("Action : "+str(action)+" Ang_vel : "+str(ang_vel)+" reward="+str(reward))
+            else:
+                reward = -200
 
         return np.asarray(state), reward, done, {}
 
     def _reset(self):
         # Resets the state of the environment and returns an initial observation.
-        rospy.wait_for_service('/gazebo/reset_simulation')
-        try:
-            #reset_proxy.call()
-            self.reset_proxy()
-        except rospy.ServiceException, e:
-            print ("/gazebo/reset_simulation service call failed")
-
-        # Unpause simulation to make observation
-        rospy.wait_for_service('/gazebo/unpause_physics')
-        try:
-            #resp_pause = pause.call()
-            self.unpause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/unpause_physics service call failed")
+        self.backend.reset_world()
+
         #read laser data
-        data = None
-        while data is None:
-            try:
-                data = rospy.wait_for_message('/scan', LaserScan, timeout=5)
-            except:
-                pass
-
-        rospy.wait_for_service('/gazebo/pause_physics')
-        try:
-            #resp_pause = pause.call()
-            self.pause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/pause_physics service call failed")
-
-        state,done = self.calculate_observation(data)
+        data = self.backend.advance({'/scan': LaserScan})['/scan']
+
+        with self.timing.phase('observation'):
+            state,done = self.calculate_observation(data)
 
         return np.asarray(state)
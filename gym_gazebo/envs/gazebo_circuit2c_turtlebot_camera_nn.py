@@ -10,8 +10,8 @@ import random
 
 from gym import utils, spaces
 from gym_gazebo.envs import gazebo_env
+from gym_gazebo.envs.laser import collision
 from geometry_msgs.msg import Twist
-from std_srvs.srv import Empty
 from sensor_msgs.msg import Image
 from sensor_msgs.msg import LaserScan
 from gym.utils import seeding
@@ -24,14 +24,14 @@ from skimage.viewer import ImageViewer
 
 class GazeboCircuit2cTurtlebotCameraNnEnv(gazebo_env.GazeboEnv):
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         # Launch the simulation with the given launchfile name
-        gazebo_env.GazeboEnv.__init__(self, "GazeboCircuit2cTurtlebotLidar_v0.launch")
-        self.vel_pub = rospy.Publisher('/mobile_base/commands/velocity', Twist, queue_size=5)
-        self.unpause = rospy.ServiceProxy('/gazebo/unpause_physics', Empty)
-        self.pause = rospy.ServiceProxy('/gazebo/pause_physics', Empty)
-        self.reset_proxy = rospy.ServiceProxy('/gazebo/reset_simulation', Empty)
+        gazebo_env.GazeboEnv.__init__(self, "GazeboCircuit2cTurtlebotLidar_v0.launch", **kwargs)
+        self.backend.add_command('/mobile_base/commands/velocity', Twist)
 
+        self.action_space = spaces.Discrete(3) #F,L,R
+        # Linear and angular velocity of every action
+        self.velocities = [(0.2, 0.0), (0.05, 0.2), (0.05, -0.2)]
         self.reward_range = (-np.inf, np.inf)
 
         self._seed()
@@ -42,24 +42,36 @@ class GazeboCircuit2cTurtlebotCameraNnEnv(gazebo_env.GazeboEnv):
         self.img_cols = 32
         self.img_channels = 1
 
+        # Decoded camera image of the last message _image_ok accepted
+        self._image = (None, None)
+
     def calculate_observation(self,data):
         min_range = 0.21
-        done = False
-        for i, item in enumerate(data.ranges):
-            if (min_range > data.ranges[i] > 0):
-                done = True
-        return done
+        return collision(data.ranges, min_range)
+
+    def _image_ok(self, image_data):
+        # A later wait can check the same message again, so decode once
+        if self._image[0] is image_data:
+            return self._image[1] is not None
+        h = image_data.height
+        w = image_data.width
+        try:
+            with self.timing.phase('decode'):
+                cv_image = CvBridge().imgmsg_to_cv2(image_data, "bgr8")
+        except CvBridgeError:
+            cv_image = None
+        #temporal fix, check image is not corrupted
+        if cv_image is not None and cv_image[h/2,w/2,0]==178 and cv_image[h/2,w/2,1]==178 and cv_image[h/2,w/2,2]==178:
+            #print("/camera/rgb/image_raw ERROR, retrying")
+            cv_image = None
+        self._image = (image_data, cv_image)
+        return cv_image is not None
 
     def _seed(self, seed=None):
         self.np_random, seed = seeding.np_random(seed)
         return [seed]
 
     def _step(self, action):
-        rospy.wait_for_service('/gazebo/unpause_physics')
-        try:
-            self.unpause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/unpause_physics service call failed")
 
         '''# 21 actions
         max_ang_speed = 0.3
@@ -71,56 +83,25 @@ class GazeboCircuit2cTurtlebotCameraNnEnv(gazebo_env.GazeboEnv):
         self.vel_pub.publish(vel_cmd)'''
 
         # 3 actions
-        if action == 0: #FORWARD
-            vel_cmd = Twist()
-            vel_cmd.linear.x = 0.2
-            vel_cmd.angular.z = 0.0
-            self.vel_pub.publish(vel_cmd)
-        elif action == 1: #LEFT
-            vel_cmd = Twist()
-            vel_cmd.linear.x = 0.05
-            vel_cmd.angular.z = 0.2
-            self.vel_pub.publish(vel_cmd)
-        elif action == 2: #RIGHT
-            vel_cmd = Twist()
-            vel_cmd.linear.x = 0.05
-            vel_cmd.angular.z = -0.2
-            self.vel_pub.publish(vel_cmd)
-
-        data = None
-        while data is None:
-            try:
-                data = rospy.wait_for_message('/scan', LaserScan, timeout=5)
-            except:
-                pass
-
-        done = self.calculate_observation(data)
-
-        image_data = None
-        success=False
-        cv_image = None
-        while image_data is None or success is False:
-            try:
-                image_data = rospy.wait_for_message('/camera/rgb/image_raw', Image, timeout=5)
-                h = image_data.height
-                w = image_data.width
-                cv_image = CvBridge().imgmsg_to_cv2(image_data, "bgr8")
-                #temporal fix, check image is not corrupted
-                if not (cv_image[h/2,w/2,0]==178 and cv_image[h/2,w/2,1]==178 and cv_image[h/2,w/2,2]==178):
-                    success = True
-                else:
-                    pass
-                    #print("/camera/rgb/image_raw ERROR, retrying")
-            except:
-                pass
-
-        rospy.wait_for_service('/gazebo/pause_physics')
-        try:
-            #resp_pause = pause.call()
-            self.pause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/pause_physics service call failed")
+        vel_cmd = Twist()
+        vel_cmd.linear.x, vel_cmd.angular.z = self.velocities[action]
+        self.backend.apply_action({'/mobile_base/commands/velocity': vel_cmd})
+
+        # Run until the first scan and the first valid image taken after the action was sent
+        readings = self.backend.advance({'/scan': LaserScan,
+                                         '/camera/rgb/image_raw': (Image, self._image_ok)})
+        data = readings['/scan']
+        cv_image = self._image[1]
+
+        with self.timing.phase('observation'):
+            done = self.calculate_observation(data)
+
+            cv_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+            cv_image = cv2.resize(cv_image, (self.img_rows, self.img_cols))
+            #cv_image = cv_image[(self.img_rows/20):self.img_rows-(self.img_rows/20),(self.img_cols/10):self.img_cols] #crop image
+            #cv_image = skimage.exposure.rescale_intensity(cv_image,out_range=(0,255))
 
+            state = cv_image.reshape(1, 1, cv_image.shape[0], cv_image.shape[1])
 
         self.last50actions.pop(0) #remove oldest
         if action == 0:
@@ -144,24 +125,25 @@ class GazeboCircuit2cTurtlebotCameraNnEnv(gazebo_env.GazeboEnv):
             reward = -200'''
 
 
-        # Add center of the track reward
-        # len(data.ranges) = 100
-        laser_len = len(data.ranges)
-        left_sum = sum(data.ranges[laser_len-(laser_len/5):laser_len-(laser_len/10)]) #80-90
-        right_sum = sum(data.ranges[(laser_len/10):(laser_len/5)]) #10-20
+        with self.timing.phase('reward'):
+            # Add center of the track reward
+            # len(data.ranges) = 100
+            laser_len = len(data.ranges)
+            left_sum = sum(data.ranges[laser_len-(laser_len/5):laser_len-(laser_len/10)]) #80-90
+            right_sum = sum(data.ranges[(laser_len/10):(laser_len/5)]) #10-20
 
-        center_detour = abs(right_sum - left_sum)/5
+            center_detour = abs(right_sum - left_sum)/5
 
-        # 3 actions
-        if not done:
-            if action == 0:
-                reward = 1 / float(center_detour+1)
-            elif action_sum > 45: #L or R looping
-                reward = -0.5
-            else: #L or R no looping
-                reward = 0.5 / float(center_detour+1)
-        else:
-            reward = -1
+            # 3 actions
+            if not done:
+                if action == 0:
+                    reward = 1 / float(center_detour+1)
+                elif action_sum > 45: #L or R looping
+                    reward = -0.5
+                else: #L or R no looping
+                    reward = 0.5 / float(center_detour+1)
+            else:
+                reward = -1
 
         #print("detour= "+str(center_detour)+" :: reward= "+str(reward)+" ::action="+str(action))
 
@@ -169,13 +151,6 @@ class GazeboCircuit2cTurtlebotCameraNnEnv(gazebo_env.GazeboEnv):
         x_t = skimage.transform.resize(x_t,(32,32))
         x_t = skimage.exposure.rescale_intensity(x_t,out_range=(0,255))'''
         
-        cv_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-        cv_image = cv2.resize(cv_image, (self.img_rows, self.img_cols))
-        #cv_image = cv_image[(self.img_rows/20):self.img_rows-(self.img_rows/20),(self.img_cols/10):self.img_cols] #crop image
-        #cv_image = skimage.exposure.rescale_intensity(cv_image,out_range=(0,255))
-
-
-        state = cv_image.reshape(1, 1, cv_image.shape[0], cv_image.shape[1])
         return state, reward, done, {}
 
         # test STACK 4
@@ -188,57 +163,23 @@ class GazeboCircuit2cTurtlebotCameraNnEnv(gazebo_env.GazeboEnv):
         self.last50actions = [0] * 50 #used for looping avoidance
 
         # Resets the state of the environment and returns an initial observation.
-        rospy.wait_for_service('/gazebo/reset_simulation')
-        try:
-            #reset_proxy.call()
-            self.reset_proxy()
-        except rospy.ServiceException, e:
-            print ("/gazebo/reset_simulation service call failed")
+        self.backend.reset_world()
 
-        # Unpause simulation to make observation
-        rospy.wait_for_service('/gazebo/unpause_physics')
-        try:
-            #resp_pause = pause.call()
-            self.unpause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/unpause_physics service call failed")
-
-        image_data = None
-        success=False
-        cv_image = None
-        while image_data is None or success is False:
-            try:
-                image_data = rospy.wait_for_message('/camera/rgb/image_raw', Image, timeout=5)
-                h = image_data.height
-                w = image_data.width
-                cv_image = CvBridge().imgmsg_to_cv2(image_data, "bgr8")
-                #temporal fix, check image is not corrupted
-                if not (cv_image[h/2,w/2,0]==178 and cv_image[h/2,w/2,1]==178 and cv_image[h/2,w/2,2]==178):
-                    success = True
-                else:
-                    pass
-                    #print("/camera/rgb/image_raw ERROR, retrying")
-            except:
-                pass
-
-        rospy.wait_for_service('/gazebo/pause_physics')
-        try:
-            #resp_pause = pause.call()
-            self.pause()
-        except rospy.ServiceException, e:
-            print ("/gazebo/pause_physics service call failed")
+        self.backend.advance({'/camera/rgb/image_raw': (Image, self._image_ok)})
+        cv_image = self._image[1]
 
         '''x_t = skimage.color.rgb2gray(cv_image)
         x_t = skimage.transform.resize(x_t,(32,32))
         x_t = skimage.exposure.rescale_intensity(x_t,out_range=(0,255))'''
 
 
-        cv_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
-        cv_image = cv2.resize(cv_image, (self.img_rows, self.img_cols))
-        #cv_image = cv_image[(self.img_rows/20):self.img_rows-(self.img_rows/20),(self.img_cols/10):self.img_cols] #crop image
-        #cv_image = skimage.exposure.rescale_intensity(cv_image,out_range=(0,255))
+        with self.timing.phase('observation'):
+            cv_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+            cv_image = cv2.resize(cv_image, (self.img_rows, self.img_cols))
+            #cv_image = cv_image[(self.img_rows/20):self.img_rows-(self.img_rows/20),(self.img_cols/10):self.img_cols] #crop image
+            #cv_image = skimage.exposure.rescale_intensity(cv_image,out_range=(0,255))
 
-        state = cv_image.reshape(1, 1, cv_image.shape[0], cv_image.shape[1])
+            state = cv_image.reshape(1, 1, cv_image.shape[0], cv_image.shape[1])
         return state
 
         # test STACK 4
@@ -1,30 +1,535 @@
+import contextlib
 import gym
+import numpy as np
 import rospy
 #import roslaunch
 import os
-import signal
-import subprocess
+import socket
+import threading
+import time
 
+from collections import namedtuple
+from gym import spaces
 from os import path
 
+from gym_gazebo import log
+from gym_gazebo.envs.laser import StateEncoder
+from gym_gazebo.envs.rendering import image_to_rgb, scan_to_top_down
+from gym_gazebo.envs.timing import ControlLoop, PhaseTimer
+from gym_gazebo.envs.world_control import WorldControl
+from gym_gazebo.envs.supervisor import ProcessSupervisor, GAZEBO_SERVICES, service_available, \
+    attach_requested, master_online
+
 from std_srvs.srv import Empty
-from mavros_msgs.msg import ParamValue
-from mavros_msgs.srv import ParamSet
+from gazebo_msgs.srv import GetPhysicsProperties, SetPhysicsProperties
+from rosgraph_msgs.msg import Clock
+
+logger = log.get_logger(__name__)
+
+# Default ports of the ROS and Gazebo masters. Instance N uses
+# base + N * PORT_STRIDE, instance 0 keeps the defaults.
+ROS_PORT_BASE = 11311
+GAZEBO_PORT_BASE = 11345
+PORT_STRIDE = 100
+
+
+def _free_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def master_ports(instance_id=None):
+    """Return the (ros_port, gazebo_port) pair of an instance.
+
+    ``instance_id`` is an integer, ``'auto'`` to pick free ports, or None
+    to read it from the GYM_GAZEBO_INSTANCE environment variable (and fall
+    back to the default ports).
+    """
+    if instance_id is None:
+        instance_id = os.environ.get('GYM_GAZEBO_INSTANCE')
+    if instance_id is None or instance_id == '':
+        return ROS_PORT_BASE, GAZEBO_PORT_BASE
+    if instance_id == 'auto':
+        return _free_port(), _free_port()
+    instance_id = int(instance_id)
+    return (ROS_PORT_BASE + instance_id * PORT_STRIDE,
+            GAZEBO_PORT_BASE + instance_id * PORT_STRIDE)
+
+
+class SimulatorCrashed(RuntimeError):
+    """A process of the simulator stack died or stopped publishing."""
+
+
+def reregister_node():
+    """Announce the publishers and subscribers of this node to the master again.
+
+    rospy registers topics only when they are created, so after roscore
+    was restarted the new master does not know about them. Subscribers are
+    re-registered before Gazebo comes back up, so the master passes them
+    the new publishers as usual.
+    """
+    import rosgraph
+    from rospy.impl.registration import get_topic_manager
+    master = rosgraph.Master(rospy.get_name())
+    caller_api = rospy.core.get_node_uri()
+    topic_manager = get_topic_manager()
+    for topic, topic_type in topic_manager.get_publications():
+        master.registerPublisher(topic, topic_type, caller_api)
+    for topic, topic_type in topic_manager.get_subscriptions():
+        master.registerSubscriber(topic, topic_type, caller_api)
+
+
+CachedMessage = namedtuple('CachedMessage', ['msg', 'stamp', 'seq'])
+
+
+class SensorCache(object):
+    """Latest-message cache with one long-lived subscription per topic.
+
+    rospy.wait_for_message creates and tears down a subscriber on every
+    call. The cache subscribes once and keeps the newest message of every
+    topic, so a step only blocks until a reading newer than the action
+    arrives.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._subscribers = {}
+        self._latest = {}
+        self._received = {}
+
+    def subscribe(self, topic, msg_class):
+        with self._cond:
+            if topic not in self._subscribers:
+                self._subscribers[topic] = rospy.Subscriber(
+                    topic, msg_class, self._callback, callback_args=topic)
+
+    def _callback(self, msg, topic):
+        header = getattr(msg, 'header', None)
+        if header is not None and not header.stamp.is_zero():
+            stamp = header.stamp
+        else:
+            stamp = rospy.get_rostime()
+        with self._cond:
+            count = self._received.get(topic, 0) + 1
+            self._received[topic] = count
+            seq = header.seq if header is not None else count
+            self._latest[topic] = CachedMessage(msg, stamp, seq)
+            self._cond.notify_all()
+
+    def latest(self, topic):
+        """Return the cached CachedMessage of ``topic`` or None."""
+        with self._cond:
+            return self._latest.get(topic)
+
+    def clear(self, topic=None):
+        """Forget cached messages, e.g. after the simulation time was reset."""
+        with self._cond:
+            if topic is None:
+                self._latest.clear()
+            else:
+                self._latest.pop(topic, None)
+
+    def wait_for_message(self, topic, msg_class, newer_than=None, timeout=None, condition=None):
+        """Return the first message of ``topic`` stamped after ``newer_than``.
+
+        Without ``newer_than`` the latest cached message is returned right
+        away. ``condition`` is an extra predicate the message must satisfy,
+        called once per message without the cache's lock held. Raises
+        rospy.ROSException on timeout, like rospy.wait_for_message.
+        """
+        self.subscribe(topic, msg_class)
+        deadline = None if timeout is None else time.time() + timeout
+        # Last message the condition rejected, not checked again
+        rejected = None
+        while True:
+            with self._cond:
+                while True:
+                    entry = self._latest.get(topic)
+                    if entry is not None and entry is not rejected and \
+                            (newer_than is None or entry.stamp > newer_than):
+                        break
+                    if rospy.is_shutdown():
+                        raise rospy.ROSInterruptException("rospy shutdown")
+                    if deadline is None:
+                        self._cond.wait(0.1)
+                    else:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            raise rospy.ROSException("timeout exceeded while waiting for a message on topic %s" % topic)
+                        self._cond.wait(min(remaining, 0.1))
+            # Slow checks (e.g. image decoding) must not hold up the callbacks
+            if condition is None or condition(entry.msg):
+                return entry.msg
+            rejected = entry
+
+    def close(self):
+        with self._cond:
+            for subscriber in self._subscribers.values():
+                subscriber.unregister()
+            self._subscribers.clear()
+            self._latest.clear()
+
+
+class ServiceClient(object):
+    """Persistent service proxy that is resolved once and reconnects on failure.
+
+    Callable like rospy.ServiceProxy, but the master lookup
+    (rospy.wait_for_service) happens only when connecting and the TCP
+    connection is kept open between calls. A failed call is retried once
+    on a fresh connection; if that fails too, the exception is raised as
+    before. Connecting gives up with rospy.ServiceException after
+    ``timeout`` seconds, so a dead simulator cannot block a call forever. ``stats()``
+    reports the call latency.
+    """
+
+    def __init__(self, name, service_class, timeout=10):
+        self.name = name
+        self.service_class = service_class
+        self.timeout = timeout
+        self._proxy = None
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.failures = 0
+        self.connects = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def _connect(self):
+        try:
+            rospy.wait_for_service(self.name, timeout=self.timeout)
+        except rospy.ROSInterruptException:
+            raise
+        except rospy.ROSException as e:
+            # What callers already handle when a call fails
+            raise rospy.ServiceException("service %s unavailable: %s" % (self.name, e))
+        self._proxy = rospy.ServiceProxy(self.name, self.service_class, persistent=True)
+        self.connects += 1
+
+    def close(self):
+        with self._lock:
+            if self._proxy is not None:
+                self._proxy.close()
+                self._proxy = None
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            start = time.time()
+            try:
+                for retry in (False, True):
+                    if self._proxy is None:
+                        self._connect()
+                    try:
+                        return self._proxy(*args, **kwargs)
+                    except (rospy.ServiceException, rospy.ROSException):
+                        self.failures += 1
+                        self._proxy.close()
+                        self._proxy = None
+                        if retry:
+                            raise
+            finally:
+                elapsed = time.time() - start
+                self.calls += 1
+                self.total_time += elapsed
+                self.max_time = max(self.max_time, elapsed)
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'failures': self.failures,
+            'connects': self.connects,
+            'mean_time': self.total_time / self.calls if self.calls else 0.0,
+            'max_time': self.max_time,
+        }
+
+
+class SimulationBackend(object):
+    """What an env needs from the simulator, independent of the transport.
+
+    Envs describe commands and sensors by topic name and message class and
+    keep their reward and termination logic to themselves. RosBackend
+    talks to Gazebo through ROS; other backends (surrogate simulators,
+    replayed logs, remote servers) implement the same methods and are
+    selected with GazeboEnv's ``backend`` argument or GYM_GAZEBO_BACKEND.
+    """
+
+    def add_command(self, topic, msg_class):
+        """Declare a command topic before the first apply_action."""
+        pass
+
+    def apply_action(self, commands):
+        """Send the {topic: message} commands to the robot."""
+        raise NotImplementedError
+
+    def advance(self, sensors):
+        """Run the simulation until every sensor has a reading taken after this call.
+
+        ``sensors`` maps topics to a message class, or to a (message class,
+        condition) pair when the reading must also satisfy ``condition``.
+        The simulation is paused again before returning the {topic: message}
+        readings.
+        """
+        raise NotImplementedError
+
+    def read_sensors(self, sensors):
+        """Latest {topic: message} readings, without running the simulation."""
+        raise NotImplementedError
+
+    @contextlib.contextmanager
+    def running(self):
+        """Keep the simulation running between the advance() calls in the block.
+
+        advance() then does not pause before returning, and the simulation
+        is paused once at the end of the block instead.
+        """
+        yield
+
+    def reset_world(self, rewind=True):
+        """Put the models back to their start poses; ``rewind`` also resets the sim time."""
+        raise NotImplementedError
+
+    def set_model_states(self, model_states):
+        """Move models, given as a list of gazebo_msgs/ModelState."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _sensor_spec(spec):
+    if isinstance(spec, tuple):
+        return spec
+    return spec, None
+
+
+class RosBackend(SimulationBackend):
+    """The ROS and Gazebo implementation used by default.
+
+    Commands are published on ROS topics, sensors are read through the
+    env's SensorCache and the rest goes through the /gazebo services.
+    advance() unpauses physics (or runs the lockstep iterations), waits
+    for the readings and pauses again. With a control rate set on the env,
+    physics keeps running and advance() waits for the next control tick
+    instead.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.publishers = {}
+        # After reset_simulation the sim time starts over at zero
+        self._rewound = False
+        # Inside running(), and whether advance() unpaused physics since
+        self._hold = False
+        self._unpaused = False
+
+    def add_command(self, topic, msg_class):
+        if topic not in self.publishers:
+            self.publishers[topic] = rospy.Publisher(topic, msg_class, queue_size=5)
+
+    def apply_action(self, commands):
+        with self.env.timing.phase('publish'):
+            for topic, msg in commands.items():
+                self.add_command(topic, type(msg))
+                self.publishers[topic].publish(msg)
+
+    def advance(self, sensors):
+        env = self.env
+        if env.control_loop is not None:
+            return self._advance_at_rate(sensors)
+        if not self._unpaused:
+            env._unpause_physics()
+            self._unpaused = self._hold
+        if self._rewound:
+            start, newer_than = rospy.Time(0), None
+            self._rewound = False
+        else:
+            start = newer_than = rospy.get_rostime()
+        env._advance_physics(start=start)
+        readings = {}
+        for topic, spec in sensors.items():
+            msg_class, condition = _sensor_spec(spec)
+            readings[topic] = env._wait_for_sensor(topic, msg_class, newer_than=newer_than,
+                                                   condition=condition)
+        if not self._hold:
+            env._pause_physics()
+        return readings
+
+    def _advance_at_rate(self, sensors):
+        env = self.env
+        if self._rewound:
+            # The sim clock started over, so did the ticks
+            env.control_loop.restart()
+            newer_than = None
+            self._rewound = False
+        else:
+            newer_than = rospy.get_rostime()
+        env.control_loop.tick()
+        readings = {}
+        for topic, spec in sensors.items():
+            msg_class, condition = _sensor_spec(spec)
+            readings[topic] = env._wait_for_sensor(topic, msg_class, newer_than=newer_than,
+                                                   condition=condition)
+        return readings
+
+    def read_sensors(self, sensors):
+        readings = {}
+        for topic, spec in sensors.items():
+            msg_class, condition = _sensor_spec(spec)
+            readings[topic] = self.env._wait_for_sensor(topic, msg_class, condition=condition)
+        return readings
+
+    @contextlib.contextmanager
+    def running(self):
+        self._hold = True
+        try:
+            yield
+        finally:
+            self._hold = False
+            if self._unpaused:
+                self._unpaused = False
+                self.env._pause_physics()
+
+    def reset_world(self, rewind=True):
+        name = '/gazebo/reset_simulation' if rewind else '/gazebo/reset_world'
+        with self.env.timing.phase('reset_world'):
+            self.env._call_gazebo(self.env.service_client(name, Empty))
+        # Cached readings predate the reset
+        self.env.sensors.clear()
+        self._rewound = rewind
+
+    def set_model_states(self, model_states):
+        from gazebo_msgs.srv import SetModelState
+        set_model_state = self.env.service_client('/gazebo/set_model_state', SetModelState)
+        for model_state in model_states:
+            response = set_model_state(model_state)
+            if not response.success:
+                raise rospy.ServiceException("/gazebo/set_model_state failed: %s" % response.status_message)
+
+    def close(self):
+        for publisher in self.publishers.values():
+            publisher.unregister()
+        self.publishers.clear()
+
+
+def load_backend(spec):
+    """Return the backend class named by 'package.module:Class'."""
+    import importlib
+    module_name, class_name = spec.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
 
 
 class GazeboEnv(gym.Env):
     """Superclass for all Gazebo environments.
+
+    Every env talks to its own ROS and Gazebo masters, selected with
+    ``instance_id`` (see master_ports). rospy can only be initialised once
+    per process, so side by side instances must live in separate processes.
+
+    With ``attach`` (or GYM_GAZEBO_ATTACH=1) a master and Gazebo already
+    running on those ports are reused instead of started, and close()
+    leaves the stack running for the next env.
+
+    If a process of the stack dies, or no sensor data arrives for
+    ``stall_timeout`` seconds, step() ends the episode as truncated
+    (info['TimeLimit.truncated']) and restarts the stack in the background.
+    The next reset() waits for the restart to finish.
+
+    Subclasses reach the simulator through ``self.backend``, a RosBackend
+    unless another SimulationBackend is passed as ``backend`` or named by
+    GYM_GAZEBO_BACKEND.
     """
-    metadata = {'render.modes': ['human']}
+    metadata = {'render.modes': ['human', 'rgb_array']}
+
+    # Cached topics render(mode='rgb_array') draws from, the camera first
+    camera_topic = '/camera/rgb/image_raw'
+    scan_topic = '/scan'
+
+    # False for the envs whose physics keeps running between steps
+    pauses_between_steps = True
     
-    def __init__(self, launchfile):
+    def __init__(self, launchfile, instance_id=None, attach=None, backend=None):
+
+        self.ros_port, self.gazebo_port = master_ports(instance_id)
+        os.environ["ROS_MASTER_URI"] = "http://localhost:%d" % self.ros_port
+        os.environ["GAZEBO_MASTER_URI"] = "http://localhost:%d" % self.gazebo_port
+
+        # Processes of this env only, killed again in _close. Envs that start
+        # ArduPilot SITL before calling this have created it already.
+        if not hasattr(self, 'supervisor'):
+            self.supervisor = ProcessSupervisor()
+
+        self.attach = attach_requested(attach)
+
+        # Per-phase step timing, off until enable_timing()
+        self.timing = PhaseTimer()
+
+        # A SimulationBackend class (or 'module:Class') other than ROS and
+        # Gazebo, which are then not started at all
+        backend = backend or os.environ.get('GYM_GAZEBO_BACKEND') or None
+        if isinstance(backend, str):
+            backend = load_backend(backend)
+        if backend is None:
+            self._start_stack(launchfile)
+
+        # Long-lived sensor subscriptions and service connections shared by the subclasses
+        self.sensors = SensorCache()
+        self.services = {}
+
+        self.unpause = self.service_client('/gazebo/unpause_physics', Empty)
+        self.pause = self.service_client('/gazebo/pause_physics', Empty)
 
+        # Free running (unpause -> act -> wait for sensors -> pause) by default
+        self.lockstep_iterations = None
+        self.physics_time_step = None
+        # Physics the last configure() call set
+        self.physics_properties = None
+        # Gazebo transport connection lockstep steps the world over
+        self.world_control = None
+
+        # One _step per step() unless set_frame_skip() is called
+        self.frame_skip = 1
+        self.frame_max_pool = False
+
+        # Continuous mode at a fixed rate, see set_control_rate()
+        self.control_loop = None
+
+        # Laser states as arrays unless set_integer_state() is called
+        self.state_encoder = None
+
+        # Thread and outcome of the last step_async/reset_async
+        self._pending = None
+
+        # Crash detection and recovery
+        self.sensor_timeout = 5
+        self.stall_timeout = 60
+        self.max_restarts = 3
+        self.restarts = 0
+        self._recovery = None
+        self._recovery_error = None
+        self._last_observation = None
+
+        # Wall and sim time of the last real time factor sample. With an
+        # interval set, step() logs the real time factor that often.
+        self._rtf_sample = None
+        self.rtf_report_interval = None
+
+        self.backend = RosBackend(self) if backend is None else backend(self)
+
+    def _start_stack(self, launchfile):
         #start roscore
-        subprocess.Popen("roscore")
-        print ("Roscore launched!")
+        if self.attach and master_online(os.environ["ROS_MASTER_URI"]):
+            print ("Attached to the roscore running on port %d" % self.ros_port)
+        else:
+            self.supervisor.launch("roscore", ["roscore", "-p", str(self.ros_port)])
+            self.supervisor.wait_for_master(os.environ["ROS_MASTER_URI"], watch=["roscore"])
+            print ("Roscore launched on port %d!" % self.ros_port)
 
-        # Launch the simulation with the given launchfile name
-        rospy.init_node('gym', anonymous=True)
+        # A second env in the same process shares the node
+        if not rospy.core.is_initialized():
+            rospy.init_node('gym', anonymous=True)
 
         if launchfile.startswith("/"):
             fullpath = launchfile
@@ -33,10 +538,412 @@ class GazeboEnv(gym.Env):
         if not path.exists(fullpath):
             raise IOError("File "+fullpath+" does not exist")
 
-        subprocess.Popen(["roslaunch",fullpath])
-        print ("Gazebo launched!")
+        # Launch the simulation with the given launchfile name
+        if self.attach and all(service_available(name) for name in GAZEBO_SERVICES):
+            print ("Attached to the Gazebo running on port %d" % self.gazebo_port)
+        else:
+            self.supervisor.launch("roslaunch", ["roslaunch", "-p", str(self.ros_port), fullpath])
+            self.supervisor.wait_for_services(GAZEBO_SERVICES, watch=["roslaunch"])
+            print ("Gazebo launched on port %d!" % self.gazebo_port)
+
+    def service_client(self, name, service_class):
+        """Return the persistent ServiceClient of service ``name``."""
+        client = self.services.get(name)
+        if client is None:
+            client = self.services[name] = ServiceClient(name, service_class)
+        return client
+
+    def enable_timing(self, enabled=True, dump_path=None, dump_interval=60):
+        """Time the phases of step() and reset(), see get_timing_stats.
+
+        With ``dump_path`` the stats are also written to that file as JSON
+        every ``dump_interval`` seconds.
+        """
+        self.timing.enabled = enabled
+        self.timing.dump_path = dump_path
+        self.timing.dump_interval = dump_interval
+
+    def get_timing_stats(self):
+        """Count, mean, p50/p95/p99 and max duration in seconds of every phase.
+
+        'step' and 'reset' are the totals; 'unpause', 'pause', 'advance' and
+        'wait <topic>' are measured here, the envs add their own phases such
+        as 'publish', 'observation' and 'reward'.
+        """
+        return self.timing.stats()
+
+    def get_control_stats(self):
+        """Deadline misses and latency of the control loop, see set_control_rate().
+
+        None unless a control rate is set. Latencies are in sim seconds.
+        """
+        if self.control_loop is None:
+            return None
+        return self.control_loop.stats()
+
+    def get_service_stats(self):
+        """Call count, failures and latency of every service used so far."""
+        return dict((name, client.stats()) for name, client in self.services.items())
+
+    def step_async(self, action):
+        """Start step(action) in the background, step_wait() returns its result.
+
+        Like GazeboVecEnv.step_async: the service calls and sensor waits of
+        the step run on a thread while the caller goes on, e.g. with the
+        learner update, until it calls step_wait().
+        """
+        self._start_pending(self.step, action)
+
+    def step_wait(self):
+        """Wait for the step started by step_async and return its result."""
+        return self._wait_pending()
+
+    def reset_async(self):
+        """Start reset() in the background, see step_async."""
+        self._start_pending(self.reset)
+
+    def reset_wait(self):
+        """Wait for the reset started by reset_async and return the observation."""
+        return self._wait_pending()
+
+    def _start_pending(self, method, *args):
+        if self._pending is not None:
+            raise RuntimeError("the last step_async or reset_async was not waited for")
+        outcome = {}
+
+        def run():
+            try:
+                outcome['result'] = method(*args)
+            except Exception as e:
+                outcome['error'] = e
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        self._pending = (thread, outcome)
+
+    def _wait_pending(self):
+        if self._pending is None:
+            raise RuntimeError("no step_async or reset_async to wait for")
+        thread, outcome = self._pending
+        thread.join()
+        self._pending = None
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['result']
+
+    def step(self, action):
+        self._wait_for_recovery()
+        try:
+            with self.timing.phase('step'):
+                observation, reward, done, info = self._repeat_action(action)
+            if self.state_encoder is not None:
+                observation = self._encode_state(observation)
+        except SimulatorCrashed as e:
+            logger.warning("Simulator crashed: %s. Restarting it in the background", e)
+            self._start_recovery()
+            return self._last_observation, 0.0, True, {'TimeLimit.truncated': True, 'simulator_crash': str(e)}
+        self._last_observation = observation
+        if self.rtf_report_interval and (self._rtf_sample is None or
+                                         time.time() - self._rtf_sample[0] >= self.rtf_report_interval):
+            rtf = self.get_real_time_factor()
+            if rtf is not None:
+                logger.info("Real time factor: %.2f", rtf)
+        return observation, reward, done, info
+
+    def _repeat_action(self, action):
+        if self.frame_skip == 1:
+            return gym.Env.step(self, action)
+        total_reward = 0.0
+        observations = []
+        with self.backend.running():
+            for frame in range(self.frame_skip):
+                observation, reward, done, info = gym.Env.step(self, action)
+                total_reward += reward
+                observations.append(observation)
+                if done:
+                    break
+        if self.frame_max_pool and len(observations) > 1:
+            pooled = np.maximum.reduce([np.asarray(o) for o in observations])
+            observation = pooled.tolist() if isinstance(observation, list) else pooled
+        return observation, total_reward, done, info
+
+    def reset(self):
+        for attempt in range(self.max_restarts + 1):
+            try:
+                self._wait_for_recovery()
+                with self.timing.phase('reset'):
+                    observation = gym.Env.reset(self)
+                    if self.state_encoder is not None:
+                        observation = self._encode_state(observation)
+                    self._last_observation = observation
+                return self._last_observation
+            except SimulatorCrashed as e:
+                if attempt == self.max_restarts:
+                    raise
+                logger.warning("Simulator crashed during reset: %s. Restarting it", e)
+                self._start_recovery()
+
+    def _restart_on_crash(self, func, *args):
+        """Call ``func``, restarting the stack whenever it raises SimulatorCrashed.
+
+        For start-up work outside step() and reset(), which recover on
+        their own, e.g. the ErleCopter takeoff in __init__. Gives up after
+        ``max_restarts`` restarts.
+        """
+        for attempt in range(self.max_restarts + 1):
+            try:
+                return func(*args)
+            except SimulatorCrashed as e:
+                if attempt == self.max_restarts:
+                    raise
+                logger.warning("Simulator crashed: %s. Restarting it", e)
+                self._restart_stack()
+
+    def check_backends(self):
+        """Raise SimulatorCrashed if a process started by this env has exited."""
+        dead = [name for name in self.supervisor.dead() if name != "gzclient"]
+        if dead:
+            raise SimulatorCrashed("%s exited" % ", ".join(dead))
+
+    def _wait_for_sensor(self, topic, msg_class, newer_than=None, condition=None):
+        """Wait for a reading of ``topic``, see SensorCache.wait_for_message.
+
+        Retries every ``sensor_timeout`` seconds while the stack is alive and
+        raises SimulatorCrashed once a process died or nothing arrived for
+        ``stall_timeout`` seconds.
+        """
+        deadline = time.time() + self.stall_timeout
+        while True:
+            try:
+                with self.timing.phase('wait %s' % topic):
+                    return self.sensors.wait_for_message(topic, msg_class, newer_than=newer_than,
+                                                         timeout=self.sensor_timeout, condition=condition)
+            except rospy.ROSInterruptException:
+                raise
+            except rospy.ROSException:
+                self.check_backends()
+                if time.time() > deadline:
+                    raise SimulatorCrashed("no message on %s for %ds" % (topic, self.stall_timeout))
+
+    def _sim_sleep(self, duration, condition=None):
+        """Sleep ``duration`` seconds of simulation time, as published on /clock.
+
+        Unlike time.sleep, this lasts as long as the simulator needs for it,
+        whatever real time factor it reaches. ``condition`` is a callable
+        checked on every /clock tick; the sleep ends early once it returns
+        True, and so does this method. Needs the world running, and raises
+        SimulatorCrashed like _wait_for_sensor when /clock stops.
+        """
+        target = rospy.get_rostime() + rospy.Duration.from_sec(duration)
+        met = []
+
+        def done(msg):
+            if condition is not None and condition():
+                met.append(True)
+                return True
+            return msg.clock >= target
+
+        self._wait_for_sensor('/clock', Clock, condition=done)
+        return bool(met)
+
+    def _start_recovery(self):
+        self._recovery_error = None
+        self._recovery = threading.Thread(target=self._recover)
+        self._recovery.daemon = True
+        self._recovery.start()
+
+    def _wait_for_recovery(self):
+        if self._recovery is None:
+            return
+        self._recovery.join()
+        self._recovery = None
+        if self._recovery_error is not None:
+            raise SimulatorCrashed("restarting the simulator failed: %s" % self._recovery_error)
+
+    def _recover(self):
+        try:
+            self._restart_stack()
+        except Exception as e:
+            self._recovery_error = e
+
+    def _restart_stack(self):
+        """Relaunch the processes of this env and reconnect to them.
 
-        self.gzclient_pid = 0
+        When attached, only the processes this env started itself are
+        relaunched; the rest of the stack is waited for.
+        """
+        self.restarts += 1
+        for client in self.services.values():
+            client.close()
+
+        self.supervisor.restart(exclude=["gzclient"])
+        watch = ["roscore", "roslaunch"]
+        self.supervisor.wait_for_master(os.environ["ROS_MASTER_URI"], watch=watch)
+        reregister_node()
+        self.supervisor.wait_for_services(GAZEBO_SERVICES, watch=watch)
+
+        # The sim time starts over and cached readings belong to the old world
+        self.sensors.clear()
+        if self.lockstep_iterations:
+            self._pause_physics(force=True)
+            self._close_world_control()
+            self.world_control = self._connect_world_control()
+        logger.info("Simulator restarted (%d restarts so far)", self.restarts)
+
+    def set_lockstep(self, iterations):
+        """Advance the world by exactly ``iterations`` physics steps per action.
+
+        The world then stays paused and every step publishes one Gazebo
+        world_control multi_step message over a connection kept open by
+        WorldControl, instead of unpausing and pausing around the sensor
+        wait. Sim time per step is fixed and physics runs as fast as the
+        CPU allows. ``iterations`` times the physics step size must cover
+        at least one period of the sensors a step reads. Needs pygazebo
+        and the RosBackend. None switches back to free running.
+        """
+        if iterations:
+            if not isinstance(self.backend, RosBackend):
+                raise ValueError("lockstep needs the RosBackend, not %s" % type(self.backend).__name__)
+            if self.world_control is None:
+                self.world_control = self._connect_world_control()
+            get_physics = self.service_client('/gazebo/get_physics_properties', GetPhysicsProperties)
+            self.physics_time_step = get_physics().time_step
+            self.lockstep_iterations = int(iterations)
+            self._pause_physics(force=True)
+        else:
+            self.lockstep_iterations = None
+            self._close_world_control()
+
+    def _connect_world_control(self):
+        try:
+            return WorldControl(self.gazebo_port)
+        except ImportError as e:
+            raise ImportError("lockstep steps the world through pygazebo (pip install pygazebo): %s" % e)
+        except IOError as e:
+            raise SimulatorCrashed("connecting to the Gazebo master failed: %s" % e)
+
+    def _close_world_control(self):
+        if self.world_control is not None:
+            self.world_control.close()
+            self.world_control = None
+
+    def set_frame_skip(self, frames, max_pool=False):
+        """Apply every action for ``frames`` consecutive steps of the subclass.
+
+        step() runs _step() up to ``frames`` times with the same action,
+        each waiting for the next sensor reading, sums the rewards and stops
+        early when the episode ends. The simulation keeps running in
+        between, so the RosBackend makes one unpause and one pause call per
+        step(). Returns the last observation, or with ``max_pool`` the
+        elementwise maximum of the observations. 1 switches it off.
+        """
+        self.frame_skip = max(1, int(frames))
+        self.frame_max_pool = max_pool
+
+    def set_control_rate(self, rate):
+        """Step continuously at ``rate`` actions per second of sim time.
+
+        Physics is unpaused once and keeps running between steps, so no
+        pause/unpause service calls are made. Every step() sends the action
+        and returns at the next tick of the rate, with sensor readings
+        taken after the action; get_control_stats() reports the deadlines
+        the agent missed and the timing jitter. Replaces lockstep mode.
+        None switches back to the env's own stepping, pausing between steps
+        if it did so before.
+        """
+        if rate:
+            self.lockstep_iterations = None
+            self.control_loop = ControlLoop(rate, lambda: rospy.get_rostime().to_sec(), self._sim_sleep)
+            self._unpause_physics()
+        elif self.control_loop is not None:
+            self.control_loop = None
+            if self.pauses_between_steps:
+                self._pause_physics()
+
+    def set_integer_state(self, enabled=True, max_range=None):
+        """Return laser states as one integer instead of an array of ranges.
+
+        For the envs with a discrete laser state (self.discretizer), the
+        integer ranges, capped at ``max_range``, become the digits of a
+        mixed-radix index from 0 to observation_space.n - 1, which
+        becomes a spaces.Discrete. Tabular agents can index arrays with it
+        instead of hashing the array. ``max_range`` defaults to the value
+        of infinite readings; the ErleRover needs it set. False switches
+        back to arrays.
+        """
+        discretizer = getattr(self, 'discretizer', None)
+        if discretizer is None:
+            raise ValueError("%s has no discrete laser state" % type(self).__name__)
+        if enabled:
+            if self.state_encoder is None:
+                self._array_observation_space = self.observation_space
+            self.state_encoder = StateEncoder.for_discretizer(discretizer, max_range)
+            self.observation_space = spaces.Discrete(self.state_encoder.n)
+        elif self.state_encoder is not None:
+            self.state_encoder = None
+            self.observation_space = self._array_observation_space
+
+    def _encode_state(self, observation):
+        # Longer ranges count as max_range, the encoder rejects them
+        return self.state_encoder.encode(np.minimum(observation, self.state_encoder.radices - 1))
+
+    def _call_gazebo(self, client):
+        """Call a /gazebo service, raising SimulatorCrashed if it fails.
+
+        ServiceClient has already retried on a fresh connection, so the
+        service is gone or hung rather than busy.
+        """
+        try:
+            return client()
+        except rospy.ROSInterruptException:
+            raise
+        except rospy.ROSException as e:
+            self.check_backends()
+            raise SimulatorCrashed("%s failed: %s" % (client.name, e))
+
+    def _unpause_physics(self):
+        if self.lockstep_iterations:
+            return
+        with self.timing.phase('unpause'):
+            self._call_gazebo(self.unpause)
+
+    def _pause_physics(self, force=False):
+        if self.lockstep_iterations and not force:
+            return
+        with self.timing.phase('pause'):
+            self._call_gazebo(self.pause)
+
+    def _advance_physics(self, start=None, timeout=5):
+        """In lockstep mode, run the paused world for the configured iterations.
+
+        Blocks until /clock reports the target sim time. ``start`` is the sim
+        time the world is paused at, by default the current ROS time.
+        Without lockstep this is a no-op: the world is already running.
+        """
+        if not self.lockstep_iterations:
+            return
+        with self.timing.phase('advance'):
+            self._advance_world(start, timeout)
+
+    def _advance_world(self, start, timeout):
+        if start is None:
+            start = rospy.get_rostime()
+        target = start + rospy.Duration.from_sec(self.lockstep_iterations * self.physics_time_step)
+
+        try:
+            self.world_control.step(self.lockstep_iterations)
+        except IOError as e:
+            self.check_backends()
+            raise SimulatorCrashed("world_control multi_step failed: %s" % e)
+        try:
+            self.sensors.wait_for_message('/clock', Clock, timeout=timeout,
+                                          condition=lambda msg: msg.clock >= target)
+        except rospy.ROSInterruptException:
+            raise
+        except rospy.ROSException:
+            self.check_backends()
+            logger.warning("World did not reach sim time %.3f within %ds", target.to_sec(), timeout)
 
     def _step(self, action):
 
@@ -52,66 +959,112 @@ class GazeboEnv(gym.Env):
     def _render(self, mode="human", close=False):
 
         if close:
-            tmp = os.popen("ps -Af").read()
-            proccount = tmp.count('gzclient')
-            if proccount > 0:
-                if self.gzclient_pid != 0:
-                    os.kill(self.gzclient_pid, signal.SIGTERM)
-                    os.wait()
+            self.supervisor.terminate("gzclient")
             return
 
-        tmp = os.popen("ps -Af").read()
-        proccount = tmp.count('gzclient')
-        if proccount < 1:
-            subprocess.Popen("gzclient")
-            self.gzclient_pid = int(subprocess.check_output(["pidof","-s","gzclient"]))
-        else:
-            self.gzclient_pid = 0
+        if mode == 'rgb_array':
+            return self._render_rgb_array()
+
+        if not self.supervisor.is_alive("gzclient"):
+            self.supervisor.launch("gzclient", ["gzclient"])
+
+    def _render_rgb_array(self):
+        """Latest camera frame, or a top-down plot of the latest scan.
+
+        Only uses readings the env has already received, so nothing is
+        subscribed or waited for and gzclient is not needed.
+        """
+        entry = self.sensors.latest(self.camera_topic)
+        if entry is not None:
+            return image_to_rgb(entry.msg)
+        entry = self.sensors.latest(self.scan_topic)
+        if entry is not None:
+            return scan_to_top_down(entry.msg)
+        return np.zeros((200, 200, 3), dtype=np.uint8)
 
     def _close(self):
-        param_set_proxy = rospy.ServiceProxy('/mavros/param/set', ParamSet)
+        if self._pending is not None:
+            self._pending[0].join()
+            self._pending = None
+        if self._recovery is not None:
+            self._recovery.join()
+            self._recovery = None
+
+        self.backend.close()
 
         # Unset Mavros as GCS
-        rospy.wait_for_service('/mavros/param/set')
-        try:
-            info = ParamSet()
-            info.param_id = 'SYSID_MYGCS'
-
-            val = ParamValue()
-            val.integer = 255
-            val.real = 0.0
-            info.value = val
-
-            param_set_proxy(info.param_id, info.value)
-            rospy.loginfo('Changed SYSID_MYGCS to %d', val.integer) 
-        except rospy.ServiceException, e:
-            print ("/mavros/set_mode service call failed: %s"%e)
-
-        # Kill gzclient, gzserver and roscore
-        tmp = os.popen("ps -Af").read()
-        gzclient_count = tmp.count('gzclient')
-        gzserver_count = tmp.count('gzserver')
-        roscore_count = tmp.count('roscore')
-        rosmaster_count = tmp.count('rosmaster')
-
-        if gzclient_count > 0:
-            os.system("killall -9 gzclient")
-        if gzserver_count > 0:
-            os.system("killall -9 gzserver")
-        if rosmaster_count > 0:
-            os.system("killall -9 rosmaster")
-        if roscore_count > 0:
-            os.system("killall -9 roscore")
-
-        if (gzclient_count or gzserver_count or roscore_count or rosmaster_count >0):
-            os.wait()
-
-    def _configure(self):
+        if isinstance(self.backend, RosBackend) and service_available('/mavros/param/set'):
+            # Only the ArduPilot envs need mavros_msgs
+            from mavros_msgs.msg import ParamValue
+            from mavros_msgs.srv import ParamSet
+            param_set_proxy = self.service_client('/mavros/param/set', ParamSet)
+            try:
+                info = ParamSet()
+                info.param_id = 'SYSID_MYGCS'
 
-        # TODO
-        # From OpenAI API: Provides runtime configuration to the enviroment
-        # Maybe set the Real Time Factor?
-        pass
+                val = ParamValue()
+                val.integer = 255
+                val.real = 0.0
+                info.value = val
+
+                param_set_proxy(info.param_id, info.value)
+                rospy.loginfo('Changed SYSID_MYGCS to %d', val.integer) 
+            except rospy.ServiceException, e:
+                print ("/mavros/set_mode service call failed: %s"%e)
+
+        self._close_world_control()
+        self.sensors.close()
+        for client in self.services.values():
+            client.close()
+
+        # Kill gzclient, gzserver and roscore started by this env
+        self.supervisor.terminate("gzclient")
+        if not self.attach:
+            self.supervisor.shutdown()
+
+    def _configure(self, max_step_size=None, real_time_update_rate=None, iterations=None):
+        """Change the physics of the running world, called by env.configure().
+
+        ``max_step_size`` is the physics step in seconds,
+        ``real_time_update_rate`` the physics steps per wall second (0 runs
+        as fast as possible) and ``iterations`` the ODE solver iterations.
+        Arguments left at None keep their current value. gym's configure()
+        drops the return value, so the resulting physics properties are
+        kept in ``self.physics_properties``.
+        """
+        get_physics = self.service_client('/gazebo/get_physics_properties', GetPhysicsProperties)
+        set_physics = self.service_client('/gazebo/set_physics_properties', SetPhysicsProperties)
+
+        physics = get_physics()
+        if max_step_size is not None:
+            physics.time_step = max_step_size
+        if real_time_update_rate is not None:
+            physics.max_update_rate = real_time_update_rate
+        if iterations is not None:
+            physics.ode_config.sor_pgs_iters = int(iterations)
+
+        response = set_physics(physics.time_step, physics.max_update_rate, physics.gravity, physics.ode_config)
+        if not response.success:
+            raise rospy.ServiceException("/gazebo/set_physics_properties failed: %s" % response.status_message)
+
+        if self.lockstep_iterations:
+            self.physics_time_step = physics.time_step
+        self._rtf_sample = None
+        self.physics_properties = physics
+
+    def get_real_time_factor(self):
+        """Sim seconds per wall second since the previous call.
+
+        Includes the time the world spent paused between steps, so it is the
+        rate the agent actually sees. The first call only starts measuring
+        and returns None, as does the first call after configure() or after
+        the sim time was reset.
+        """
+        now = (time.time(), rospy.get_rostime().to_sec())
+        sample, self._rtf_sample = self._rtf_sample, now
+        if sample is None or now[0] <= sample[0] or now[1] < sample[1]:
+            return None
+        return (now[1] - sample[1]) / (now[0] - sample[0])
     def _seed(self):
         
         # TODO
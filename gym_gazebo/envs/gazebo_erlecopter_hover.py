@@ -8,7 +8,9 @@ import time
 import math
 
 from gym import utils, spaces
+from gym_gazebo import log
 from gym_gazebo.envs import gazebo_env
+from gym_gazebo.envs.supervisor import ProcessSupervisor, attach_requested, service_available
 from gym.utils import seeding
 
 from mavros_msgs.msg import OverrideRCIn, ParamValue
@@ -21,25 +23,29 @@ from std_srvs.srv import Empty
 
 import pdb
 
+logger = log.get_logger(__name__)
+
 class GazeboErleCopterHoverEnv(gazebo_env.GazeboEnv):
+    pauses_between_steps = False
+
     def _takeoff(self, altitude):
         print "Waiting for mavros..."
-        data = None
-        while data is None:
-            try:
-                data = rospy.wait_for_message('/mavros/global_position/rel_alt', Float64, timeout=5)
-            except:
-                pass
+        data = self._wait_for_sensor('/mavros/global_position/rel_alt', Float64)
         
         takeoff_successful = False
         start = time.time() 
+        # Reset by every attempt that climbs higher than the ones before
+        stuck_start = time.time()
+        best_alt = None
 
         while not takeoff_successful:
             diff = time.time() - start
+            if time.time() - stuck_start > self.stall_timeout:
+                # A stuck drone needs a fresh simulator, see GazeboEnv.reset
+                raise gazebo_env.SimulatorCrashed("takeoff made no progress for %ds" % (time.time() - stuck_start))
             if diff > 15.0:
                 rospy.loginfo('Changing mode to STABILIZE')
                 # Set STABILIZE mode
-                rospy.wait_for_service('/mavros/set_mode')
                 try:
                     self.mode_proxy(0,'STABILIZE')
                     start = time.time()
@@ -52,64 +58,53 @@ class GazeboErleCopterHoverEnv(gazebo_env.GazeboEnv):
 
             rospy.loginfo('Changing mode to GUIDED')
             # Set GUIDED mode
-            rospy.wait_for_service('/mavros/set_mode')
             try:
                 self.mode_proxy(0,'GUIDED')
             except rospy.ServiceException, e:
                 print ("/mavros/set_mode service call failed: %s"%e)
 
-            time.sleep(1)
+            self._sim_sleep(1)
 
             rospy.loginfo('ARMing throttle')
             # Arm throttle
-            rospy.wait_for_service('/mavros/cmd/arming')
             try:
                 self.arm_proxy(True)
             except rospy.ServiceException, e:
                 print ("/mavros/set_mode service call failed: %s"%e)
 
-            time.sleep(1)
+            self._sim_sleep(1)
             
             rospy.loginfo('TAKEOFF to %d meters', alt)
             # Takeoff
-            rospy.wait_for_service('/mavros/cmd/takeoff')
             try:
                 self.takeoff_proxy(0, 0, 0, 0, alt) # 1m altitude
             except rospy.ServiceException, e:
                 print ("/mavros/cmd/takeoff service call failed: %s"%e)
 
-            time.sleep(alt)
+            # Climb for up to alt seconds of sim time
+            takeoff_time = rospy.get_rostime()
+            self.sensors.subscribe('/gazebo/model_states', ModelStates)
+            def climbed():
+                entry = self.sensors.latest('/gazebo/model_states')
+                return entry is not None and entry.stamp > takeoff_time \
+                    and self._erlecopter_alt(entry.msg) > (alt - err)
+            self._sim_sleep(alt, condition=climbed)
 
-            alt_msg = None
-            while alt_msg is None:
-                try:
-                    alt_msg = rospy.wait_for_message('/gazebo/model_states', ModelStates, timeout=10)
-                except:
-                    pass
-
-            erlecopter_index = 0
-            print "Finding erle-copter index"
-            for name in alt_msg.name:
-                if name == "erlecopter":
-                    break
-                else:
-                    erlecopter_index +=1
-            try:
-                erlecopter_alt = alt_msg.pose[erlecopter_index].position.z * 2
-            except:
-                erlecopter_alt = -1
+            alt_msg = self._wait_for_sensor('/gazebo/model_states', ModelStates, newer_than=takeoff_time)
+            erlecopter_alt = self._erlecopter_alt(alt_msg)
 
             if erlecopter_alt > (alt - err):
                 takeoff_successful = True
                 print "Takeoff successful"
             else:
                 print "Takeoff failed, retrying..."
+                if best_alt is None or erlecopter_alt > best_alt + err:
+                    best_alt = erlecopter_alt
+                    stuck_start = time.time()
 
-        rospy.wait_for_service('/mavros/param/get')
         gcs = self.param_get_proxy('SYSID_MYGCS').value.integer
         if gcs != 1:
             # Set Mavros as GCS
-            rospy.wait_for_service('/mavros/param/set')
             try:
                 info = ParamSet()
                 info.param_id = 'SYSID_MYGCS'
@@ -125,7 +120,7 @@ class GazeboErleCopterHoverEnv(gazebo_env.GazeboEnv):
             except rospy.ServiceException, e:
                 print ("/mavros/set_mode service call failed: %s"%e)
 
-        time.sleep(1)
+        self._sim_sleep(1)
 
         self.msg = OverrideRCIn()
         self.msg.channels[0] = 0 # Roll
@@ -139,27 +134,42 @@ class GazeboErleCopterHoverEnv(gazebo_env.GazeboEnv):
         rospy.loginfo('Sending RC THROTTLE %d', self.msg.channels[2])
         self.pub.publish(self.msg)
 
-        time.sleep(1)
+        self._sim_sleep(1)
 
         rospy.loginfo('Changing mode to ALT_HOLD')
         # Set ALT_HOLD mode
-        rospy.wait_for_service('/mavros/set_mode')
         try:
             self.mode_proxy(0,'ALT_HOLD')
         except rospy.ServiceException, e:
             print ("/mavros/set_mode service call failed: %s"%e)
 
+    def _erlecopter_alt(self, alt_msg):
+        erlecopter_index = 0
+        for name in alt_msg.name:
+            if name == "erlecopter":
+                break
+            else:
+                erlecopter_index +=1
+        try:
+            return alt_msg.pose[erlecopter_index].position.z * 2
+        except:
+            return -1
+
     def _launch_apm(self):
         sim_vehicle_sh = str(os.environ["ARDUPILOT_PATH"]) + "/Tools/autotest/sim_vehicle.sh"
         # sim_vehicle_sh = '/home/shohin/Libraries/simulation/ardupilot/Tools/autotest/sim_vehicle.sh'
-        subprocess.Popen(["xterm","-e",sim_vehicle_sh,"-j4","-f","Gazebo","-v","ArduCopter"]) # 
+        if not hasattr(self, 'supervisor'):
+            self.supervisor = ProcessSupervisor()
+        self.supervisor.launch("sitl", ["xterm","-e",sim_vehicle_sh,"-j4","-f","Gazebo","-v","ArduCopter"])
 
     def _pause(self, msg):
         programPause = raw_input(str(msg))
 
-    def __init__(self):
+    def __init__(self, **kwargs):
 
-        self._launch_apm()
+        # Reuse a running SITL when attaching to a running stack
+        if not (attach_requested(kwargs.get('attach')) and service_available('/mavros/cmd/arming')):
+            self._launch_apm()
 
         RED = '\033[91m'
         BOLD = '\033[1m'
@@ -170,10 +180,9 @@ class GazeboErleCopterHoverEnv(gazebo_env.GazeboEnv):
         msg += "MAV> param load %s\n\n" % (str(os.environ["ERLE_COPTER_PARAM_PATH"]))
         msg += "%sThen, press <Enter> here to launch Gazebo...%s\n\n%s" % (BOLD, ENDC,  LINE)
         # self._pause(msg)
-        time.sleep(3)
 
         # Launch the simulation with the given launchfile name
-        gazebo_env.GazeboEnv.__init__(self, "GazeboErleCopterHover-v0.launch")    
+        gazebo_env.GazeboEnv.__init__(self, "GazeboErleCopterHover-v0.launch", **kwargs)    
 
         self.action_space = spaces.Discrete(4) # F, L, R, B
         #self.observation_space = spaces.Box(low=0, high=20) #laser values
@@ -192,21 +201,23 @@ class GazeboErleCopterHoverEnv(gazebo_env.GazeboEnv):
 
         # self.unpause = rospy.ServiceProxy('/gazebo/unpause_physics', Empty)
         # self.pause = rospy.ServiceProxy('/gazebo/pause_physics', Empty)
-        self.reset_proxy = rospy.ServiceProxy('/gazebo/reset_world', Empty)
-        self.mode_proxy = rospy.ServiceProxy('/mavros/set_mode', SetMode)
-        self.param_set_proxy = rospy.ServiceProxy('/mavros/param/set', ParamSet)
-        self.param_get_proxy = rospy.ServiceProxy('/mavros/param/get', ParamGet)
-        self.arm_proxy = rospy.ServiceProxy('/mavros/cmd/arming', CommandBool)
-        self.takeoff_proxy = rospy.ServiceProxy('/mavros/cmd/takeoff', CommandTOL)
+        self.reset_proxy = self.service_client('/gazebo/reset_world', Empty)
+        self.mode_proxy = self.service_client('/mavros/set_mode', SetMode)
+        self.param_set_proxy = self.service_client('/mavros/param/set', ParamSet)
+        self.param_get_proxy = self.service_client('/mavros/param/get', ParamGet)
+        self.arm_proxy = self.service_client('/mavros/cmd/arming', CommandBool)
+        self.takeoff_proxy = self.service_client('/mavros/cmd/takeoff', CommandTOL)
         self.pub = rospy.Publisher('/mavros/rc/override', OverrideRCIn, queue_size=1)
         self.alt_sub = rospy.Subscriber('/mavros/global_position/rel_alt', Float64, self.alt_callback)
 
+        # Per step details at DEBUG, a summary every 100 steps at INFO
+        self.step_summary = log.StepSummary(logger)
+
         self.rtl_time = 5
         self.reset_time = 3
         self.disarm = False
 
         # CANNOT SET. ERROR.
-        rospy.wait_for_service('/mavros/param/set')
         try:
             info = ParamSet()
             info.param_id = 'RTL_ALT'
@@ -222,13 +233,10 @@ class GazeboErleCopterHoverEnv(gazebo_env.GazeboEnv):
         except rospy.ServiceException, e:
             print ("/mavros/set_mode service call failed: %s"%e)
 
-        countdown = 10
-        while countdown > 0:
-            print ("Taking off in in %ds"%countdown)
-            countdown-=1
-            time.sleep(1)
+        # Take off as soon as SITL and mavros are up
+        self.supervisor.wait_for_message('/mavros/global_position/rel_alt', Float64, watch=["sitl", "roslaunch"])
 
-        self._takeoff(2)
+        self._restart_on_crash(self._takeoff, 2)
 
         self._seed()
 
@@ -240,79 +248,59 @@ class GazeboErleCopterHoverEnv(gazebo_env.GazeboEnv):
         return discretized_ranges, done
 
     def _step(self, action):
-        self.msg = OverrideRCIn()
-
-        if action == 0: #FORWARD
-            self.msg.channels[0] = 1500 # Roll
-            self.msg.channels[1] = 1450 # Pitch
-        elif action == 1: #LEFT
-            self.msg.channels[0] = 1450 # Roll
-            self.msg.channels[1] = 1500 # Pitch
-        elif action == 2: #RIGHT
-            self.msg.channels[0] = 1550 # Roll
-            self.msg.channels[1] = 1500 # Pitch
-        elif action == 3: #BACKWARDS
-            self.msg.channels[0] = 1500 # Roll
-            self.msg.channels[1] = 1550 # Pitch
-
-        self.msg.channels[2] = 1500  # Throttle
-        self.msg.channels[3] = 0     # Yaw
-        self.msg.channels[4] = 0
-        self.msg.channels[5] = 0
-        self.msg.channels[6] = 0
-        self.msg.channels[7] = 0
-
-        self.pub.publish(self.msg)
+        with self.timing.phase('publish'):
+            self.msg = OverrideRCIn()
+
+            if action == 0: #FORWARD
+                self.msg.channels[0] = 1500 # Roll
+                self.msg.channels[1] = 1450 # Pitch
+            elif action == 1: #LEFT
+                self.msg.channels[0] = 1450 # Roll
+                self.msg.channels[1] = 1500 # Pitch
+            elif action == 2: #RIGHT
+                self.msg.channels[0] = 1550 # Roll
+                self.msg.channels[1] = 1500 # Pitch
+            elif action == 3: #BACKWARDS
+                self.msg.channels[0] = 1500 # Roll
+                self.msg.channels[1] = 1550 # Pitch
+
+            self.msg.channels[2] = 1500  # Throttle
+            self.msg.channels[3] = 0     # Yaw
+            self.msg.channels[4] = 0
+            self.msg.channels[5] = 0
+            self.msg.channels[6] = 0
+            self.msg.channels[7] = 0
+
+            self.pub.publish(self.msg)
     
-        observation = self._get_position()
+        # Position fix received after the action was sent
+        action_time = rospy.get_rostime()
+        observation = self._get_position(newer_than=action_time)
 
-        dist = self.center_distance()
-        done = dist > self.max_distance
+        with self.timing.phase('reward'):
+            dist = self.center_distance()
+            done = dist > self.max_distance
 
-        reward = 0
-        if done:
-            reward = -100
-        else:
-            reward = 10 - dist * 8
+            reward = 0
+            if done:
+                reward = -100
+            else:
+                reward = 10 - dist * 8
+        self.step_summary.add(center_distance=dist, reward=reward)
 
         return observation, reward, done, {}
 
 
-    def _killall(self, process_name):
-        pids = subprocess.check_output(["pidof",process_name]).split()
-        for pid in pids:
-            os.system("kill -9 "+str(pid))
-
     def _relaunch_apm(self):
-        pids = subprocess.check_output(["pidof","ArduCopter.elf"]).split()
-        for pid in pids:
-            os.system("kill -9 "+str(pid))
-        
-        grep_cmd = "ps -ef | grep ardupilot"
-        # result = subprocess.check_output([grep_cmd], shell=True).split()
-        # pid = result[1]
-        pid = os.popen(grep_cmd).read().split()[1]
-        os.system("kill -9 "+str(pid))
-
-        grep_cmd = "ps -af | grep sim_vehicle.sh"
-        # result = subprocess.check_output([grep_cmd], shell=True).split()
-        # pid = result[1]
-        pid = os.popen(grep_cmd).read().split()[1]
-        os.system("kill -9 "+str(pid))  
-
+        self.supervisor.terminate("sitl")
         self._launch_apm()
 
     def _to_meters(self, n):
         return n * 100000.0
 
-    def _get_position(self):
+    def _get_position(self, newer_than=None):
         #read position data
-        data = None
-        while data is None:
-            try:
-                data = rospy.wait_for_message('/mavros/global_position/global', NavSatFix, timeout=5)
-            except:
-                pass
+        data = self._wait_for_sensor('/mavros/global_position/global', NavSatFix, newer_than=newer_than)
 
         self.current_latitude = self._to_meters(data.latitude)
         self.current_longitude = self._to_meters(data.longitude)
@@ -320,14 +308,14 @@ class GazeboErleCopterHoverEnv(gazebo_env.GazeboEnv):
         if self.initial_latitude == None and self.initial_longitude == None:
             self.initial_latitude = self.current_latitude
             self.initial_longitude = self.current_longitude
-            print "Initial latitude : %f, Initial Longitude : %f" % (self.initial_latitude,self.initial_longitude,)
+            logger.info("Initial latitude : %f, Initial Longitude : %f", self.initial_latitude, self.initial_longitude)
 
-        print "Current latitude : %f, Current Longitude : %f" % (self.current_latitude,self.current_longitude,)
+        logger.debug("Current latitude : %f, Current Longitude : %f", self.current_latitude, self.current_longitude)
 
         self.diff_latitude = self.current_latitude - self.initial_latitude
         self.diff_longitude = self.current_longitude - self.initial_longitude
 
-        print "Diff latitude: %f, Diff Longitude: %f" % (self.diff_latitude,self.diff_longitude,)
+        logger.debug("Diff latitude: %f, Diff Longitude: %f", self.diff_latitude, self.diff_longitude)
 
         return self.diff_latitude, self.diff_longitude
 
@@ -382,29 +370,30 @@ class GazeboErleCopterHoverEnv(gazebo_env.GazeboEnv):
         rospy.loginfo('Sending RC THROTTLE %d', self.msg.channels[2])
         self.pub.publish(self.msg)
 
-        time.sleep(1)
+        self._sim_sleep(1)
 
         rospy.loginfo('Changing mode to STABILIZE')
         # Set STABILIZE mode
-        rospy.wait_for_service('/mavros/set_mode')
         try:
             self.mode_proxy(0,'STABILIZE')
         except rospy.ServiceException, e:
             print ("/mavros/set_mode service call failed: %s"%e)
 
-        time.sleep(1)
+        self._sim_sleep(1)
 
         rospy.loginfo('Gazebo RESET')
-        self.reset_proxy()
+        with self.timing.phase('reset_world'):
+            self.reset_proxy()
 
-        time.sleep(self.reset_time)
+        self._sim_sleep(self.reset_time)
 
-        self._takeoff(2)
+        with self.timing.phase('takeoff'):
+            self._takeoff(2)
 
         self.initial_latitude = None
         self.initial_longitude = None
         
-        return self._get_position()
+        return self._get_position(newer_than=rospy.get_rostime())
 
 # Param load command:
 # param load /home/shohin/Libraries/simulation/ardupilot/Tools/Frame_params/Erle-Copter.param
@@ -8,6 +8,8 @@ import numpy as np
 
 from gym import utils, spaces
 from gym_gazebo.envs import gazebo_env
+from gym_gazebo.envs.laser import ScanDiscretizer
+from gym_gazebo.envs.supervisor import ProcessSupervisor, attach_requested, service_available
 from gym.utils import seeding
 
 from mavros_msgs.msg import OverrideRCIn
@@ -19,10 +21,13 @@ from std_srvs.srv import Empty
 
 
 class GazeboMazeErleRoverLidarEnv(gazebo_env.GazeboEnv):
+    pauses_between_steps = False
   
-    def __init__(self):
+    def __init__(self, **kwargs):
 
-        self._launch_apm()
+        # Reuse a running SITL when attaching to a running stack
+        if not (attach_requested(kwargs.get('attach')) and service_available('/mavros/cmd/arming')):
+            self._launch_apm()
         RED = '\033[91m'
         BOLD = '\033[1m'
         ENDC = '\033[0m'        
@@ -34,47 +39,38 @@ class GazeboMazeErleRoverLidarEnv(gazebo_env.GazeboEnv):
         self._pause(msg)
 
         # Launch the simulation with the given launchfile name
-        gazebo_env.GazeboEnv.__init__(self, "GazeboMazeErleRoverLidar_v0.launch")    
+        gazebo_env.GazeboEnv.__init__(self, "GazeboMazeErleRoverLidar_v0.launch", **kwargs)    
 
         self.pub = rospy.Publisher('/mavros/rc/override', OverrideRCIn, queue_size=10)
 
         self.action_space = spaces.Discrete(3) #F,L,R
         #self.observation_space = spaces.Box(low=0, high=20) #laser values
         self.reward_range = (-np.inf, np.inf)
+        # 5 integer ranges, out of range readings at range_max, collision under 1.5m
+        self.discretizer = ScanDiscretizer(bins=5, min_range=1.5, inf_value=None)
 
         self.gazebo_step_size = long(200)
 
+        self.reset_proxy = self.service_client('/gazebo/reset_world', Empty)
 
-        self.unpause = rospy.ServiceProxy('/gazebo/unpause_physics', Empty)
-
-        self.pause = rospy.ServiceProxy('/gazebo/pause_physics', Empty)
-
-        self.reset_proxy = rospy.ServiceProxy('/gazebo/reset_world', Empty)
-
-        self.mode_proxy = rospy.ServiceProxy('mavros/set_mode', SetMode)
-
-        time.sleep(10) # Wait for gzserver to launch
+        self.mode_proxy = self.service_client('mavros/set_mode', SetMode)
 
         # Set MANUAL mode
-        rospy.wait_for_service('mavros/set_mode')
         try:
             self.mode_proxy(0,'GUIDED')
         except rospy.ServiceException, e:
             print ("mavros/set_mode service call failed: %s"%e)
 
         print "Waiting for mavros..."
-        data = None
-        while data is None:
-            try:
-                data = rospy.wait_for_message('/mavros/global_position/rel_alt', Float64, timeout=5)
-            except:
-                pass
+        data = self._wait_for_sensor('/mavros/global_position/rel_alt', Float64)
 
         self._seed()
 
     def _launch_apm(self):
         sim_vehicle_sh = str(os.environ["ARDUPILOT_PATH"]) + "/Tools/autotest/sim_vehicle.sh"
-        subprocess.Popen(["xterm","-e",sim_vehicle_sh,"-j4","-f","Gazebo","-v","APMrover2"])
+        if not hasattr(self, 'supervisor'):
+            self.supervisor = ProcessSupervisor()
+        self.supervisor.launch("sitl", ["xterm","-e",sim_vehicle_sh,"-j4","-f","Gazebo","-v","APMrover2"])
 
     def _pause(self, msg):
         programPause = raw_input(str(msg))
@@ -91,63 +87,44 @@ class GazeboMazeErleRoverLidarEnv(gazebo_env.GazeboEnv):
 
     def _step(self, action):
 
-        msg = OverrideRCIn()
-
-        if action == 0: #FORWARD
-            msg.channels[0] = 1500 # Yaw
-            msg.channels[2] = 1900 # Throttle
-        elif action == 1: #LEFT
-            msg.channels[0] = 1100 # Yaw
-            msg.channels[2] = 1900 # Throttle
-        elif action == 2: #RIGHT
-            msg.channels[0] = 1900 # Yaw
-            msg.channels[2] = 1900 # Throttle
-
-        msg.channels[1] = 0
-        msg.channels[3] = 0
-        msg.channels[4] = 0
-        msg.channels[5] = 0
-        msg.channels[6] = 0
-        msg.channels[7] = 0
-
-        self.pub.publish(msg)
+        with self.timing.phase('publish'):
+            msg = OverrideRCIn()
+
+            if action == 0: #FORWARD
+                msg.channels[0] = 1500 # Yaw
+                msg.channels[2] = 1900 # Throttle
+            elif action == 1: #LEFT
+                msg.channels[0] = 1100 # Yaw
+                msg.channels[2] = 1900 # Throttle
+            elif action == 2: #RIGHT
+                msg.channels[0] = 1900 # Yaw
+                msg.channels[2] = 1900 # Throttle
+
+            msg.channels[1] = 0
+            msg.channels[3] = 0
+            msg.channels[4] = 0
+            msg.channels[5] = 0
+            msg.channels[6] = 0
+            msg.channels[7] = 0
+
+            self.pub.publish(msg)
     
-        #read laser data
-        data = None
-        while data is None:
-            try:
-                data = rospy.wait_for_message('/scan', LaserScan, timeout=5)
-            except:
-                pass
-
-        #simplify ranges - discretize
-        discretized_ranges = []
-        discretized_ranges_amount = 5
-        min_range = 1.5 #collision
-
-        done = False
-
-        mod = (len(data.ranges) / discretized_ranges_amount)
-        for i, item in enumerate(data.ranges):
-            if (i%mod==0):
-                if data.ranges[i] == float ('Inf'):
-                    discretized_ranges.append(int(data.range_max))
-                elif np.isnan(data.ranges[i]):
-                    discretized_ranges.append(0)
+        #read laser data taken after the action was sent
+        action_time = rospy.get_rostime()
+        data = self._wait_for_sensor('/scan', LaserScan, newer_than=action_time)
+
+        with self.timing.phase('observation'):
+            #simplify ranges - discretize
+            discretized_ranges, done = self.discretizer(data)
+
+        with self.timing.phase('reward'):
+            if not done:
+                if action == 0: # FORWARD
+                    reward = 5
                 else:
-                    discretized_ranges.append(int(data.ranges[i]))
-                    #discretized_ranges.append(round(data.ranges[i] * 2) / 2)
-            if (min_range > data.ranges[i] > 0):
-                done = True
-                #break
-
-        if not done:
-            if action == 0: # FORWARD
-                reward = 5
+                    reward = 1
             else:
-                reward = 1
-        else:
-            reward = -200 
+                reward = -200 
 
         state = discretized_ranges
 
@@ -156,45 +133,26 @@ class GazeboMazeErleRoverLidarEnv(gazebo_env.GazeboEnv):
     def _reset(self):
 
         # Resets the state of the environment and returns an initial observation.
-        rospy.wait_for_service('/gazebo/reset_world')
         try:
             #reset_proxy.call()
-            self.reset_proxy()
+            with self.timing.phase('reset_world'):
+                self.reset_proxy()
         except rospy.ServiceException, e:
             print ("/gazebo/reset_world service call failed")
+        reset_time = rospy.get_rostime()
 
         # Set MANUAL mode
-        rospy.wait_for_service('mavros/set_mode')
         try:
             self.mode_proxy(0,'MANUAL')
         except rospy.ServiceException, e:
             print ("mavros/set_mode service call failed: %s"%e)
 
-        #read laser data
-        data = None
-        while data is None:
-            try:
-                data = rospy.wait_for_message('/scan', LaserScan, timeout=5)
-            except:
-                pass
-
-        #simplify ranges - discretize
-        discretized_ranges = []
-        discretized_ranges_amount = 5
-        min_range = 0.2 #collision
-
-        done = False
-
-        mod = (len(data.ranges) / discretized_ranges_amount)
-        for i, item in enumerate(data.ranges):
-            if (i%mod==0):
-                if data.ranges[i] == float ('Inf'):
-                    discretized_ranges.append(int(data.range_max))
-                elif np.isnan(data.ranges[i]):
-                    discretized_ranges.append(0)
-                else:
-                    discretized_ranges.append(int(data.ranges[i]))
-                    #discretized_ranges.append(round(data.ranges[i] * 2) / 2)
+        #read laser data taken after the world reset
+        data = self._wait_for_sensor('/scan', LaserScan, newer_than=reset_time)
+
+        with self.timing.phase('observation'):
+            #simplify ranges - discretize
+            discretized_ranges, done = self.discretizer(data)
 
         state = discretized_ranges
 
@@ -0,0 +1,80 @@
+import numpy as np
+
+
+def collision(ranges, min_range):
+    """True if any reading of ``ranges`` is closer than ``min_range`` (and not zero)."""
+    ranges = np.asarray(ranges)
+    return bool(np.any((ranges > 0) & (ranges < min_range)))
+
+
+class ScanDiscretizer(object):
+    """Reduces a sensor_msgs/LaserScan to a few integer ranges and a collision flag.
+
+    Every (number of rays // ``bins``)-th ray is kept, starting with the
+    first, up to ``bins`` rays, and truncated to an integer. Infinite
+    readings become ``inf_value`` (the range_max of the scan when None),
+    NaN readings 0, and with ``clip`` set, longer ranges are capped at it. The episode is
+    done when any ray, kept or not, is closer than ``min_range``. All of
+    it runs as NumPy operations on the whole scan.
+    """
+
+    def __init__(self, bins=5, min_range=0.2, inf_value=6, clip=None):
+        self.bins = bins
+        self.min_range = min_range
+        self.inf_value = inf_value
+        self.clip = clip
+
+    def __call__(self, msg):
+        """Return (state, done), state being an integer array of the kept rays."""
+        ranges = np.asarray(msg.ranges, dtype=np.float64)
+        done = collision(ranges, self.min_range)
+
+        # Without the cap a ray count that is no multiple of bins keeps one more
+        kept = ranges[::max(len(ranges) // self.bins, 1)][:self.bins]
+        inf_value = msg.range_max if self.inf_value is None else self.inf_value
+        kept = np.where(np.isinf(kept), inf_value, kept)
+        kept[np.isnan(kept)] = 0
+        if self.clip is not None:
+            np.minimum(kept, self.clip, out=kept)
+        return kept.astype(int), done
+
+
+class StateEncoder(object):
+    """Numbers the integer states of a ScanDiscretizer from 0 to ``n`` - 1.
+
+    ``radices`` gives the number of values of every kept ray. The rays
+    are the digits of a mixed-radix number, the last one varying
+    fastest, so encode() is one dot product with their place values.
+    A state with another number of rays, or a value outside
+    [0, radix - 1], raises ValueError.
+    """
+
+    def __init__(self, radices):
+        self.radices = np.asarray(radices, dtype=np.int64)
+        self.n = int(np.prod(self.radices))
+        self.weights = np.append(np.cumprod(self.radices[:0:-1])[::-1], 1)
+
+    def encode(self, state):
+        digits = np.asarray(state)
+        if digits.shape != self.radices.shape:
+            raise ValueError("State of %d rays, the encoder has %d" % (digits.size, len(self.radices)))
+        if np.any(digits < 0) or np.any(digits >= self.radices):
+            raise ValueError("State %s has values outside 0 to %s" % (digits.tolist(), (self.radices - 1).tolist()))
+        return int(np.dot(digits, self.weights))
+
+    def decode(self, index):
+        """The integer ranges encode() numbered ``index``."""
+        return (index // self.weights) % self.radices
+
+    @classmethod
+    def for_discretizer(cls, discretizer, max_range=None):
+        """Encoder of the first ``bins`` rays, with values from 0 to ``max_range``.
+
+        ``max_range`` defaults to the clip, else the inf_value, of the
+        discretizer; one of them has to be set.
+        """
+        if max_range is None:
+            max_range = discretizer.inf_value if discretizer.clip is None else discretizer.clip
+        if max_range is None:
+            raise ValueError("Integer states need a max_range when the scan is not clipped")
+        return cls([int(max_range) + 1] * discretizer.bins)
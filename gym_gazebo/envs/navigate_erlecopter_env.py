@@ -11,7 +11,10 @@ import cv2
 from cv_bridge import CvBridge, CvBridgeError
 
 from gym import utils, spaces
+from gym_gazebo import log
 from gym_gazebo.envs import gazebo_env
+from gym_gazebo.envs.laser import collision
+from gym_gazebo.envs.supervisor import ProcessSupervisor, attach_requested, service_available
 from gym.utils import seeding
 
 from mavros_msgs.msg import OverrideRCIn, ParamValue
@@ -26,19 +29,20 @@ import tf
 import smtplib
 from email.mime.text import MIMEText
 
+logger = log.get_logger(__name__)
+
 class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv): 
+	pauses_between_steps = False
+
 	def _takeoff(self, altitude):
 		print "Waiting for mavros..."
-		data = None
-		while data is None:
-			try:
-				data = rospy.wait_for_message('/mavros/global_position/rel_alt', Float64, timeout=5)
-			except:
-				pass
+		data = self._wait_for_sensor('/mavros/global_position/rel_alt', Float64)
 
 		takeoff_successful = False
 		start = time.time() 
+		# Reset by every attempt that climbs higher than the ones before
 		stuck_start = time.time()
+		best_alt = None
 
 		while not takeoff_successful:
 			diff = time.time() - start
@@ -68,18 +72,19 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 			# 	msg['From'] = sender
 			# 	msg['To'] = ", ".join(recipients)
 			# 	s.sendmail(sender, recipients, msg.as_string())
+			if stuck_time > self.stall_timeout:
+				# A stuck drone needs a fresh simulator, see GazeboEnv.reset
+				raise gazebo_env.SimulatorCrashed("takeoff made no progress for %ds" % stuck_time)
 			if diff > 15.0:
 				rospy.loginfo('Changing mode to STABILIZE')
 				# Set STABILIZE mode
-				rospy.wait_for_service('/mavros/set_mode')
 				try:
 					self.mode_proxy(0,'STABILIZE')
 					start = time.time()
 				except rospy.ServiceException, e:
 					print ("/mavros/set_mode service call failed: %s"%e)
-				time.sleep(1/self.SPEEDUPFACTOR)
+				self._sim_sleep(1)
 				rospy.loginfo('DISARMing throttle')
-				rospy.wait_for_service('/mavros/cmd/arming')
 				try:
 					self.arm_proxy(False)
 				except rospy.ServiceException, e:
@@ -96,64 +101,53 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 
 			rospy.loginfo('Changing mode to GUIDED')
 			# Set GUIDED mode
-			rospy.wait_for_service('/mavros/set_mode')
 			try:
 				self.mode_proxy(0,'GUIDED')
 			except rospy.ServiceException, e:
 				print ("/mavros/set_mode service call failed: %s"%e)
 
-			time.sleep(0.1/self.SPEEDUPFACTOR)
+			self._sim_sleep(0.1)
 
 			rospy.loginfo('ARMing throttle')
 			# Arm throttle
-			rospy.wait_for_service('/mavros/cmd/arming')
 			try:
 				self.arm_proxy(True)
 			except rospy.ServiceException, e:
 				print ("/mavros/set_mode service call failed: %s"%e)
 
-			time.sleep(0.1/self.SPEEDUPFACTOR)
+			self._sim_sleep(0.1)
 			
 			rospy.loginfo('TAKEOFF to %d meters', alt)
 			# Takeoff
-			rospy.wait_for_service('/mavros/cmd/takeoff')
 			try:
 				self.takeoff_proxy(0, 0, 0, 0, alt) # 1m altitude
 			except rospy.ServiceException, e:
 				print ("/mavros/cmd/takeoff service call failed: %s"%e)
 
-			time.sleep(alt/self.SPEEDUPFACTOR)
+			# Climb for up to alt seconds of sim time
+			takeoff_time = rospy.get_rostime()
+			self.sensors.subscribe('/gazebo/model_states', ModelStates)
+			def climbed():
+				entry = self.sensors.latest('/gazebo/model_states')
+				return entry is not None and entry.stamp > takeoff_time \
+					and self._erlecopter_alt(entry.msg) > (alt - err)
+			self._sim_sleep(alt, condition=climbed)
 
-			alt_msg = None
-			while alt_msg is None:
-				try:
-					alt_msg = rospy.wait_for_message('/gazebo/model_states', ModelStates, timeout=10)
-				except:
-					pass
-
-			erlecopter_index = 0
-			print "Finding erle-copter index"
-			for name in alt_msg.name:
-				if name == "erlecopter":
-					break
-				else:
-					erlecopter_index +=1
-			try:
-				erlecopter_alt = alt_msg.pose[erlecopter_index].position.z * 2
-			except:
-				erlecopter_alt = -1
+			alt_msg = self._wait_for_sensor('/gazebo/model_states', ModelStates, newer_than=takeoff_time)
+			erlecopter_alt = self._erlecopter_alt(alt_msg)
 
 			if erlecopter_alt > (alt - err):
 				takeoff_successful = True
 				print "Takeoff successful"
 			else:
 				print "Takeoff failed, retrying..."
+				if best_alt is None or erlecopter_alt > best_alt + err:
+					best_alt = erlecopter_alt
+					stuck_start = time.time()
 
-		rospy.wait_for_service('/mavros/param/get')
 		gcs = self.param_get_proxy('SYSID_MYGCS').value.integer
 		if gcs != 1:
 			# Set Mavros as GCS
-			rospy.wait_for_service('/mavros/param/set')
 			try:
 				info = ParamSet()
 				info.param_id = 'SYSID_MYGCS'
@@ -169,7 +163,7 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 			except rospy.ServiceException, e:
 				print ("/mavros/set_mode service call failed: %s"%e)
 
-		time.sleep(0.1/self.SPEEDUPFACTOR)
+		self._sim_sleep(0.1)
 
 		self.msg = OverrideRCIn()
 		self.msg.channels[0] = 0 # Roll
@@ -183,7 +177,7 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 		rospy.loginfo('Sending RC THROTTLE %d', self.msg.channels[2])
 		self.pub.publish(self.msg)
 
-		time.sleep(0.1/self.SPEEDUPFACTOR)
+		self._sim_sleep(0.1)
 
 		# rospy.loginfo('Changing mode to ALT_HOLD')
 		# Set ALT_HOLD mode
@@ -193,15 +187,28 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 		# except rospy.ServiceException, e:
 		# 	print ("/mavros/set_mode service call failed: %s"%e)
 
+	def _erlecopter_alt(self, alt_msg):
+		erlecopter_index = 0
+		for name in alt_msg.name:
+			if name == "erlecopter":
+				break
+			else:
+				erlecopter_index +=1
+		try:
+			return alt_msg.pose[erlecopter_index].position.z * 2
+		except:
+			return -1
+
 	def _launch_apm(self):
 		sim_vehicle_sh = str(os.environ["ARDUPILOT_PATH"]) + "/Tools/autotest/sim_vehicle.sh"
-		subprocess.Popen(["xterm","-e",sim_vehicle_sh,"-j4","-f","Gazebo", "-S1000", "-v","ArduCopter"])
+		if not hasattr(self, 'supervisor'):
+			self.supervisor = ProcessSupervisor()
+		self.supervisor.launch("sitl", ["xterm","-e",sim_vehicle_sh,"-j4","-f","Gazebo", "-S1000", "-v","ArduCopter"])
 
 	def _pause(self, msg):
 		programPause = raw_input(str(msg))
 
-	def __init__(self):
-		self.SPEEDUPFACTOR = 10.0
+	def __init__(self, **kwargs):
 		# dem MDP rewards tho
 		self.MIN_LASER_DEFINING_CRASH = 2.0
 		self.MIN_LASER_DEFINING_NEGATIVE_REWARD = 4.0
@@ -211,7 +218,9 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 		self.REWARD_FOR_FLYING_SAFE = 1.0 # at each time step
 		self.REWARD_FOR_FLYING_FRONT_WHEN_SAFE = 1.0
 
-		self._launch_apm()
+		# Reuse a running SITL when attaching to a running stack
+		if not (attach_requested(kwargs.get('attach')) and service_available('/mavros/cmd/arming')):
+			self._launch_apm()
 
 		RED = '\033[91m'
 		BOLD = '\033[1m'
@@ -223,10 +232,9 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 		msg += "%sThen, press <Enter> here to launch Gazebo...%s\n\n%s" % (BOLD, ENDC,  LINE)
 		# self._pause(msg)
 		print(str(msg))
-		time.sleep(3/self.SPEEDUPFACTOR)
 
 		# Launch the simulation with the given launchfile name
-		gazebo_env.GazeboEnv.__init__(self, "GazeboErleCopterHover-v0.launch")    
+		gazebo_env.GazeboEnv.__init__(self, "GazeboErleCopterHover-v0.launch", **kwargs)    
 
 		self.num_actions = 9
 		self.action_space = spaces.Discrete(self.num_actions) # F, L, R, B
@@ -234,24 +242,26 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 
 		# self.unpause = rospy.ServiceProxy('/gazebo/unpause_physics', Empty)
 		# self.pause = rospy.ServiceProxy('/gazebo/pause_physics', Empty)
-		self.reset_proxy = rospy.ServiceProxy('/gazebo/reset_world', Empty)
-		self.mode_proxy = rospy.ServiceProxy('/mavros/set_mode', SetMode)
-		self.param_set_proxy = rospy.ServiceProxy('/mavros/param/set', ParamSet)
-		self.param_get_proxy = rospy.ServiceProxy('/mavros/param/get', ParamGet)
-		self.arm_proxy = rospy.ServiceProxy('/mavros/cmd/arming', CommandBool)
-		self.takeoff_proxy = rospy.ServiceProxy('/mavros/cmd/takeoff', CommandTOL)
+		self.reset_proxy = self.service_client('/gazebo/reset_world', Empty)
+		self.mode_proxy = self.service_client('/mavros/set_mode', SetMode)
+		self.param_set_proxy = self.service_client('/mavros/param/set', ParamSet)
+		self.param_get_proxy = self.service_client('/mavros/param/get', ParamGet)
+		self.arm_proxy = self.service_client('/mavros/cmd/arming', CommandBool)
+		self.takeoff_proxy = self.service_client('/mavros/cmd/takeoff', CommandTOL)
 
 		self.pub = rospy.Publisher('/mavros/rc/override', OverrideRCIn, queue_size=1)
 		self.vel_pub = rospy.Publisher('/mavros/setpoint_velocity/cmd_vel', TwistStamped, queue_size=10, latch=False)
 		self.setpoint_pub = rospy.Publisher('/mavros/setpoint_position/local', PoseStamped, queue_size=10, latch=True)
 		self.pose_subscriber = rospy.Subscriber('/mavros/local_position/pose', PoseStamped, self.pose_callback)
 
+		# Per step details at DEBUG, a summary every 100 steps at INFO
+		self.step_summary = log.StepSummary(logger)
+
 		self.rtl_time = 5
 		self.reset_time = 3
 		self.disarm = False
 
 		# CANNOT SET. ERROR.
-		rospy.wait_for_service('/mavros/param/set')
 		try:
 			info = ParamSet()
 			info.param_id = 'RTL_ALT'
@@ -267,13 +277,10 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 		except rospy.ServiceException, e:
 			print ("/mavros/set_mode service call failed: %s"%e)
 
-		countdown = 10
-		while countdown > 0:
-			print ("Taking off in in %ds"%countdown)
-			countdown-=1
-			time.sleep(1/self.SPEEDUPFACTOR)
+		# Take off as soon as SITL and mavros are up
+		self.supervisor.wait_for_message('/mavros/global_position/rel_alt', Float64, watch=["sitl", "roslaunch"])
 
-		self._takeoff(2)
+		self._restart_on_crash(self._takeoff, 2)
 
 		self._seed()
 
@@ -375,90 +382,90 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 
 
 		######### VELOCITY ############## 
-		curr_x = self.pose.position.x
-		current_yaw = self.euler[2]
-		vel_cmd = TwistStamped()
-		now = rospy.get_rostime()
-		vel_cmd.header.stamp.secs = now.secs
-		vel_cmd.header.stamp.nsecs = now.nsecs
-
-		speed = 1
-
-		delta_theta_deg = 10
-		# 4 is forward, 0-3 are to left, 5-8 are right. all separated by 10 deg each.
-		action_norm = action - ((self.num_actions-1)/2)
-		# 0 is forward in action_norm. negatives are left
-		vel_x_body = speed*math.sin(action_norm*(math.radians(delta_theta_deg)))
-		vel_y_body = speed*math.cos(action_norm*(math.radians(delta_theta_deg)))
-		speed = 1
-
-		vel_cmd.twist.linear.x = vel_x_body
-		vel_cmd.twist.linear.y = vel_y_body
-		# vel_cmd.twist.linear.x = vel_y_body*math.sin(current_yaw) + vel_x_body*math.cos(current_yaw)
-		# vel_cmd.twist.linear.y = vel_y_body*math.cos(current_yaw) - vel_x_body*math.sin(current_yaw)
-		vel_cmd.twist.linear.z = 0
-		# quaternion = tf.transformations.quaternion_from_euler(roll, pitch, yaw)
-		# print "current yaw", current_yaw
-		# print "taking action_norm", action_norm, ":: velocity (x,y,z)", vel_cmd.twist.linear.x, vel_cmd.twist.linear.y, vel_cmd.twist.linear.z
-		self.vel_pub.publish(vel_cmd)
-		time.sleep(0.1/self.SPEEDUPFACTOR)
+		with self.timing.phase('publish'):
+			curr_x = self.pose.position.x
+			current_yaw = self.euler[2]
+			vel_cmd = TwistStamped()
+			now = rospy.get_rostime()
+			vel_cmd.header.stamp.secs = now.secs
+			vel_cmd.header.stamp.nsecs = now.nsecs
+
+			speed = 1
+
+			delta_theta_deg = 10
+			# 4 is forward, 0-3 are to left, 5-8 are right. all separated by 10 deg each.
+			action_norm = action - ((self.num_actions-1)/2)
+			# 0 is forward in action_norm. negatives are left
+			vel_x_body = speed*math.sin(action_norm*(math.radians(delta_theta_deg)))
+			vel_y_body = speed*math.cos(action_norm*(math.radians(delta_theta_deg)))
+			speed = 1
+
+			vel_cmd.twist.linear.x = vel_x_body
+			vel_cmd.twist.linear.y = vel_y_body
+			# vel_cmd.twist.linear.x = vel_y_body*math.sin(current_yaw) + vel_x_body*math.cos(current_yaw)
+			# vel_cmd.twist.linear.y = vel_y_body*math.cos(current_yaw) - vel_x_body*math.sin(current_yaw)
+			vel_cmd.twist.linear.z = 0
+			# quaternion = tf.transformations.quaternion_from_euler(roll, pitch, yaw)
+			# print "current yaw", current_yaw
+			# print "taking action_norm", action_norm, ":: velocity (x,y,z)", vel_cmd.twist.linear.x, vel_cmd.twist.linear.y, vel_cmd.twist.linear.z
+			self.vel_pub.publish(vel_cmd)
+		action_time = rospy.get_rostime()
+		if self.control_loop is not None:
+			# Fixed rate, see GazeboEnv.set_control_rate
+			self.control_loop.tick()
+		else:
+			self._sim_sleep(0.1)
 	
-		observation = self._get_frame()
+		observation = self._get_frame(newer_than=action_time)
 		
-		data = None
-		while data is None:
-			try:
-				data = rospy.wait_for_message('/scan', LaserScan, timeout = 5)
-			except:
-				pass
+		data = self._wait_for_sensor('/scan', LaserScan, newer_than=action_time)
 
 		# is_terminal = self.check_terminal(data)
 		min_laser_scan = np.min(data.ranges)
 		# print "max laser", np.max(data.ranges)
-		state, is_terminal = self.discretize_observation(data,len(data.ranges))
-
-		dist_to_goal = math.sqrt((self.position_y - 220.0)**2 + (self.position_x - 0.0)**2)
-		reward_dist_to_goal = 1 / dist_to_goal
-
-		# if still alive
-		if not is_terminal:
-			# if obstacles are faraway
-			if min_laser_scan > self.MIN_LASER_DEFINING_NEGATIVE_REWARD:
-				# if flying forward
-				if action_norm == 0:
-					reward = self.REWARD_FOR_FLYING_FRONT_WHEN_SAFE
+		with self.timing.phase('observation'):
+			# The observation is the camera frame, the scan only tells crashes
+			is_terminal = collision(data.ranges, self.MIN_LASER_DEFINING_CRASH)
+
+		with self.timing.phase('reward'):
+			dist_to_goal = math.sqrt((self.position_y - 220.0)**2 + (self.position_x - 0.0)**2)
+			reward_dist_to_goal = 1 / dist_to_goal
+
+			# if still alive
+			if not is_terminal:
+				# if obstacles are faraway
+				if min_laser_scan > self.MIN_LASER_DEFINING_NEGATIVE_REWARD:
+					# if flying forward
+					if action_norm == 0:
+						reward = self.REWARD_FOR_FLYING_FRONT_WHEN_SAFE
+					else:
+						reward = self.REWARD_FOR_FLYING_SAFE
+				# if obstacles are near, -20 for MIN_LASER_DEFINING_CRASH, 0 for MIN_LASER_DEFINING_NEGATIVE_REWARD 
 				else:
-					reward = self.REWARD_FOR_FLYING_SAFE
-			# if obstacles are near, -20 for MIN_LASER_DEFINING_CRASH, 0 for MIN_LASER_DEFINING_NEGATIVE_REWARD 
+					# y = y1 + (y2-y1)/(x2-x1) * (x-x1)
+					reward = self.REWARD_AT_LASER_DEFINING_NEGATIVE_REWARD + \
+							((self.REWARD_AT_LASER_JUST_BEFORE_CRASH - self.REWARD_AT_LASER_DEFINING_NEGATIVE_REWARD)/ \
+							(self.MIN_LASER_DEFINING_CRASH - self.MIN_LASER_DEFINING_NEGATIVE_REWARD)* \
+							(min_laser_scan - self.MIN_LASER_DEFINING_NEGATIVE_REWARD))
 			else:
-				# y = y1 + (y2-y1)/(x2-x1) * (x-x1)
-				reward = self.REWARD_AT_LASER_DEFINING_NEGATIVE_REWARD + \
-						((self.REWARD_AT_LASER_JUST_BEFORE_CRASH - self.REWARD_AT_LASER_DEFINING_NEGATIVE_REWARD)/ \
-						(self.MIN_LASER_DEFINING_CRASH - self.MIN_LASER_DEFINING_NEGATIVE_REWARD)* \
-						(min_laser_scan - self.MIN_LASER_DEFINING_NEGATIVE_REWARD))
-		else:
-			reward = self.REWARD_AT_CRASH
-		if action_norm < 0:
-			print "min_laser : {} dist_to_goal : {} reward_dist_to_goal : {} action : {} reward : {}".format(round(min_laser_scan,2), round(dist_to_goal,2), \
-						round(reward_dist_to_goal,2), action_norm, reward)
-		else:
-			print "min_laser : {} dist_to_goal : {} reward_dist_to_goal : {} action : +{} reward : {}".format(round(min_laser_scan,2), round(dist_to_goal,2), \
-						round(reward_dist_to_goal,2), action_norm, reward)
+				reward = self.REWARD_AT_CRASH
+		logger.debug("min_laser : %.2f dist_to_goal : %.2f reward_dist_to_goal : %.2f action : %+d reward : %.2f",
+			min_laser_scan, dist_to_goal, reward_dist_to_goal, action_norm, reward)
+		self.step_summary.add(min_laser=min_laser_scan, dist_to_goal=dist_to_goal, reward=reward)
 
 		return observation, reward, is_terminal, {}	
 
-	def _get_frame(self):
-		frame = None;
-		while frame is None:
+	def _get_frame(self, newer_than=None):
+		frame = self._wait_for_sensor('/camera/rgb/image_raw', Image, newer_than=newer_than)
+		with self.timing.phase('decode'):
 			try:
-				frame = rospy.wait_for_message('/camera/rgb/image_raw',Image, timeout = 5)
 				cv_image = CvBridge().imgmsg_to_cv2(frame, desired_encoding="passthrough")
-				frame = np.asarray(cv_image)
-				# cv2.imshow('frame', frame)
-				# cv2.waitKey(1)
-				return frame
-			except:
+			except CvBridgeError:
 				raise ValueError('could not get frame')
+			frame = np.asarray(cv_image)
+		# cv2.imshow('frame', frame)
+		# cv2.waitKey(1)
+		return frame
 
 	# def _relaunch_apm(self):
 	# 	pids = subprocess.check_output(["pidof","ArduCopter.elf"]).split()
@@ -500,39 +507,30 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 		vel_cmd.twist.linear.y = 0
 		vel_cmd.twist.linear.z = 0
 		self.vel_pub.publish(vel_cmd)
-		time.sleep(0.1/self.SPEEDUPFACTOR)
+		self._sim_sleep(0.1)
 
 		# change to alt hold first to stop listening to stray velociy / setpt messages
 		rospy.loginfo('Changing mode to ALT_HOLD')
 		# Set ALT_HOLD mode
-		rospy.wait_for_service('/mavros/set_mode')
 		try:
 			self.mode_proxy(0,'ALT_HOLD')
 		except rospy.ServiceException, e:
 			print ("/mavros/set_mode service call failed: %s"%e)
 
-		time.sleep(0.1/self.SPEEDUPFACTOR)
+		self._sim_sleep(0.1)
 
 		# Resets the state of the environment and returns an initial observation.
 		rospy.loginfo('Changing mode to RTL')
 		# Set RTL mode
-		rospy.wait_for_service('/mavros/set_mode')
 		try:
 			self.mode_proxy(0,'RTL')
 		except rospy.ServiceException, e:
 			print ("/mavros/set_mode service call failed: %s"%e)
 
 		rospy.loginfo('Waiting to land')
-		time.sleep(1/self.SPEEDUPFACTOR)
-		alt_msg = None
-		erlecopter_alt = float('inf')
-		while erlecopter_alt > 0.1:
-			try:
-				alt_msg = rospy.wait_for_message('/mavros/global_position/rel_alt', Float64, timeout=10)
-				erlecopter_alt = alt_msg.data
-			except:
-				pass
-		time.sleep(0.2/self.SPEEDUPFACTOR)
+		self._sim_sleep(1)
+		self._wait_for_sensor('/mavros/global_position/rel_alt', Float64, condition=lambda msg: msg.data <= 0.1)
+		self._sim_sleep(0.2)
 
 		crash_msg = OverrideRCIn()
 		crash_msg.channels[0] = 0
@@ -545,28 +543,28 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 		crash_msg.channels[7] = 0
 		rospy.loginfo('Sending RC THROTTLE %d', self.msg.channels[2])
 		self.pub.publish(crash_msg)
-		time.sleep(0.2/self.SPEEDUPFACTOR)
+		self._sim_sleep(0.2)
 		rospy.loginfo('Changing mode to STABILIZE')
 		# Set STABILIZE mode
-		rospy.wait_for_service('/mavros/set_mode')
 		try:
 			self.mode_proxy(0,'STABILIZE')
 		except rospy.ServiceException, e:
 			print ("/mavros/set_mode service call failed: %s"%e)
-		time.sleep(0.2/self.SPEEDUPFACTOR)
+		self._sim_sleep(0.2)
 
 		rospy.loginfo('DISARMing throttle')
-		rospy.wait_for_service('/mavros/cmd/arming')
 		try:
 			self.arm_proxy(False)
 		except rospy.ServiceException, e:
 			print ("/mavros/set_mode service call failed: %s"%e)
-		time.sleep(0.2/self.SPEEDUPFACTOR)
+		self._sim_sleep(0.2)
 
-		rospy.loginfo('Gazebo RESET')
-		self.reset_proxy()
+		with self.timing.phase('reset_world'):
+			rospy.loginfo('Gazebo RESET')
+			self.reset_proxy()
 
-		self._takeoff(2)
+		with self.timing.phase('takeoff'):
+			self._takeoff(2)
 
 		################# (DE)STABILIZE ##################
 		# time.sleep(1/self.SPEEDUPFACTOR)
@@ -620,20 +618,3 @@ class GazeboErleCopterNavigateEnv(gazebo_env.GazeboEnv):
 		# time.sleep(2/self.SPEEDUPFACTOR)
 
 		return self._get_frame()
-
-	def discretize_observation(self,data,new_ranges):
-		# print data
-		discretized_ranges = []
-		done = False
-		mod = len(data.ranges)/new_ranges
-		for i, item in enumerate(data.ranges):
-			if (i%mod==0):
-				if data.ranges[i] == float ('Inf'):
-					discretized_ranges.append(6)
-				elif np.isnan(data.ranges[i]):
-					discretized_ranges.append(0)
-				else:
-					discretized_ranges.append(int(data.ranges[i]))
-			if (self.MIN_LASER_DEFINING_CRASH > data.ranges[i] > 0):
-				done = True
-		return discretized_ranges,done
@@ -11,7 +11,10 @@ import cv2
 from cv_bridge import CvBridge, CvBridgeError
 
 from gym import utils, spaces
+from gym_gazebo import log
 from gym_gazebo.envs import gazebo_env
+from gym_gazebo.envs.supervisor import ProcessSupervisor, GAZEBO_SERVICES, attach_requested, master_online, service_available
+from gym_gazebo.tracing import get_tracer
 from gym.utils import seeding
 
 from std_srvs.srv import Empty
@@ -23,8 +26,13 @@ from nav_msgs.msg import Odometry
 import message_filters
 import threading
 
+logger = log.get_logger(__name__)
+
 class GazeboErleCopterNavigateEnvFakeSim(gym.Env): 
-	def __init__(self):
+	def __init__(self, attach=None, instance_id=None):
+		# Spans of step/reset and ghost mode events for the Chrome trace
+		self.tracer = get_tracer()
+
 		self.reset_x = 0.0
 		self.reset_y = 0.0
 		self.reset_z = 2.0
@@ -40,14 +48,32 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 		self.REWARD_FOR_FLYING_SAFE = 0.25 # at each time step
 		self.REWARD_FOR_FLYING_FRONT_WHEN_SAFE = 0.25
 
-		subprocess.Popen("roscore")
-		print ("Roscore launched!")
-
-		rospy.init_node('gym', anonymous=True)
-		subprocess.Popen(["roslaunch","dji_gazebo", "dji_rl.launch"])
+		# own ROS and Gazebo masters per instance, see gazebo_env.master_ports
+		self.ros_port, self.gazebo_port = gazebo_env.master_ports(instance_id)
+		os.environ["ROS_MASTER_URI"] = "http://localhost:%d" % self.ros_port
+		os.environ["GAZEBO_MASTER_URI"] = "http://localhost:%d" % self.gazebo_port
+
+		# processes of this env only, killed again in _close
+		self.supervisor = ProcessSupervisor()
+		# attach to a running master and simulator instead of starting new ones
+		self.attach = attach_requested(attach)
+		if self.attach and master_online(os.environ["ROS_MASTER_URI"]):
+			print ("Attached to the roscore running on port %d" % self.ros_port)
+		else:
+			self.supervisor.launch("roscore", ["roscore", "-p", str(self.ros_port)])
+			self.supervisor.wait_for_master(os.environ["ROS_MASTER_URI"], watch=["roscore"])
+			print ("Roscore launched on port %d!" % self.ros_port)
+
+		if not rospy.core.is_initialized():
+			rospy.init_node('gym', anonymous=True)
+		if self.attach and all(service_available(name) for name in GAZEBO_SERVICES):
+			print ("Attached to the Gazebo running on port %d" % self.gazebo_port)
+		else:
+			self.supervisor.launch("roslaunch", ["roslaunch", "-p", str(self.ros_port), "dji_gazebo", "dji_rl.launch"])
 
-		print "Initializing environment. Wait 5 seconds"
-		rospy.sleep(5)
+		print "Initializing environment. Waiting for gazebo and the first odometry message"
+		self.supervisor.wait_for_services(GAZEBO_SERVICES, watch=["roslaunch"])
+		self.supervisor.wait_for_message('/dji_sim/odometry', Odometry, watch=["roslaunch"])
 		print "############### DONE ###############"
 
 		self.num_actions = 9
@@ -65,8 +91,8 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 
 		self.vel_pub = rospy.Publisher('/dji_sim/target_velocity', Twist, queue_size=1)
 
-		self.reset_proxy = rospy.ServiceProxy('/gazebo/reset_world', Empty)
-		self.set_model_state_proxy = rospy.ServiceProxy('/gazebo/set_model_state', SetModelState)
+		self.reset_proxy = gazebo_env.ServiceClient('/gazebo/reset_world', Empty)
+		self.set_model_state_proxy = gazebo_env.ServiceClient('/gazebo/set_model_state', SetModelState)
 		# self.get_model_state_proxy = rospy.ServiceProxy('/gazebo/get_model_state', GetModelState)
 
 		self.observation = None
@@ -76,16 +102,9 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 		self.last_time_step_was_called = 0.0
 		self.duration_since_step_was_called = 0.0
 
-		### pretty printing is pretty ###
-		self.RED = '\033[91m'
-		self.BLUE = '\033[94m'
-		self.BOLD = '\033[1m'
-		self.ENDC = '\033[0m'        
-		self.LINE = "%s%s##############################################################################%s" % (self.BLUE, self.BOLD, self.ENDC)
-		self.PURPLE = '\033[95m'
-		self.YELLOW = '\033[93m'
-		self.Red = '\033[91m'
-		self.UNDERLINE = '\033[4m'
+		### logging. per step details at DEBUG, a summary every 100 steps at INFO ###
+		self.throttled_log = log.RateLimitedLogger(logger)
+		self.step_summary = log.StepSummary(logger)
 
 		### background thread to track when the last time step was called. ###
 		self.MAX_DURATION_BETWEEN_STEP_CALLS = 0.3
@@ -112,9 +131,10 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 		while True:
 			if not self.done: # avoid extraneous checks when it's resetting dji and cylinder pose
 				self.duration_since_step_was_called = time.time() - self.last_time_step_was_called
-				# print self.YELLOW + "self.duration_since_step_was_called {:.2f} s".format(self.duration_since_step_was_called) + self.ENDC
+				# logger.debug("self.duration_since_step_was_called %.2f s", self.duration_since_step_was_called)
 				if self.duration_since_step_was_called > self.MAX_DURATION_BETWEEN_STEP_CALLS:
-					print self.BLUE + "Ghost Mode. Step not called for {:.2f} s: sending zero vel. time : {:.2f} ".format(self.duration_since_step_was_called, time.time()) + self.ENDC
+					self.throttled_log.warning("Ghost Mode. Step not called for %.2f s: sending zero vel", self.duration_since_step_was_called)
+					self.tracer.instant('ghost mode: step not called', args={'seconds': self.duration_since_step_was_called})
 					vel_cmd_zero = Twist()
 					self.vel_pub.publish(vel_cmd_zero)
 
@@ -148,6 +168,15 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 		if self.min_laser_scan < self.MIN_LASER_DEFINING_CRASH:
 			self.done = True
 
+	# Whole steps and resets as spans, next to the learner's in the trace
+	def step(self, action):
+		with self.tracer.span('step'):
+			return gym.Env.step(self, action)
+
+	def reset(self):
+		with self.tracer.span('reset'):
+			return gym.Env.reset(self)
+
 	def _step(self, action):
 		self.last_time_step_was_called = time.time()
 		vel_cmd = Twist()
@@ -180,17 +209,22 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 		# self.vel_pub.publish(vel_cmd_zero)
 		
 		# keep on waiting for getting laser data
-		self.HAVE_DATA = False
-		start_time = time.time()
-		while not self.HAVE_DATA:
-			no_laser_time = time.time() - start_time
-			# print no_laser_time #this is ~ 0.01 seconds
-			if no_laser_time > self.MAX_NO_LASER_TIME:
-				print self.PURPLE + "Ghost mode :: step () :: no laser data for {:.2f} s: sending zero vel. time : {:.2f}".format(no_laser_time, time.time()) + self.ENDC
-				vel_cmd_zero = Twist()
-				self.vel_pub.publish(vel_cmd_zero)
-			# print "step() : self.HAVE_DATA is False!"
-			continue
+		with self.tracer.span('wait sensors'):
+			self.HAVE_DATA = False
+			start_time = time.time()
+			ghost_traced = False
+			while not self.HAVE_DATA:
+				no_laser_time = time.time() - start_time
+				# print no_laser_time #this is ~ 0.01 seconds
+				if no_laser_time > self.MAX_NO_LASER_TIME:
+					self.throttled_log.warning("Ghost mode :: step () :: no laser data for %.2f s: sending zero vel", no_laser_time)
+					if not ghost_traced: # this loop spins, trace it once
+						self.tracer.instant('ghost mode: no laser data')
+						ghost_traced = True
+					vel_cmd_zero = Twist()
+					self.vel_pub.publish(vel_cmd_zero)
+				# print "step() : self.HAVE_DATA is False!"
+				continue
 
 		# find distance to goal and give some reward based on it 
 		dist_to_goal = math.sqrt((self.position.y - 0.0)**2 + (self.position.x - self.MAX_POSITION_X)**2)
@@ -216,8 +250,9 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 		else:
 			reward = self.REWARD_AT_CRASH
 
-		print "min_laser : {:.2f} dist_to_goal : {:.2f} reward_dist_to_goal : {:.2f} action : {:+d} reward : {:+.2f}"\
-			.format(self.min_laser_scan, dist_to_goal, reward_dist_to_goal, action_norm, reward)
+		logger.debug("min_laser : %.2f dist_to_goal : %.2f reward_dist_to_goal : %.2f action : %+d reward : %+.2f",
+			self.min_laser_scan, dist_to_goal, reward_dist_to_goal, action_norm, reward)
+		self.step_summary.add(min_laser=self.min_laser_scan, dist_to_goal=dist_to_goal, reward=reward)
 
 		# print "exiting step()"
 		return self.observation, reward, self.done, {}	
@@ -246,7 +281,6 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 			model_state.pose = model_pose
 			model_state.twist = model_twist
 			model_state.reference_frame = 'world' # change to 'world'?
-			rospy.wait_for_service('/gazebo/set_model_state')
 
 			self.set_model_state_proxy(model_state)
 			# rospy.loginfo("DJI position updated. Point Position: [ %f, %f, %f ]"%(self.position.x, self.position.y, self.position.z))
@@ -260,7 +294,7 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 		while not (self.reset_position.x == self.position.x) and \
 			not (self.reset_position.y == self.position.y) and \
 			not (self.reset_position.z == abs(self.position.z)):
-			print "reset_dji() : recursion "
+			logger.debug("reset_dji() : recursion")
 			self.reset_dji()
 		
 	# generate random poses for trees and call set model pose for each tree 
@@ -305,11 +339,10 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 				model_state.pose = model_pose
 				model_state.twist = model_twist
 				model_state.reference_frame = 'world' # change to 'world'?
-				rospy.wait_for_service('/gazebo/set_model_state')
 				try:
 					self.set_model_state_proxy(model_state)
 				except rospy.ServiceException, e:
-					print "Service call failed: %s"%e
+					self.throttled_log.warning("Service call failed: %s", e)
 
 		rospy.loginfo("Cylinder positions updated.")
 		# time.sleep(0.1)
@@ -317,7 +350,7 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 		while not (self.reset_position.x == self.position.x) and \
 			not (self.reset_position.y == self.position.y) and \
 			not (self.reset_position.z == abs(self.position.z)):
-			print "reset_forest => reset_dji()"
+			logger.debug("reset_forest => reset_dji()")
 			self.reset_dji()
 
 	def _reset(self):
@@ -326,26 +359,33 @@ class GazeboErleCopterNavigateEnvFakeSim(gym.Env):
 			self.vel_pub.publish(vel_cmd)
 			rospy.loginfo('reset called()')
 
-			# reset drone
-			self.reset_dji()
+			with self.tracer.span('reset_dji'):
+				# reset drone
+				self.reset_dji()
 
 			# make a new forest
-			self.make_a_brave_new_forest()
+			with self.tracer.span('make_a_brave_new_forest'):
+				self.make_a_brave_new_forest()
 
-			self.HAVE_DATA = False
+			with self.tracer.span('wait sensors'):
+				self.HAVE_DATA = False
 
-			while not self.HAVE_DATA:
-				# print "_reset() :: self.HAVE_DATA is False!"
-				continue
+				while not self.HAVE_DATA:
+					# print "_reset() :: self.HAVE_DATA is False!"
+					continue
 			# assert
 			while not (self.reset_position.x == self.position.x) and \
 				not (self.reset_position.y == self.position.y) and \
 				not (self.reset_position.z == abs(self.position.z)):
-				print "reset itself() => reset_dji()"
+				logger.debug("reset itself() => reset_dji()")
 				self.reset_dji()
 			
 			self.done = False
 
 		self.first = False
 
-		return self.observation
\ No newline at end of file
+		return self.observation
+
+	def _close(self):
+		if not self.attach:
+			self.supervisor.shutdown()
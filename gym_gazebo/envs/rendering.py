@@ -0,0 +1,48 @@
+import numpy as np
+
+
+def image_to_rgb(msg):
+    """Convert a sensor_msgs/Image to an RGB uint8 array of shape (h, w, 3).
+
+    Works on the raw message buffer, so cv_bridge is not needed. Handles the
+    8 bit colour and mono encodings Gazebo cameras publish.
+    """
+    encoding = msg.encoding.lower()
+    channels = {'rgb8': 3, 'bgr8': 3, 'rgba8': 4, 'bgra8': 4, 'mono8': 1}.get(encoding)
+    if channels is None:
+        raise ValueError("Unsupported image encoding %s" % msg.encoding)
+
+    data = np.frombuffer(msg.data, dtype=np.uint8).reshape(msg.height, msg.step)
+    image = data[:, :msg.width * channels].reshape(msg.height, msg.width, channels)
+    if channels == 1:
+        return np.repeat(image, 3, axis=2)
+    if encoding.startswith('bgr'):
+        return image[:, :, 2::-1]
+    return image[:, :, :3]
+
+
+def scan_to_top_down(msg, size=200, max_range=None):
+    """Draw a sensor_msgs/LaserScan seen from above, robot in the centre facing up.
+
+    Returns an RGB uint8 array of shape (size, size, 3). Readings beyond
+    ``max_range`` (by default the range_max of the scan) are left out.
+    """
+    if max_range is None or max_range <= 0:
+        max_range = msg.range_max if msg.range_max > 0 else 10.0
+    image = np.zeros((size, size, 3), dtype=np.uint8)
+    center = size // 2
+    scale = (size // 2 - 1) / float(max_range)
+
+    ranges = np.asarray(msg.ranges, dtype=np.float64)
+    angles = msg.angle_min + np.arange(len(ranges)) * msg.angle_increment
+    valid = np.isfinite(ranges) & (ranges > msg.range_min) & (ranges < max_range)
+
+    # x forward maps to image up, y left maps to image left
+    rows = (center - ranges[valid] * np.cos(angles[valid]) * scale).astype(np.int64)
+    cols = (center - ranges[valid] * np.sin(angles[valid]) * scale).astype(np.int64)
+    inside = (rows >= 0) & (rows < size) & (cols >= 0) & (cols < size)
+    image[rows[inside], cols[inside]] = (255, 255, 255)
+
+    # Robot marker
+    image[center - 2:center + 3, center - 2:center + 3] = (255, 0, 0)
+    return image
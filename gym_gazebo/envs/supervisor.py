@@ -0,0 +1,134 @@
+import os
+import rospy
+import signal
+import subprocess
+import time
+
+from collections import OrderedDict
+
+
+# Advertised by gazebo_ros once gzserver has loaded the world
+GAZEBO_SERVICES = ['/gazebo/pause_physics', '/gazebo/unpause_physics',
+                   '/gazebo/reset_simulation', '/gazebo/reset_world']
+
+
+def attach_requested(attach=None):
+    """Whether to reuse a running ROS master and simulator.
+
+    ``attach`` wins when given, otherwise the GYM_GAZEBO_ATTACH environment
+    variable decides.
+    """
+    if attach is None:
+        attach = os.environ.get('GYM_GAZEBO_ATTACH', '') not in ('', '0', 'false', 'False')
+    return bool(attach)
+
+
+def master_online(master_uri):
+    import rosgraph
+    return rosgraph.is_master_online(master_uri)
+
+
+def service_available(name):
+    try:
+        rospy.wait_for_service(name, timeout=0.5)
+        return True
+    except rospy.ROSException:
+        return False
+
+
+class ProcessSupervisor(object):
+    """Starts the simulator stack as tracked process groups.
+
+    Every process (roscore, roslaunch, gzclient, SITL, ...) gets its own
+    process group, so teardown kills it together with its children and
+    nothing else on the host. Startup waits on readiness probes instead of
+    fixed sleeps, and fails early if a watched process exits.
+    """
+
+    def __init__(self):
+        self.processes = OrderedDict()
+        self.commands = {}
+
+    def launch(self, name, args, **kwargs):
+        self.terminate(name)
+        process = subprocess.Popen(args, preexec_fn=os.setsid, **kwargs)
+        self.processes[name] = process
+        self.commands[name] = (args, kwargs)
+        return process
+
+    def is_alive(self, name):
+        process = self.processes.get(name)
+        return process is not None and process.poll() is None
+
+    def dead(self):
+        """Names of the launched processes that have exited."""
+        return [name for name, process in self.processes.items() if process.poll() is not None]
+
+    def terminate(self, name, timeout=5):
+        process = self.processes.pop(name, None)
+        self.commands.pop(name, None)
+        if process is None or process.poll() is not None:
+            return
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except OSError:
+            return
+        deadline = time.time() + timeout
+        while process.poll() is None and time.time() < deadline:
+            time.sleep(0.05)
+        if process.poll() is None:
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except OSError:
+                pass
+            process.wait()
+
+    def shutdown(self):
+        # Reverse launch order: simulators first, roscore last
+        for name in reversed(list(self.processes.keys())):
+            self.terminate(name)
+
+    def restart(self, exclude=()):
+        """Terminate every process and launch it again, in the original order."""
+        commands = [(name, self.commands[name]) for name in self.processes if name not in exclude]
+        self.shutdown()
+        for name, (args, kwargs) in commands:
+            self.launch(name, args, **kwargs)
+
+    def wait_until(self, probe, what, timeout=60, interval=0.1, watch=()):
+        """Poll ``probe`` until it returns True.
+
+        Raises RuntimeError on timeout or as soon as one of the ``watch``
+        processes has exited. Watched names this supervisor did not launch,
+        e.g. when attached to a running stack, are ignored.
+        """
+        deadline = time.time() + timeout
+        while not probe():
+            for name in watch:
+                if name in self.processes and not self.is_alive(name):
+                    raise RuntimeError("%s exited while waiting for %s" % (name, what))
+            if time.time() > deadline:
+                raise RuntimeError("Timed out after %ds waiting for %s" % (timeout, what))
+            time.sleep(interval)
+
+    def wait_for_master(self, master_uri, timeout=30, watch=()):
+        self.wait_until(lambda: master_online(master_uri),
+                        "the ROS master at %s" % master_uri, timeout, watch=watch)
+
+    def wait_for_services(self, services, timeout=120, watch=()):
+        deadline = time.time() + timeout
+        for name in services:
+            self.wait_until(lambda: service_available(name), "service %s" % name,
+                            max(deadline - time.time(), 0), interval=0, watch=watch)
+
+    def wait_for_message(self, topic, msg_class, timeout=120, watch=()):
+        """Block until the first message on ``topic`` and return it."""
+        received = []
+        def probe():
+            try:
+                received.append(rospy.wait_for_message(topic, msg_class, timeout=0.5))
+                return True
+            except rospy.ROSException:
+                return False
+        self.wait_until(probe, "a message on %s" % topic, timeout, interval=0, watch=watch)
+        return received[0]
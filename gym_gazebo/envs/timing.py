@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+
+from collections import deque
+
+import numpy as np
+
+from gym_gazebo.tracing import clock, get_tracer
+
+
+class TimingHistogram(object):
+    """Durations of one phase.
+
+    Count, mean and max cover every sample; the percentiles are computed
+    over the most recent ``max_samples`` to bound memory on long runs.
+    """
+
+    def __init__(self, max_samples=10000):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, duration):
+        self.samples.append(duration)
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+    def stats(self):
+        p50, p95, p99 = np.percentile(self.samples, [50, 95, 99]) if self.samples else (0.0, 0.0, 0.0)
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+            'max': self.max,
+        }
+
+
+class _NullPhase(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_PHASE = _NullPhase()
+
+
+class _Phase(object):
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration = clock() - self.start
+        timer = self.timer
+        if timer.enabled:
+            timer.record(self.name, duration)
+        if timer.tracer.enabled:
+            timer.tracer.complete(self.name, self.start, duration)
+        return False
+
+
+class PhaseTimer(object):
+    """Opt-in timers for the phases of a step, kept as histograms.
+
+    ``with timer.phase('publish'): ...`` times a block. While disabled,
+    phase() returns a shared no-op context manager, so instrumented code
+    costs one method call per phase. With ``dump_path`` set, the stats are
+    written there as JSON at most every ``dump_interval`` seconds.
+    """
+
+    def __init__(self, enabled=False, max_samples=10000, dump_path=None, dump_interval=60):
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.histograms = {}
+        # Phases also become spans of the Chrome trace when tracing is on
+        self.tracer = get_tracer()
+        self._lock = threading.Lock()
+        self._last_dump = time.time()
+
+    def phase(self, name):
+        if not self.enabled and not self.tracer.enabled:
+            return _NULL_PHASE
+        return _Phase(self, name)
+
+    def record(self, name, duration):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = TimingHistogram(self.max_samples)
+            histogram.add(duration)
+        if self.dump_path and time.time() - self._last_dump >= self.dump_interval:
+            self.dump()
+
+    def stats(self):
+        """{phase: {'count', 'mean', 'p50', 'p95', 'p99', 'max'}}, in seconds."""
+        with self._lock:
+            return dict((name, histogram.stats()) for name, histogram in self.histograms.items())
+
+    def clear(self):
+        with self._lock:
+            self.histograms.clear()
+
+    def dump(self, path=None):
+        path = path or self.dump_path
+        self._last_dump = time.time()
+        with open(path, 'w') as f:
+            json.dump({'time': self._last_dump, 'phases': self.stats()}, f, indent=2, sort_keys=True)
+
+
+class ControlLoop(object):
+    """Paces a control loop at a fixed rate of the simulation clock.
+
+    ``now()`` returns the sim time in seconds and ``sleep(seconds)`` waits
+    that long in sim time. Call tick() right after each action is sent: it
+    sleeps until the next period boundary, so the observation that follows
+    is taken on schedule however long the agent took. An action sent after
+    its boundary had already passed is a deadline miss, and the loop then
+    moves on to the next boundary instead of trying to catch up.
+
+    stats() reports the deadline misses and, as histograms in sim seconds,
+    the action latency (from a tick to the next action) and the jitter
+    (how late tick() woke up after its boundary).
+    """
+
+    def __init__(self, rate, now, sleep, max_samples=10000):
+        self.rate = rate
+        self.period = 1.0 / rate
+        self.now = now
+        self.sleep = sleep
+        self.next_tick = None
+        self.ticks = 0
+        self.deadline_misses = 0
+        self.skipped_ticks = 0
+        self.action_latency = TimingHistogram(max_samples)
+        self.jitter = TimingHistogram(max_samples)
+
+    def restart(self):
+        """Start over from the next tick(), e.g. after the sim time was reset."""
+        self.next_tick = None
+
+    def tick(self):
+        now = self.now()
+        if self.next_tick is None:
+            self.next_tick = now + self.period
+        else:
+            self.action_latency.add(now - (self.next_tick - self.period))
+            if now > self.next_tick:
+                self.deadline_misses += 1
+                skipped = int((now - self.next_tick) / self.period) + 1
+                self.skipped_ticks += skipped
+                self.next_tick += skipped * self.period
+        self.sleep(self.next_tick - now)
+        self.jitter.add(self.now() - self.next_tick)
+        self.ticks += 1
+        self.next_tick += self.period
+
+    def stats(self):
+        return {
+            'rate': self.rate,
+            'ticks': self.ticks,
+            'deadline_misses': self.deadline_misses,
+            'skipped_ticks': self.skipped_ticks,
+            'action_latency': self.action_latency.stats(),
+            'jitter': self.jitter.stats(),
+        }
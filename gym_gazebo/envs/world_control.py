@@ -0,0 +1,98 @@
+import threading
+
+
+class WorldControl(object):
+    """Steps a paused gzserver world over one Gazebo transport connection.
+
+    Publishes gazebo.msgs.WorldControl multi_step messages on
+    /gazebo/<world>/world_control through pygazebo, so a step costs one
+    write on a socket that stays open instead of starting ``gz world``.
+    pygazebo runs on an asyncio (trollius on Python 2) event loop, which
+    gets a daemon thread of its own; the methods block until the loop
+    has done the work. Raises ImportError when pygazebo is not installed
+    and IOError when gzserver does not answer within ``timeout`` seconds.
+    """
+
+    def __init__(self, port, world='default', host='127.0.0.1', timeout=10):
+        import pygazebo
+        from pygazebo.msg.world_control_pb2 import WorldControl as WorldControlMsg
+        # The asyncio or trollius module pygazebo itself runs on
+        from pygazebo.pygazebo import asyncio
+
+        self.topic = '/gazebo/%s/world_control' % world
+        self._message_class = WorldControlMsg
+        self._asyncio = asyncio
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        try:
+            self._manager = self._call(lambda: pygazebo.connect((host, port)), timeout)
+            self._publisher = self._call(
+                lambda: self._manager.advertise(self.topic, 'gazebo.msgs.WorldControl'), timeout)
+            # gzserver subscribes to the topic once it learns about it
+            self._call(self._publisher.wait_for_listener, timeout)
+        except Exception:
+            self.close()
+            raise
+
+    def _run(self):
+        self._asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _call(self, start, timeout):
+        """Call ``start`` on the loop thread and wait for the future it returns."""
+        done = threading.Event()
+        outcome = {}
+        timer = []
+
+        # All of them run on the loop thread, the first one to finish wins
+        def finish(future):
+            if done.is_set():
+                return
+            try:
+                outcome['result'] = future.result()
+            except Exception as e:
+                outcome['error'] = e
+            timer[0].cancel()
+            done.set()
+
+        def expire():
+            if not done.is_set():
+                outcome['error'] = IOError("no answer from gzserver on %s within %ss" % (self.topic, timeout))
+                done.set()
+
+        def begin():
+            timer.append(self._loop.call_later(timeout, expire))
+            try:
+                start().add_done_callback(finish)
+            except Exception as e:
+                outcome['error'] = e
+                timer[0].cancel()
+                done.set()
+
+        self._loop.call_soon_threadsafe(begin)
+        # Without a timeout Python 2 blocks on a lock instead of polling
+        done.wait()
+        if 'error' in outcome:
+            error = outcome['error']
+            raise error if isinstance(error, IOError) else IOError(str(error))
+        return outcome.get('result')
+
+    def step(self, iterations, timeout=5):
+        """Let the paused world run ``iterations`` physics steps.
+
+        Returns once the message is written; the world reports the new
+        sim time on /clock.
+        """
+        message = self._message_class()
+        message.multi_step = int(iterations)
+        self._call(lambda: self._publisher.publish(message), timeout)
+
+    def close(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+        self._loop.close()
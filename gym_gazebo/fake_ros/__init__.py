@@ -0,0 +1,136 @@
+"""In-process stand-in for ROS and Gazebo, for tests and CPU-only profiling.
+
+install() puts fake ``rospy``, ``message_filters``, ``rosgraph``,
+``cv_bridge``, ``pygazebo`` and message modules (std_msgs,
+geometry_msgs, sensor_msgs, nav_msgs, gazebo_msgs, std_srvs,
+rosgraph_msgs, mavros_msgs) into sys.modules and starts a FakeGazebo that runs a World model. The env
+modules imported afterwards talk to it unmodified, all inside one Python
+process and without roscore or gzserver:
+
+    from gym_gazebo import fake_ros
+    fake_ros.install(fake_ros.ArenaWorld(scan_rate=30))
+
+    import gym
+    import gym_gazebo
+    env = gym.make('GazeboCircuit2TurtlebotLidar-v0')
+
+The envs attach to it (GYM_GAZEBO_ATTACH=1), so nothing is launched.
+Subclass World to script what the sensors see and how commands move the
+robot. The ErleCopter and ErleRover envs start ArduPilot SITL themselves
+and are not covered.
+"""
+import os
+import sys
+import types
+
+from gym_gazebo.fake_ros import filters, graph, image_bridge, messages, transport
+from gym_gazebo.fake_ros.gazebo import FakeGazebo
+from gym_gazebo.fake_ros.world import ArenaWorld, World
+
+_installed = None
+
+
+def _module(name, attrs=None, package=False):
+    module = types.ModuleType(name)
+    if package:
+        module.__path__ = []
+    module.__dict__.update(attrs or {})
+    return module
+
+
+def _public(module, names):
+    return dict((name, getattr(module, name)) for name in names)
+
+
+def _fake_modules():
+    core = _module('rospy.core', _public(graph, ['is_initialized', 'get_node_uri', 'is_shutdown']))
+    exceptions = _module('rospy.exceptions', _public(graph, ['ROSException', 'ROSInterruptException',
+                                                             'ServiceException']))
+    registration = _module('rospy.impl.registration', _public(graph, ['get_topic_manager']))
+    impl = _module('rospy.impl', {'registration': registration}, package=True)
+    rospy = _module('rospy', _public(graph, graph.ROSPY), package=True)
+    rospy.core, rospy.exceptions, rospy.impl = core, exceptions, impl
+
+    # pygazebo, for lockstep: its own module and the asyncio it runs on
+    world_control_pb2 = _module('pygazebo.msg.world_control_pb2', {'WorldControl': transport.WorldControl})
+    msg = _module('pygazebo.msg', {'world_control_pb2': world_control_pb2}, package=True)
+    asyncio = _module('pygazebo.pygazebo.asyncio', _public(transport, ['new_event_loop', 'set_event_loop']))
+    pygazebo_module = _module('pygazebo.pygazebo', {'asyncio': asyncio})
+    pygazebo = _module('pygazebo', _public(transport, ['connect']), package=True)
+    pygazebo.msg, pygazebo.pygazebo = msg, pygazebo_module
+
+    modules = {
+        'rospy': rospy,
+        'rospy.core': core,
+        'rospy.exceptions': exceptions,
+        'rospy.impl': impl,
+        'rospy.impl.registration': registration,
+        'rosgraph': _module('rosgraph', _public(graph, ['Master', 'is_master_online'])),
+        'message_filters': _module('message_filters', _public(filters, [
+            'SimpleFilter', 'Subscriber', 'TimeSynchronizer', 'ApproximateTimeSynchronizer'])),
+        'cv_bridge': _module('cv_bridge', _public(image_bridge, ['CvBridge', 'CvBridgeError'])),
+        # The envs import it without using it
+        'roslaunch': _module('roslaunch'),
+        'pygazebo': pygazebo,
+        'pygazebo.pygazebo': pygazebo_module,
+        'pygazebo.msg': msg,
+        'pygazebo.msg.world_control_pb2': world_control_pb2,
+    }
+    for name, classes in messages.packages().items():
+        package_name, kind = name.split('.')
+        package = modules.get(package_name)
+        if package is None:
+            package = modules[package_name] = _module(package_name, package=True)
+        modules[name] = _module(name, classes)
+        setattr(package, kind, modules[name])
+    return modules
+
+
+def install(world=None, real_time_factor=None):
+    """Replace ROS and Gazebo by the in-process fakes and return the FakeGazebo.
+
+    ``world`` defaults to an ArenaWorld. Must run before the env modules
+    (or anything else that imports rospy) are imported, since they bind
+    the rospy module when imported. See FakeGazebo for
+    ``real_time_factor``.
+    """
+    global _installed
+    if _installed is not None:
+        raise RuntimeError("fake_ros is already installed")
+    if 'rospy' in sys.modules:
+        raise RuntimeError("install() must run before rospy, or an env module using it, is imported")
+
+    graph.reset()
+    modules = _fake_modules()
+    saved = dict((name, sys.modules.get(name)) for name in modules)
+    sys.modules.update(modules)
+    saved_attach = os.environ.get('GYM_GAZEBO_ATTACH')
+    os.environ['GYM_GAZEBO_ATTACH'] = '1'
+
+    gazebo = FakeGazebo(world if world is not None else ArenaWorld(), real_time_factor)
+    _installed = (gazebo, saved, saved_attach)
+    return gazebo
+
+
+def uninstall():
+    """Stop the FakeGazebo and restore the modules install() replaced.
+
+    Env modules imported meanwhile keep the fake rospy; drop them from
+    sys.modules before importing them again against real ROS.
+    """
+    global _installed
+    if _installed is None:
+        return
+    gazebo, saved, saved_attach = _installed
+    _installed = None
+    graph.signal_shutdown("fake_ros uninstalled")
+    gazebo.close()
+    for name, module in saved.items():
+        if module is None:
+            sys.modules.pop(name, None)
+        else:
+            sys.modules[name] = module
+    if saved_attach is None:
+        os.environ.pop('GYM_GAZEBO_ATTACH', None)
+    else:
+        os.environ['GYM_GAZEBO_ATTACH'] = saved_attach
@@ -0,0 +1,91 @@
+"""message_filters on top of the in-process graph."""
+import threading
+
+from gym_gazebo.fake_ros import graph
+
+
+class SimpleFilter(object):
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def registerCallback(self, cb, *args):
+        conn = len(self.callbacks)
+        self.callbacks[conn] = (cb, args)
+        return conn
+
+    def signalMessage(self, *msg):
+        for cb, args in list(self.callbacks.values()):
+            cb(*(msg + args))
+
+
+class Subscriber(SimpleFilter):
+
+    def __init__(self, *args, **kwargs):
+        SimpleFilter.__init__(self)
+        self.topic = args[0]
+        kwargs['callback'] = self.callback
+        self.sub = graph.Subscriber(*args, **kwargs)
+
+    def callback(self, msg):
+        self.signalMessage(msg)
+
+    def getTopic(self):
+        return self.topic
+
+    def unregister(self):
+        self.sub.unregister()
+
+
+class TimeSynchronizer(SimpleFilter):
+    """Calls back with one message per input once all inputs have the same stamp."""
+
+    def __init__(self, fs, queue_size):
+        SimpleFilter.__init__(self)
+        self.queue_size = queue_size
+        self.lock = threading.Lock()
+        self.queues = [{} for f in fs]
+        self.input_connections = [f.registerCallback(self.add, q, i)
+                                  for i, (f, q) in enumerate(zip(fs, self.queues))]
+
+    def add(self, msg, my_queue, my_queue_index=None):
+        with self.lock:
+            my_queue[msg.header.stamp] = msg
+            while len(my_queue) > self.queue_size:
+                del my_queue[min(my_queue)]
+            matched = self._match(msg.header.stamp, my_queue_index)
+            if matched is None:
+                return
+            msgs = [queue.pop(stamp) for queue, stamp in zip(self.queues, matched)]
+        self.signalMessage(*msgs)
+
+    def _match(self, stamp, my_queue_index):
+        if all(stamp in queue for queue in self.queues):
+            return [stamp] * len(self.queues)
+        return None
+
+
+class ApproximateTimeSynchronizer(TimeSynchronizer):
+    """Like TimeSynchronizer, but stamps may differ by up to ``slop`` seconds.
+
+    Every new message is matched with the closest message of each other
+    input; the set is sent when all of them lie within ``slop``.
+    """
+
+    def __init__(self, fs, queue_size, slop, allow_headerless=False, reset=False):
+        TimeSynchronizer.__init__(self, fs, queue_size)
+        self.slop = slop
+
+    def _match(self, stamp, my_queue_index):
+        matched = []
+        for index, queue in enumerate(self.queues):
+            if index == my_queue_index:
+                matched.append(stamp)
+                continue
+            if not queue:
+                return None
+            matched.append(min(queue, key=lambda other: abs((other - stamp).to_sec())))
+        seconds = [s.to_sec() for s in matched]
+        if max(seconds) - min(seconds) > self.slop:
+            return None
+        return matched
@@ -0,0 +1,188 @@
+import copy
+import threading
+import time
+
+from gym_gazebo.fake_ros import graph
+from gym_gazebo.fake_ros.messages import Clock, Duration, Time, Empty, EmptyResponse, GetModelState, \
+    GetModelStateResponse, GetPhysicsProperties, GetPhysicsPropertiesResponse, SetModelState, \
+    SetModelStateResponse, SetPhysicsProperties, SetPhysicsPropertiesResponse
+from gym_gazebo.fake_ros.transport import WorldControl
+
+
+class FakeGazebo(object):
+    """Runs a World in place of gzserver and the gazebo_ros plugins.
+
+    Serves the /gazebo services the envs call (pause/unpause_physics,
+    reset_simulation, reset_world, get/set_physics_properties and
+    get/set_model_state) and, while physics is unpaused, steps the world
+    from one sensor reading to the next on a background thread and
+    publishes the readings and /clock. Nothing is published while paused,
+    except during a world_control multi_step (see fake_ros.transport),
+    which runs the paused world for that many time steps.
+
+    Sim time runs as fast as the CPU allows unless ``real_time_factor``
+    is set. Like Gazebo, it follows max_update_rate * time_step after a
+    set_physics_properties call (real_time_update_rate=0 is unthrottled).
+    """
+
+    def __init__(self, world, real_time_factor=None, time_step=0.001):
+        self.world = world
+        self.paused = False
+        self._cond = threading.Condition(threading.RLock())
+        self._origin = None
+        # End of the running multi_step, as a Time
+        self._step_until = None
+
+        self.physics = GetPhysicsPropertiesResponse(time_step=time_step, success=True)
+        self.physics.max_update_rate = real_time_factor / time_step if real_time_factor else 0.0
+        self.physics.gravity.z = -9.8
+        self.physics.ode_config.sor_pgs_iters = 50
+
+        graph.get_graph().clock = lambda: self.world.time
+        handlers = [
+            ('/gazebo/pause_physics', Empty, self.on_pause),
+            ('/gazebo/unpause_physics', Empty, self.on_unpause),
+            ('/gazebo/reset_simulation', Empty, self.on_reset_simulation),
+            ('/gazebo/reset_world', Empty, self.on_reset_world),
+            ('/gazebo/get_physics_properties', GetPhysicsProperties, self.on_get_physics),
+            ('/gazebo/set_physics_properties', SetPhysicsProperties, self.on_set_physics),
+            ('/gazebo/get_model_state', GetModelState, self.on_get_model_state),
+            ('/gazebo/set_model_state', SetModelState, self.on_set_model_state),
+        ] + world.services
+        self.services = [graph.Service(name, service_class, self._locked(handler))
+                         for name, service_class, handler in handlers]
+        self.subscribers = [graph.Subscriber(topic, msg_class, self._locked(handler))
+                            for topic, msg_class, handler in world.commands]
+        self.subscribers.append(graph.Subscriber('/gazebo/default/world_control', WorldControl,
+                                                 self._locked(self.on_world_control)))
+        self.clock_pub = graph.Publisher('/clock', Clock, queue_size=10)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _locked(self, handler):
+        def call(msg):
+            with self._cond:
+                return handler(msg)
+        return call
+
+    def on_pause(self, request):
+        self.paused = True
+        return EmptyResponse()
+
+    def on_unpause(self, request):
+        self.paused = False
+        self._origin = None
+        self._step_until = None
+        self._cond.notify_all()
+        return EmptyResponse()
+
+    def on_reset_simulation(self, request):
+        self.world.reset()
+        self.world.time = 0.0
+        self.world.restart_sensors()
+        self._origin = None
+        self._step_until = None
+        return EmptyResponse()
+
+    def on_reset_world(self, request):
+        self.world.reset()
+        return EmptyResponse()
+
+    def on_world_control(self, msg):
+        # Like Gazebo, multi_step only acts on a paused world
+        if self.paused and msg.multi_step > 0:
+            self._step_until = Time.from_sec(self.world.time) + \
+                Duration.from_sec(msg.multi_step * self.physics.time_step)
+            self._origin = None
+            self._cond.notify_all()
+
+    def on_get_physics(self, request):
+        physics = copy.deepcopy(self.physics)
+        physics.pause = self.paused
+        return physics
+
+    def on_set_physics(self, request):
+        self.physics.time_step = request.time_step
+        self.physics.max_update_rate = request.max_update_rate
+        self.physics.gravity = request.gravity
+        self.physics.ode_config = request.ode_config
+        self._origin = None
+        return SetPhysicsPropertiesResponse(success=True)
+
+    def on_get_model_state(self, request):
+        state = self.world.get_model_state(request.model_name)
+        if state is None:
+            return GetModelStateResponse(success=False, status_message="model does not exist")
+        response = GetModelStateResponse(pose=state[0], twist=state[1], success=True)
+        response.header.stamp = Time.from_sec(self.world.time)
+        return response
+
+    def on_set_model_state(self, request):
+        if not self.world.set_model_state(request.model_state):
+            return SetModelStateResponse(success=False, status_message="model does not exist")
+        return SetModelStateResponse(success=True)
+
+    def _delay(self, sim_time):
+        # Wall seconds to wait before the world may reach sim_time
+        real_time_factor = self.physics.max_update_rate * self.physics.time_step
+        if real_time_factor <= 0:
+            return 0.0
+        now = time.time()
+        if self._origin is None:
+            self._origin = (now, self.world.time)
+        return self._origin[0] + (sim_time - self._origin[1]) / real_time_factor - now
+
+    def _run(self):
+        world = self.world
+        while True:
+            with self._cond:
+                while self._running and ((self.paused and self._step_until is None) or not world.sensors):
+                    self._cond.wait(0.1)
+                if not self._running:
+                    return
+                sensor = min(world.sensors, key=lambda s: s.next_time)
+                step_until = self._step_until if self.paused else None
+                if step_until is not None and sensor.next_time > step_until.to_sec():
+                    # The multi_step ends before the next reading
+                    sensor = msg = None
+                    delay = self._delay(step_until.to_sec())
+                    if delay <= 0:
+                        world.advance(step_until.to_sec() - world.time)
+                        world.time = step_until.to_sec()
+                        stamp = step_until
+                        self._step_until = None
+                else:
+                    delay = self._delay(sensor.next_time)
+                    if delay <= 0:
+                        world.advance(sensor.next_time - world.time)
+                        world.time = sensor.next_time
+                        sensor.next_time += sensor.period
+                        sensor.seq += 1
+                        msg = sensor.make()
+                        msg.header.seq = sensor.seq
+                        msg.header.stamp = stamp = Time.from_sec(world.time)
+                        msg.header.frame_id = sensor.frame_id
+            if delay > 0:
+                # Recheck afterwards, the world may have been paused meanwhile
+                time.sleep(min(delay, 0.01))
+                continue
+            if msg is not None:
+                graph.get_graph().publish(sensor.topic, msg)
+            if self.clock_pub.get_num_connections():
+                self.clock_pub.publish(Clock(stamp))
+            # Let the threads waiting for this reading run
+            time.sleep(0)
+
+    def close(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join()
+        for service in self.services:
+            service.shutdown()
+        for subscriber in self.subscribers:
+            subscriber.unregister()
+        self.clock_pub.unregister()
@@ -0,0 +1,360 @@
+"""In-process implementation of the rospy API the envs use.
+
+Publishing calls the subscriber callbacks directly, in the publisher's
+thread, and service proxies call the handler of the Service object.
+install() makes this module's public names the ``rospy`` module.
+"""
+import logging
+import os
+import threading
+import time
+
+from gym_gazebo.fake_ros import messages
+from gym_gazebo.fake_ros.messages import Duration
+
+logger = logging.getLogger('rospy')
+
+
+class ROSException(Exception):
+    pass
+
+
+class ROSInterruptException(ROSException, KeyboardInterrupt):
+    pass
+
+
+class ServiceException(ROSException):
+    pass
+
+
+class Time(messages.Time):
+    __slots__ = ()
+
+    @staticmethod
+    def now():
+        return get_rostime()
+
+
+class Graph(object):
+    """Topics, services and node state shared by everything in the process."""
+
+    def __init__(self):
+        self.cond = threading.Condition(threading.RLock())
+        self.subscribers = {}
+        self.publishers = {}
+        self.services = {}
+        self.latched = {}
+        self.node_name = None
+        self.shutdown = False
+        self.shutdown_hooks = []
+        # Sim time in seconds, FakeGazebo points this at its world
+        self.clock = lambda: 0.0
+
+    def wait(self, predicate, timeout, what):
+        deadline = None if timeout is None else time.time() + timeout
+        with self.cond:
+            while not predicate():
+                if self.shutdown:
+                    raise ROSInterruptException("rospy shutdown")
+                if deadline is None:
+                    self.cond.wait(0.1)
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise ROSException("timeout exceeded while waiting for %s" % what)
+                    self.cond.wait(min(remaining, 0.1))
+
+    def publish(self, topic, msg, latch=False):
+        with self.cond:
+            subscribers = self.subscribers.get(topic, ())
+            if latch:
+                self.latched[topic] = msg
+        for subscriber in subscribers:
+            subscriber._deliver(msg)
+
+    def add(self, table, name, item):
+        with self.cond:
+            # Copy on write, so publish() can iterate without the lock
+            table[name] = table.get(name, ()) + (item,)
+            self.cond.notify_all()
+
+    def remove(self, table, name, item):
+        with self.cond:
+            items = tuple(other for other in table.get(name, ()) if other is not item)
+            if items:
+                table[name] = items
+            else:
+                table.pop(name, None)
+
+
+_graph = Graph()
+
+
+def reset():
+    """Start over with an empty graph, used by install()."""
+    global _graph
+    _graph = Graph()
+    return _graph
+
+
+def get_graph():
+    return _graph
+
+
+def _resolve(name):
+    return name if name.startswith('/') else '/' + name
+
+
+class Publisher(object):
+
+    def __init__(self, name, data_class, subscriber_listener=None, tcp_nodelay=False, latch=False,
+                 headers=None, queue_size=None):
+        self.name = self.resolved_name = _resolve(name)
+        self.data_class = data_class
+        self.type = data_class._type
+        self.latch = latch
+        _graph.add(_graph.publishers, self.name, self)
+
+    def publish(self, *args, **kwds):
+        if len(args) == 1 and not kwds and isinstance(args[0], self.data_class):
+            msg = args[0]
+        else:
+            msg = self.data_class(*args, **kwds)
+        _graph.publish(self.name, msg, self.latch)
+
+    def get_num_connections(self):
+        return len(_graph.subscribers.get(self.name, ()))
+
+    def unregister(self):
+        _graph.remove(_graph.publishers, self.name, self)
+
+
+class Subscriber(object):
+
+    def __init__(self, name, data_class, callback=None, callback_args=None, queue_size=None,
+                 buff_size=65536, tcp_nodelay=False):
+        self.name = self.resolved_name = _resolve(name)
+        self.data_class = data_class
+        self.type = data_class._type
+        self.callback = callback
+        self.callback_args = callback_args
+        _graph.add(_graph.subscribers, self.name, self)
+        latched = _graph.latched.get(self.name)
+        if latched is not None:
+            self._deliver(latched)
+
+    def _deliver(self, msg):
+        if self.callback is None:
+            return
+        try:
+            if self.callback_args is None:
+                self.callback(msg)
+            else:
+                self.callback(msg, self.callback_args)
+        except Exception:
+            # rospy logs callback errors and keeps the subscription
+            logger.exception("bad callback: %r", self.callback)
+
+    def get_num_connections(self):
+        return len(_graph.publishers.get(self.name, ()))
+
+    def unregister(self):
+        _graph.remove(_graph.subscribers, self.name, self)
+
+
+class Service(object):
+
+    def __init__(self, name, service_class, handler, buff_size=65536, error_handler=None):
+        self.resolved_name = _resolve(name)
+        self.service_class = service_class
+        self.handler = handler
+        with _graph.cond:
+            _graph.services[self.resolved_name] = self
+            _graph.cond.notify_all()
+
+    def _call(self, request):
+        response = self.handler(request)
+        response_class = self.service_class._response_class
+        if isinstance(response, response_class):
+            return response
+        if response is None:
+            raise ServiceException("service [%s] handler returned None" % self.resolved_name)
+        if isinstance(response, dict):
+            return response_class(**response)
+        if isinstance(response, (list, tuple)):
+            return response_class(*response)
+        return response_class(response)
+
+    def shutdown(self, reason=''):
+        with _graph.cond:
+            if _graph.services.get(self.resolved_name) is self:
+                del _graph.services[self.resolved_name]
+
+
+class ServiceProxy(object):
+
+    def __init__(self, name, service_class, persistent=False, headers=None):
+        self.resolved_name = _resolve(name)
+        self.service_class = service_class
+        self.request_class = service_class._request_class
+        self.response_class = service_class._response_class
+
+    def wait_for_service(self, timeout=None):
+        wait_for_service(self.resolved_name, timeout)
+
+    def __call__(self, *args, **kwds):
+        return self.call(*args, **kwds)
+
+    def call(self, *args, **kwds):
+        if len(args) == 1 and not kwds and isinstance(args[0], self.request_class):
+            request = args[0]
+        else:
+            request = self.request_class(*args, **kwds)
+        service = _graph.services.get(self.resolved_name)
+        if service is None:
+            raise ServiceException("service [%s] unavailable" % self.resolved_name)
+        try:
+            return service._call(request)
+        except ServiceException:
+            raise
+        except Exception as e:
+            raise ServiceException("service [%s] responded with an error: %s" % (self.resolved_name, e))
+
+    def close(self):
+        pass
+
+
+def wait_for_service(service, timeout=None):
+    name = _resolve(service)
+    _graph.wait(lambda: name in _graph.services, timeout, "service %s" % name)
+
+
+def wait_for_message(topic, topic_type, timeout=None):
+    received = []
+    def callback(msg):
+        with _graph.cond:
+            if not received:
+                received.append(msg)
+                _graph.cond.notify_all()
+    subscriber = Subscriber(topic, topic_type, callback)
+    try:
+        _graph.wait(lambda: received, timeout, "a message on topic %s" % topic)
+    finally:
+        subscriber.unregister()
+    return received[0]
+
+
+def init_node(name, argv=None, anonymous=False, log_level=None, disable_rostime=False,
+              disable_rosout=False, disable_signals=False, xmlrpc_port=0, tcpros_port=0):
+    if anonymous:
+        name = '%s_%d_%d' % (name, os.getpid(), int(time.time() * 1000))
+    _graph.node_name = _resolve(name)
+
+
+def get_name():
+    return _graph.node_name or '/unnamed'
+
+
+def is_initialized():
+    return _graph.node_name is not None
+
+
+def get_node_uri():
+    return 'inproc://%s' % get_name()
+
+
+def is_shutdown():
+    return _graph.shutdown
+
+
+def on_shutdown(hook):
+    _graph.shutdown_hooks.append(hook)
+
+
+def signal_shutdown(reason):
+    with _graph.cond:
+        if _graph.shutdown:
+            return
+        _graph.shutdown = True
+        _graph.cond.notify_all()
+    for hook in _graph.shutdown_hooks:
+        hook()
+
+
+def get_time():
+    return _graph.clock()
+
+
+def get_rostime():
+    return Time.from_sec(_graph.clock())
+
+
+def sleep(duration):
+    """Sleep ``duration`` (seconds or Duration) of sim time."""
+    if isinstance(duration, messages.Duration):
+        duration = duration.to_sec()
+    end = get_time() + duration
+    while get_time() < end:
+        if _graph.shutdown:
+            raise ROSInterruptException("rospy shutdown")
+        time.sleep(0.001)
+
+
+def logdebug(msg, *args, **kwargs):
+    logger.debug(msg, *args)
+
+
+def loginfo(msg, *args, **kwargs):
+    logger.info(msg, *args)
+
+
+def logwarn(msg, *args, **kwargs):
+    logger.warning(msg, *args)
+
+
+def logerr(msg, *args, **kwargs):
+    logger.error(msg, *args)
+
+
+def logfatal(msg, *args, **kwargs):
+    logger.critical(msg, *args)
+
+
+class _TopicManager(object):
+    # What reregister_node announces to the master
+
+    def get_publications(self):
+        return [[topic, items[0].type] for topic, items in _graph.publishers.items()]
+
+    def get_subscriptions(self):
+        return [[topic, items[0].type] for topic, items in _graph.subscribers.items()]
+
+
+def get_topic_manager():
+    return _TopicManager()
+
+
+class Master(object):
+    """rosgraph.Master: there is no master to register with."""
+
+    def __init__(self, caller_id, master_uri=None):
+        self.caller_id = caller_id
+
+    def getUri(self):
+        return get_node_uri()
+
+    def registerPublisher(self, topic, topic_type, caller_api):
+        return 1, '', []
+
+    def registerSubscriber(self, topic, topic_type, caller_api):
+        return 1, '', []
+
+
+def is_master_online(master_uri=None, request_timeout=None):
+    return True
+
+
+ROSPY = ['Publisher', 'Subscriber', 'Service', 'ServiceProxy', 'wait_for_service', 'wait_for_message',
+         'init_node', 'get_name', 'is_shutdown', 'on_shutdown', 'signal_shutdown', 'get_time',
+         'get_rostime', 'sleep', 'Time', 'Duration', 'logdebug', 'loginfo', 'logwarn', 'logerr',
+         'logfatal', 'ROSException', 'ROSInterruptException', 'ServiceException']
@@ -0,0 +1,40 @@
+"""cv_bridge for the in-process graph, with NumPy instead of OpenCV."""
+import numpy as np
+
+from gym_gazebo.fake_ros.messages import Image
+
+_CHANNELS = {'rgb8': 3, 'bgr8': 3, 'rgba8': 4, 'bgra8': 4, 'mono8': 1}
+
+
+class CvBridgeError(TypeError):
+    pass
+
+
+class CvBridge(object):
+
+    def imgmsg_to_cv2(self, img_msg, desired_encoding='passthrough'):
+        encoding = img_msg.encoding
+        channels = _CHANNELS.get(encoding)
+        if channels is None:
+            raise CvBridgeError("encoding %s is not supported" % encoding)
+        data = np.frombuffer(img_msg.data, dtype=np.uint8).reshape(img_msg.height, img_msg.step)
+        image = data[:, :img_msg.width * channels].reshape(img_msg.height, img_msg.width, channels)
+        if channels == 1:
+            image = image[:, :, 0]
+        if desired_encoding in ('passthrough', encoding):
+            return image
+        if channels == 3 and desired_encoding in ('rgb8', 'bgr8'):
+            return image[:, :, ::-1]
+        if channels == 4 and desired_encoding in ('rgb8', 'bgr8'):
+            image = image[:, :, :3]
+            return image if encoding[:3] == desired_encoding[:3] else image[:, :, ::-1]
+        raise CvBridgeError("cannot convert %s to %s" % (encoding, desired_encoding))
+
+    def cv2_to_imgmsg(self, cvim, encoding='passthrough'):
+        cvim = np.ascontiguousarray(cvim, dtype=np.uint8)
+        height, width = cvim.shape[:2]
+        channels = cvim.shape[2] if cvim.ndim == 3 else 1
+        if encoding == 'passthrough':
+            encoding = {1: 'mono8', 3: 'bgr8', 4: 'bgra8'}[channels]
+        return Image(height=height, width=width, encoding=encoding, step=width * channels,
+                     data=cvim.tobytes())
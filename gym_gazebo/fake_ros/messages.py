@@ -0,0 +1,251 @@
+"""Plain Python stand-ins for the ROS messages and services the envs use.
+
+Fields and defaults follow the .msg/.srv definitions, so code that builds
+or reads messages works unchanged. There is no serialization: messages
+only travel inside the process.
+"""
+import math
+
+
+class _TVal(object):
+    __slots__ = ('secs', 'nsecs')
+
+    def __init__(self, secs=0, nsecs=0):
+        if isinstance(secs, float):
+            nsecs += int(round((secs - math.floor(secs)) * 1e9))
+            secs = int(math.floor(secs))
+        secs, nsecs = int(secs), int(nsecs)
+        secs += nsecs // 1000000000
+        self.secs = secs
+        self.nsecs = nsecs % 1000000000
+
+    @classmethod
+    def from_sec(cls, float_secs):
+        return cls(float(float_secs))
+
+    def to_sec(self):
+        return self.secs + self.nsecs / 1e9
+
+    def to_nsec(self):
+        return self.secs * 1000000000 + self.nsecs
+
+    def is_zero(self):
+        return self.secs == 0 and self.nsecs == 0
+
+    def __hash__(self):
+        return hash(self.to_nsec())
+
+    def __eq__(self, other):
+        return isinstance(other, _TVal) and self.to_nsec() == other.to_nsec()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        return self.to_nsec() < other.to_nsec()
+
+    def __le__(self, other):
+        return self.to_nsec() <= other.to_nsec()
+
+    def __gt__(self, other):
+        return self.to_nsec() > other.to_nsec()
+
+    def __ge__(self, other):
+        return self.to_nsec() >= other.to_nsec()
+
+    def __repr__(self):
+        return '%s[%d]' % (type(self).__name__, self.to_nsec())
+
+
+class Duration(_TVal):
+    __slots__ = ()
+
+    def __add__(self, other):
+        if isinstance(other, Time):
+            return other + self
+        return Duration(0, self.to_nsec() + other.to_nsec())
+
+    def __sub__(self, other):
+        return Duration(0, self.to_nsec() - other.to_nsec())
+
+    def __neg__(self):
+        return Duration(0, -self.to_nsec())
+
+    def __mul__(self, factor):
+        return Duration.from_sec(self.to_sec() * factor)
+
+    __rmul__ = __mul__
+
+
+class Time(_TVal):
+    __slots__ = ()
+
+    def __add__(self, other):
+        return Time(0, self.to_nsec() + other.to_nsec())
+
+    def __sub__(self, other):
+        if isinstance(other, Time):
+            return Duration(0, self.to_nsec() - other.to_nsec())
+        return Time(0, self.to_nsec() - other.to_nsec())
+
+
+class Message(object):
+    """Base of the message classes, built by _message() from a field list."""
+    __slots__ = ()
+    _type = ''
+    _fields = ()
+
+    def __init__(self, *args, **kwds):
+        if len(args) > len(self._fields):
+            raise TypeError("%s takes at most %d arguments" % (self._type, len(self._fields)))
+        for (name, default), value in zip(self._fields, args):
+            setattr(self, name, value)
+        for name, default in self._fields[len(args):]:
+            setattr(self, name, kwds.pop(name) if name in kwds else default())
+        if kwds:
+            raise TypeError("%s has no field %s" % (self._type, ", ".join(kwds)))
+
+    def __eq__(self, other):
+        return type(self) is type(other) and \
+            all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return '%s(%s)' % (self._type, ', '.join('%s=%r' % (name, getattr(self, name))
+                                                 for name in self.__slots__))
+
+
+def _message(type_name, fields):
+    """Message class ``type_name`` ('pkg/Name') with (field, default factory) pairs."""
+    name = type_name.split('/')[-1]
+    return type(name, (Message,), {
+        '__slots__': tuple(field for field, default in fields),
+        '_type': type_name,
+        '_fields': tuple(fields),
+    })
+
+
+class Service(object):
+    """Base of the service classes: a request and a response message."""
+    _type = ''
+    _request_class = None
+    _response_class = None
+
+
+# Request and response classes, which live in the .srv modules
+_SERVICE_MESSAGES = set()
+
+
+def _service(type_name, request_fields, response_fields):
+    name = type_name.split('/')[-1]
+    request = _message(type_name + 'Request', request_fields)
+    response = _message(type_name + 'Response', response_fields)
+    service = type(name, (Service,), {'_type': type_name, '_request_class': request,
+                                      '_response_class': response})
+    _SERVICE_MESSAGES.update((request, response))
+    return service, request, response
+
+
+def _zeros(n):
+    return lambda: [0.0] * n
+
+
+# std_msgs
+Header = _message('std_msgs/Header', [('seq', int), ('stamp', Time), ('frame_id', str)])
+Float64 = _message('std_msgs/Float64', [('data', float)])
+Bool = _message('std_msgs/Bool', [('data', bool)])
+String = _message('std_msgs/String', [('data', str)])
+
+# geometry_msgs
+Vector3 = _message('geometry_msgs/Vector3', [('x', float), ('y', float), ('z', float)])
+Point = _message('geometry_msgs/Point', [('x', float), ('y', float), ('z', float)])
+Quaternion = _message('geometry_msgs/Quaternion', [('x', float), ('y', float), ('z', float), ('w', float)])
+Pose = _message('geometry_msgs/Pose', [('position', Point), ('orientation', Quaternion)])
+PoseStamped = _message('geometry_msgs/PoseStamped', [('header', Header), ('pose', Pose)])
+PoseWithCovariance = _message('geometry_msgs/PoseWithCovariance', [('pose', Pose), ('covariance', _zeros(36))])
+Twist = _message('geometry_msgs/Twist', [('linear', Vector3), ('angular', Vector3)])
+TwistStamped = _message('geometry_msgs/TwistStamped', [('header', Header), ('twist', Twist)])
+TwistWithCovariance = _message('geometry_msgs/TwistWithCovariance', [('twist', Twist), ('covariance', _zeros(36))])
+Wrench = _message('geometry_msgs/Wrench', [('force', Vector3), ('torque', Vector3)])
+
+# nav_msgs
+Odometry = _message('nav_msgs/Odometry', [('header', Header), ('child_frame_id', str),
+                                          ('pose', PoseWithCovariance), ('twist', TwistWithCovariance)])
+
+# sensor_msgs
+LaserScan = _message('sensor_msgs/LaserScan', [
+    ('header', Header), ('angle_min', float), ('angle_max', float), ('angle_increment', float),
+    ('time_increment', float), ('scan_time', float), ('range_min', float), ('range_max', float),
+    ('ranges', list), ('intensities', list)])
+Image = _message('sensor_msgs/Image', [
+    ('header', Header), ('height', int), ('width', int), ('encoding', str),
+    ('is_bigendian', int), ('step', int), ('data', bytes)])
+NavSatStatus = _message('sensor_msgs/NavSatStatus', [('status', int), ('service', int)])
+NavSatFix = _message('sensor_msgs/NavSatFix', [
+    ('header', Header), ('status', NavSatStatus), ('latitude', float), ('longitude', float),
+    ('altitude', float), ('position_covariance', _zeros(9)), ('position_covariance_type', int)])
+
+# rosgraph_msgs
+Clock = _message('rosgraph_msgs/Clock', [('clock', Time)])
+
+# gazebo_msgs
+ModelState = _message('gazebo_msgs/ModelState', [('model_name', str), ('pose', Pose), ('twist', Twist),
+                                                 ('reference_frame', str)])
+ModelStates = _message('gazebo_msgs/ModelStates', [('name', list), ('pose', list), ('twist', list)])
+ContactState = _message('gazebo_msgs/ContactState', [
+    ('info', str), ('collision1_name', str), ('collision2_name', str), ('wrenches', list),
+    ('total_wrench', Wrench), ('contact_positions', list), ('contact_normals', list), ('depths', list)])
+ODEPhysics = _message('gazebo_msgs/ODEPhysics', [
+    ('auto_disable_bodies', bool), ('sor_pgs_precon_iters', int), ('sor_pgs_iters', int),
+    ('sor_pgs_w', float), ('sor_pgs_rms_error_tol', float), ('contact_surface_layer', float),
+    ('contact_max_correcting_vel', float), ('cfm', float), ('erp', float), ('max_contacts', int)])
+
+GetPhysicsProperties, GetPhysicsPropertiesRequest, GetPhysicsPropertiesResponse = _service(
+    'gazebo_msgs/GetPhysicsProperties', [],
+    [('time_step', float), ('pause', bool), ('max_update_rate', float), ('gravity', Vector3),
+     ('ode_config', ODEPhysics), ('success', bool), ('status_message', str)])
+SetPhysicsProperties, SetPhysicsPropertiesRequest, SetPhysicsPropertiesResponse = _service(
+    'gazebo_msgs/SetPhysicsProperties',
+    [('time_step', float), ('max_update_rate', float), ('gravity', Vector3), ('ode_config', ODEPhysics)],
+    [('success', bool), ('status_message', str)])
+GetModelState, GetModelStateRequest, GetModelStateResponse = _service(
+    'gazebo_msgs/GetModelState', [('model_name', str), ('relative_entity_name', str)],
+    [('header', Header), ('pose', Pose), ('twist', Twist), ('success', bool), ('status_message', str)])
+SetModelState, SetModelStateRequest, SetModelStateResponse = _service(
+    'gazebo_msgs/SetModelState', [('model_state', ModelState)],
+    [('success', bool), ('status_message', str)])
+
+# std_srvs
+Empty, EmptyRequest, EmptyResponse = _service('std_srvs/Empty', [], [])
+
+# mavros_msgs
+OverrideRCIn = _message('mavros_msgs/OverrideRCIn', [('channels', lambda: [0] * 8)])
+ParamValue = _message('mavros_msgs/ParamValue', [('integer', int), ('real', float)])
+
+CommandBool, CommandBoolRequest, CommandBoolResponse = _service(
+    'mavros_msgs/CommandBool', [('value', bool)], [('success', bool), ('result', int)])
+CommandTOL, CommandTOLRequest, CommandTOLResponse = _service(
+    'mavros_msgs/CommandTOL',
+    [('min_pitch', float), ('yaw', float), ('latitude', float), ('longitude', float), ('altitude', float)],
+    [('success', bool), ('result', int)])
+SetMode, SetModeRequest, SetModeResponse = _service(
+    'mavros_msgs/SetMode', [('base_mode', int), ('custom_mode', str)], [('mode_sent', bool)])
+ParamSet, ParamSetRequest, ParamSetResponse = _service(
+    'mavros_msgs/ParamSet', [('param_id', str), ('value', ParamValue)],
+    [('success', bool), ('value', ParamValue)])
+ParamGet, ParamGetRequest, ParamGetResponse = _service(
+    'mavros_msgs/ParamGet', [('param_id', str)], [('success', bool), ('value', ParamValue)])
+
+
+def packages():
+    """{'sensor_msgs.msg': {name: class}, ...} of everything defined here."""
+    result = {}
+    for name, value in globals().items():
+        if isinstance(value, type) and issubclass(value, (Message, Service)) \
+                and value not in (Message, Service):
+            kind = 'srv' if issubclass(value, Service) or value in _SERVICE_MESSAGES else 'msg'
+            package = value._type.split('/')[0]
+            result.setdefault('%s.%s' % (package, kind), {})[name] = value
+    return result
@@ -0,0 +1,100 @@
+"""In-process implementation of the pygazebo API WorldControl uses.
+
+Gazebo transport topics go over the same fake graph as the ROS topics,
+so FakeGazebo receives the world_control messages like a command. Every
+call finishes at once; the event loop only runs the callbacks it is
+handed, in the order it gets them.
+"""
+from gym_gazebo.fake_ros import graph
+from gym_gazebo.fake_ros.messages import _message
+
+try:
+    from queue import Queue
+except ImportError: # Python 2
+    from Queue import Queue
+
+WorldControl = _message('gazebo.msgs/WorldControl', [('pause', bool), ('step', bool), ('multi_step', int)])
+
+
+class Done(object):
+    """A future that already has its result."""
+
+    def __init__(self, result=None):
+        self._result = result
+
+    def result(self):
+        return self._result
+
+    def add_done_callback(self, callback):
+        callback(self)
+
+
+class _Handle(object):
+
+    def cancel(self):
+        pass
+
+
+class EventLoop(object):
+    """The part of an asyncio event loop WorldControl calls."""
+
+    def __init__(self):
+        self._callbacks = Queue()
+
+    def run_forever(self):
+        while True:
+            callback = self._callbacks.get()
+            if callback is None:
+                return
+            callback()
+
+    def call_soon_threadsafe(self, callback, *args):
+        self._callbacks.put(lambda: callback(*args))
+
+    def call_later(self, delay, callback, *args):
+        # Nothing here takes time, so a timeout never fires
+        return _Handle()
+
+    def stop(self):
+        self._callbacks.put(None)
+
+    def close(self):
+        pass
+
+
+def new_event_loop():
+    return EventLoop()
+
+
+def set_event_loop(loop):
+    pass
+
+
+class Publisher(object):
+
+    def __init__(self, topic, msg_type):
+        self.topic = topic
+        self.msg_type = msg_type
+        self._publisher = graph.Publisher(topic, WorldControl)
+
+    def publish(self, msg):
+        self._publisher.publish(msg)
+        return Done()
+
+    def wait_for_listener(self):
+        graph.get_graph().wait(lambda: self._publisher.get_num_connections() > 0, 10,
+                               "a subscriber of %s" % self.topic)
+        return Done()
+
+
+class Manager(object):
+
+    def __init__(self, address):
+        self.address = address
+
+    def advertise(self, topic, msg_type):
+        return Done(Publisher(topic, msg_type))
+
+
+def connect(address):
+    return Done(Manager(address))
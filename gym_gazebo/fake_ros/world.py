@@ -0,0 +1,173 @@
+import math
+
+import numpy as np
+
+from gym_gazebo.fake_ros.messages import Image, LaserScan, Odometry, Pose, Twist
+
+
+class Sensor(object):
+    __slots__ = ('topic', 'msg_class', 'period', 'make', 'frame_id', 'next_time', 'seq')
+
+    def __init__(self, topic, msg_class, rate, make, frame_id=''):
+        self.topic = topic
+        self.msg_class = msg_class
+        self.period = 1.0 / rate
+        self.make = make
+        self.frame_id = frame_id
+        self.next_time = self.period
+        self.seq = 0
+
+
+class World(object):
+    """Scriptable world model behind the in-process ROS graph.
+
+    A world declares what it publishes and serves, and FakeGazebo runs it:
+
+    * ``add_sensor(topic, msg_class, rate, make)``: while physics runs,
+      ``make()`` is called every 1/rate sim seconds and the message it
+      returns is published with its header stamped in sim time.
+    * ``add_command(topic, msg_class, handler)``: ``handler(msg)`` gets every
+      message published on ``topic``, e.g. velocity commands.
+    * ``add_service(name, service_class, handler)``: extra services besides
+      the /gazebo ones, ``handler(request)`` returns the response.
+
+    Subclasses integrate their state in ``advance(dt)``, and override
+    ``reset()``, ``get_model_state(name)`` and ``set_model_state(state)``.
+    ``time`` is the sim time in seconds. FakeGazebo calls all of these with
+    its lock held, so they never run concurrently.
+    """
+
+    def __init__(self):
+        self.time = 0.0
+        self.sensors = []
+        self.commands = []
+        self.services = []
+
+    def add_sensor(self, topic, msg_class, rate, make, frame_id=''):
+        if rate > 0:
+            self.sensors.append(Sensor(topic, msg_class, rate, make, frame_id))
+
+    def add_command(self, topic, msg_class, handler):
+        self.commands.append((topic, msg_class, handler))
+
+    def add_service(self, name, service_class, handler):
+        self.services.append((name, service_class, handler))
+
+    def restart_sensors(self):
+        # reset_simulation rewinds the sim time, the sensors start over with it
+        for sensor in self.sensors:
+            sensor.next_time = self.time + sensor.period
+
+    def advance(self, dt):
+        pass
+
+    def reset(self):
+        pass
+
+    def get_model_state(self, name):
+        """(Pose, Twist) of model ``name``, or None if there is no such model."""
+        return None
+
+    def set_model_state(self, model_state):
+        """Move a model, return False if there is no such model."""
+        return False
+
+
+class ArenaWorld(World):
+    """Point robot with a planar lidar and a camera in a circular arena.
+
+    The robot follows the velocity commands of the turtlebot
+    (/mobile_base/commands/velocity) and FakeSim (/dji_sim/target_velocity)
+    envs; its scan measures the distance to the arena wall and its camera
+    shows a fixed noise frame. Publishes /scan, /camera/rgb/image_raw,
+    /odom and /dji_sim/odometry; a rate of 0 disables the topic.
+    """
+
+    robot_names = ('mobile_base', 'turtlebot', 'dji')
+
+    def __init__(self, arena_radius=2.0, num_beams=100, range_max=6.0, image_shape=(480, 640, 3),
+                 scan_rate=30.0, camera_rate=30.0, odom_rate=50.0):
+        World.__init__(self)
+        self.arena_radius = arena_radius
+        self.range_max = range_max
+        self.angles = np.linspace(-math.pi / 2, math.pi / 2, num_beams)
+        # Noise frame, rendering is not what is being measured
+        self.image = np.random.randint(0, 255, size=image_shape).astype(np.uint8)
+        self.image_data = self.image.tobytes()
+        self.reset()
+
+        self.add_sensor('/scan', LaserScan, scan_rate, self.make_scan, 'base_scan')
+        self.add_sensor('/camera/rgb/image_raw', Image, camera_rate, self.make_image, 'camera')
+        for topic in ('/odom', '/dji_sim/odometry'):
+            self.add_sensor(topic, Odometry, odom_rate, self.make_odometry, 'odom')
+        for topic in ('/mobile_base/commands/velocity', '/dji_sim/target_velocity'):
+            self.add_command(topic, Twist, self.command)
+
+    def reset(self):
+        self.x = self.y = self.yaw = 0.0
+        self.z = 2.0
+        self.linear_x = self.linear_y = self.angular_z = 0.0
+
+    def command(self, twist):
+        self.linear_x = twist.linear.x
+        self.linear_y = twist.linear.y
+        self.angular_z = twist.angular.z
+
+    def set_pose(self, pose):
+        self.x, self.y, self.z = pose.position.x, pose.position.y, abs(pose.position.z)
+
+    def advance(self, dt):
+        cos, sin = math.cos(self.yaw), math.sin(self.yaw)
+        self.x += (self.linear_x * cos - self.linear_y * sin) * dt
+        self.y += (self.linear_x * sin + self.linear_y * cos) * dt
+        self.yaw += self.angular_z * dt
+
+    def ranges(self):
+        # Ray from the robot to the arena circle: |p + t d| = R
+        directions = self.yaw + self.angles
+        dx, dy = np.cos(directions), np.sin(directions)
+        p_dot_d = self.x * dx + self.y * dy
+        c = self.x ** 2 + self.y ** 2 - self.arena_radius ** 2
+        ranges = -p_dot_d + np.sqrt(np.maximum(p_dot_d ** 2 - c, 0.0))
+        ranges[ranges > self.range_max] = np.inf
+        return ranges
+
+    def pose(self):
+        pose = Pose()
+        pose.position.x, pose.position.y, pose.position.z = self.x, self.y, self.z
+        pose.orientation.z = math.sin(self.yaw / 2)
+        pose.orientation.w = math.cos(self.yaw / 2)
+        return pose
+
+    def make_scan(self):
+        angles = self.angles
+        return LaserScan(angle_min=float(angles[0]), angle_max=float(angles[-1]),
+                         angle_increment=float(angles[1] - angles[0]),
+                         range_min=0.1, range_max=self.range_max, ranges=self.ranges().tolist())
+
+    def make_image(self):
+        height, width, channels = self.image.shape
+        return Image(height=height, width=width, encoding='bgr8', step=width * channels,
+                     data=self.image_data)
+
+    def make_odometry(self):
+        odometry = Odometry()
+        odometry.pose.pose = self.pose()
+        odometry.twist.twist = self.twist()
+        return odometry
+
+    def twist(self):
+        twist = Twist()
+        twist.linear.x, twist.linear.y, twist.angular.z = self.linear_x, self.linear_y, self.angular_z
+        return twist
+
+    def get_model_state(self, name):
+        if name in self.robot_names:
+            return self.pose(), self.twist()
+        return None
+
+    def set_model_state(self, model_state):
+        # Only the robot moves, the FakeSim trees are accepted and ignored
+        if model_state.model_name in self.robot_names:
+            self.set_pose(model_state.pose)
+        return True
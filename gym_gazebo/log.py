@@ -0,0 +1,135 @@
+"""Logging for the envs: levels, rate-limited messages and step summaries.
+
+The envs log below the 'gym_gazebo' logger of the standard logging
+module. GYM_GAZEBO_LOG_LEVEL (DEBUG, INFO, WARNING, ...) sets its level;
+unless the application configured logging itself, messages go to stderr
+and only warnings are shown. Per-step details are logged at DEBUG and
+the step summaries at INFO, so with the default level a step only pays
+for an isEnabledFor() check.
+"""
+import logging
+import os
+import threading
+import time
+
+ROOT = 'gym_gazebo'
+FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+_configured = False
+
+
+def configure(level=logging.WARNING, stream=None):
+    """Set the level of the gym_gazebo loggers and print them to ``stream`` (stderr)."""
+    global _configured
+    _configured = True
+    if isinstance(level, str):
+        level = logging.getLevelName(level.upper())
+    root = logging.getLogger(ROOT)
+    root.setLevel(level)
+    if not root.handlers:
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(FORMAT))
+        root.addHandler(handler)
+        # Not printed a second time by a handler of the application
+        root.propagate = False
+
+
+def get_logger(name):
+    """The logger of module ``name``, below the gym_gazebo logger."""
+    if not _configured:
+        level = os.environ.get('GYM_GAZEBO_LOG_LEVEL')
+        if level or not logging.getLogger().handlers:
+            configure(level or logging.WARNING)
+    if name != ROOT and not name.startswith(ROOT + '.'):
+        name = ROOT + '.' + name
+    return logging.getLogger(name)
+
+
+class RateLimitedLogger(object):
+    """Logs each message at most once every ``interval`` seconds.
+
+    Messages are told apart by their format string, so the same warning
+    with different arguments counts as one. The number of suppressed
+    repeats is appended to the next one let through. Meant for warnings
+    raised in loops, e.g. while busy-waiting for sensor data.
+    """
+
+    def __init__(self, logger, interval=1.0):
+        self.logger = logger
+        self.interval = interval
+        self._lock = threading.Lock()
+        # format string -> (time last logged, repeats suppressed since)
+        self._last = {}
+
+    def log(self, level, msg, *args):
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.time()
+        with self._lock:
+            last, suppressed = self._last.get(msg, (None, 0))
+            if last is not None and now - last < self.interval:
+                self._last[msg] = (last, suppressed + 1)
+                return
+            self._last[msg] = (now, 0)
+        if suppressed:
+            msg += " (%d similar messages suppressed)"
+            args += (suppressed,)
+        self.logger.log(level, msg, *args)
+
+    def debug(self, msg, *args):
+        self.log(logging.DEBUG, msg, *args)
+
+    def info(self, msg, *args):
+        self.log(logging.INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(logging.WARNING, msg, *args)
+
+
+class StepSummary(object):
+    """Aggregates per-step values into one log line every ``every`` steps.
+
+    ``summary.add(reward=r, min_laser=m)`` after each step logs the mean,
+    min and max of every value over the last ``every`` steps, and the
+    step rate, at ``level``. While that level is disabled add() returns
+    right away.
+    """
+
+    def __init__(self, logger, every=100, level=logging.INFO):
+        self.logger = logger
+        self.every = every
+        self.level = level
+        self._reset()
+
+    def _reset(self):
+        self.count = 0
+        # name -> [total, min, max]
+        self.values = {}
+        self.start = time.time()
+
+    def add(self, **values):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        self.count += 1
+        for name, value in values.items():
+            stats = self.values.get(name)
+            if stats is None:
+                self.values[name] = [value, value, value]
+            else:
+                stats[0] += value
+                if value < stats[1]:
+                    stats[1] = value
+                if value > stats[2]:
+                    stats[2] = value
+        if self.count >= self.every:
+            self.flush()
+
+    def flush(self):
+        """Log the steps added since the last line, if any."""
+        if self.count:
+            elapsed = time.time() - self.start
+            fields = ", ".join("%s %.2f [%.2f, %.2f]" % (name, float(total) / self.count, low, high)
+                               for name, (total, low, high) in sorted(self.values.items()))
+            self.logger.log(self.level, "last %d steps, %.1f steps/s: %s", self.count,
+                            self.count / elapsed if elapsed > 0 else 0.0, fields)
+        self._reset()
@@ -0,0 +1,53 @@
+import mmap
+import numpy as np
+
+
+class SharedObservationBuffer(object):
+    """Ring of observation slots in an anonymous shared mmap.
+
+    The buffer must be created before the worker processes are forked.
+    Workers write their observation in place and only send the slot index
+    over the control pipe; the parent gets NumPy views on the same memory,
+    so camera frames are never pickled.
+
+    The memory is laid out as (num_slots, num_envs) + shape. When every
+    worker wrote to the same slot, which is the case while they are
+    stepped in lockstep, the batch is a view without any copy. A view
+    stays valid until the same slot comes round again, i.e. for
+    num_slots - 1 further steps.
+    """
+
+    def __init__(self, num_envs, shape, dtype=np.uint8, num_slots=2):
+        self.num_envs = num_envs
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.num_slots = num_slots
+
+        size = num_slots * num_envs * int(np.prod(self.shape)) * self.dtype.itemsize
+        self._mmap = mmap.mmap(-1, max(size, 1))
+        self._array = np.frombuffer(self._mmap, dtype=self.dtype, count=num_slots * num_envs * int(np.prod(self.shape)))
+        self._array = self._array.reshape((num_slots, num_envs) + self.shape)
+        self._next_slot = [0] * num_envs
+
+    def write(self, env_index, observation):
+        """Copy ``observation`` into the next slot of ``env_index``. Returns the slot."""
+        slot = self._next_slot[env_index]
+        self._next_slot[env_index] = (slot + 1) % self.num_slots
+        self._array[slot, env_index] = np.asarray(observation).reshape(self.shape)
+        return slot
+
+    def view(self, env_index, slot):
+        return self._array[slot, env_index]
+
+    def batch(self, slots):
+        """Return the observations of all envs, given the slot each one wrote to."""
+        if all(slot == slots[0] for slot in slots):
+            return self._array[slots[0]]
+        return self._array[list(slots), np.arange(self.num_envs)]
+
+    def close(self):
+        self._array = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass # views handed out to the caller are still alive
@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+import time
+
+from collections import deque
+from multiprocessing.util import Finalize
+
+clock = getattr(time, 'perf_counter', time.time)
+
+
+class _NullSpan(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span(object):
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.complete(self.name, self.start, clock() - self.start, self.cat, self.args)
+        return False
+
+
+class Tracer(object):
+    """Records timed spans and writes them as Chrome trace events.
+
+    The file opens in chrome://tracing or https://ui.perfetto.dev. Events
+    are kept in a ring of ``max_events``, so a long run keeps its most
+    recent history at a fixed memory cost. While disabled, span() returns
+    a shared no-op context manager.
+    """
+
+    def __init__(self, enabled=False, max_events=100000):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.pid = os.getpid()
+        self._origin = clock()
+
+    def span(self, name, cat='env', args=None):
+        """Context manager that records the enclosed block as one event."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, cat, args)
+
+    def complete(self, name, start, duration, cat='env', args=None):
+        """Record a span that started at ``start`` (tracing.clock()) and lasted ``duration`` seconds."""
+        event = {'name': name, 'cat': cat, 'ph': 'X', 'pid': self.pid,
+                 'tid': threading.current_thread().ident,
+                 'ts': (start - self._origin) * 1e6, 'dur': duration * 1e6}
+        if args:
+            event['args'] = args
+        # deque.append is atomic, no lock needed between threads
+        self.events.append(event)
+
+    def instant(self, name, cat='env', args=None):
+        event = {'name': name, 'cat': cat, 'ph': 'i', 's': 'p', 'pid': self.pid,
+                 'tid': threading.current_thread().ident,
+                 'ts': (clock() - self._origin) * 1e6}
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def clear(self):
+        self.events.clear()
+
+    def save(self, path):
+        """Write the buffered events to ``path``; '{pid}' in it is replaced by the process id."""
+        path = path.replace('{pid}', str(os.getpid()))
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}, f)
+        return path
+
+
+_tracer = None
+
+
+def get_tracer():
+    """The process-wide Tracer.
+
+    Setting GYM_GAZEBO_TRACE to a file name enables it and saves the trace
+    there when the process exits (use '{pid}' in the name when several
+    processes trace, e.g. GazeboVecEnv workers). A forked worker starts a
+    tracer of its own instead of sharing the parent's events.
+    """
+    global _tracer
+    if _tracer is None or _tracer.pid != os.getpid():
+        _tracer = Tracer()
+        path = os.environ.get('GYM_GAZEBO_TRACE')
+        if path:
+            _tracer.enabled = True
+            # multiprocessing runs these in its workers, which leave through
+            # os._exit and skip atexit, and from atexit everywhere else
+            Finalize(None, _tracer.save, args=(path,), exitpriority=0)
+    return _tracer
+
+
+def span(name, cat='env', args=None):
+    """Shortcut for get_tracer().span()."""
+    return get_tracer().span(name, cat, args)
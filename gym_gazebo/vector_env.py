@@ -0,0 +1,216 @@
+import os
+import numpy as np
+
+from multiprocessing import Process, Pipe
+
+from gym_gazebo.obs_transport import SharedObservationBuffer
+
+
+def _worker(remote, parent_remote, env_id, instance_id, env_index, obs_buffer, auto_reset=True):
+    parent_remote.close()
+
+    def pack(observation):
+        # With a shared buffer only the slot index goes through the pipe
+        if obs_buffer is None:
+            return observation
+        return obs_buffer.write(env_index, observation)
+
+    # Select the ROS/Gazebo master ports before the env starts its stack
+    os.environ["GYM_GAZEBO_INSTANCE"] = str(instance_id)
+
+    import gym
+    import gym_gazebo
+    env = gym.make(env_id)
+
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'step':
+                observation, reward, done, info = env.step(data)
+                if done and auto_reset:
+                    # Auto-reset, the last observation of the episode goes in info
+                    info = dict(info)
+                    info['terminal_observation'] = observation
+                    observation = env.reset()
+                remote.send((pack(observation), reward, done, info))
+            elif cmd == 'reset':
+                remote.send(pack(env.reset()))
+            elif cmd == 'spaces':
+                remote.send((getattr(env, 'observation_space', None), env.action_space))
+            elif cmd == 'close':
+                env.close()
+                break
+            else:
+                raise NotImplementedError(cmd)
+    except KeyboardInterrupt:
+        print ("GazeboVecEnv worker %d: got KeyboardInterrupt" % instance_id)
+    finally:
+        remote.close()
+
+
+class GazeboVecEnv(object):
+    """Runs K copies of a registered env id in worker processes.
+
+    Every worker starts its own roscore/Gazebo on the master ports of its
+    instance id (see gazebo_env.master_ports). Observations, rewards and
+    dones are returned stacked along a leading axis of size K. Finished
+    workers reset themselves; the final observation of the episode is
+    returned as info['terminal_observation'].
+
+    Passing ``observation_shape`` moves observations through a
+    SharedObservationBuffer instead of pickling them, which pays off for
+    camera frames. The returned batch is then a view on shared memory that
+    is overwritten ``num_slots`` steps later; copy it to keep it longer.
+    """
+
+    def __init__(self, env_id, num_envs, first_instance_id=1,
+                 observation_shape=None, observation_dtype=np.uint8, num_slots=2):
+        self.env_id = env_id
+        self.num_envs = num_envs
+        self.waiting = False
+        self.closed = False
+
+        self.obs_buffer = None
+        if observation_shape is not None:
+            self.obs_buffer = SharedObservationBuffer(num_envs, observation_shape, observation_dtype, num_slots)
+
+        self.remotes, self.work_remotes = zip(*[Pipe() for _ in range(num_envs)])
+        self.processes = []
+        for i, (work_remote, remote) in enumerate(zip(self.work_remotes, self.remotes)):
+            process = Process(target=_worker, args=(work_remote, remote, env_id, first_instance_id + i, i, self.obs_buffer))
+            process.daemon = True # don't leave simulators behind if the learner dies
+            process.start()
+            self.processes.append(process)
+        for work_remote in self.work_remotes:
+            work_remote.close()
+
+        self.remotes[0].send(('spaces', None))
+        self.observation_space, self.action_space = self.remotes[0].recv()
+
+    def step_async(self, actions):
+        for remote, action in zip(self.remotes, actions):
+            remote.send(('step', action))
+        self.waiting = True
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        observations, rewards, dones, infos = zip(*results)
+        return self._stack(observations), np.asarray(rewards, dtype=np.float32), np.asarray(dones, dtype=np.bool_), list(infos)
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def reset(self):
+        for remote in self.remotes:
+            remote.send(('reset', None))
+        return self._stack([remote.recv() for remote in self.remotes])
+
+    def close(self):
+        if self.closed:
+            return
+        if self.waiting:
+            for remote in self.remotes:
+                remote.recv()
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for process in self.processes:
+            process.join()
+        if self.obs_buffer is not None:
+            self.obs_buffer.close()
+        self.closed = True
+
+    def _stack(self, observations):
+        if self.obs_buffer is not None:
+            return self.obs_buffer.batch(observations)
+        return np.stack([np.asarray(observation) for observation in observations])
+
+
+class GazeboEnvPool(object):
+    """Single env interface that hides reset latency behind spare instances.
+
+    ``num_spares`` extra instances are kept reset and ready in worker
+    processes. When an episode ends, the finished instance starts resetting
+    in the background and reset() hands over a ready one straight away.
+    """
+
+    READY, RESETTING, ACTIVE = 'ready', 'resetting', 'active'
+
+    def __init__(self, env_id, num_spares=1, first_instance_id=1):
+        self.env_id = env_id
+        self.num_envs = num_spares + 1
+        self.closed = False
+
+        self.remotes, self.work_remotes = zip(*[Pipe() for _ in range(self.num_envs)])
+        self.processes = []
+        for i, (work_remote, remote) in enumerate(zip(self.work_remotes, self.remotes)):
+            process = Process(target=_worker, args=(work_remote, remote, env_id, first_instance_id + i, i, None, False))
+            process.daemon = True
+            process.start()
+            self.processes.append(process)
+        for work_remote in self.work_remotes:
+            work_remote.close()
+
+        self.remotes[0].send(('spaces', None))
+        self.observation_space, self.action_space = self.remotes[0].recv()
+
+        self.states = [None] * self.num_envs
+        self.observations = [None] * self.num_envs
+        for i in range(self.num_envs):
+            self._start_reset(i)
+        self.active = None
+
+    def _start_reset(self, index):
+        self.remotes[index].send(('reset', None))
+        self.states[index] = self.RESETTING
+
+    def _collect(self, index):
+        self.observations[index] = self.remotes[index].recv()
+        self.states[index] = self.READY
+
+    def reset(self):
+        # An episode abandoned before done resets in the background as well
+        if self.active is not None:
+            self._start_reset(self.active)
+            self.active = None
+
+        for i in range(self.num_envs):
+            if self.states[i] == self.RESETTING and self.remotes[i].poll():
+                self._collect(i)
+
+        ready = [i for i in range(self.num_envs) if self.states[i] == self.READY]
+        if ready:
+            index = ready[0]
+        else:
+            # Every instance is still resetting, wait for the first one
+            index = self.states.index(self.RESETTING)
+            self._collect(index)
+
+        self.active = index
+        self.states[index] = self.ACTIVE
+        observation, self.observations[index] = self.observations[index], None
+        return observation
+
+    def step(self, action):
+        if self.active is None:
+            raise ValueError("Call reset() before step()")
+        remote = self.remotes[self.active]
+        remote.send(('step', action))
+        observation, reward, done, info = remote.recv()
+        if done:
+            self._start_reset(self.active)
+            self.active = None
+        return observation, reward, done, info
+
+    def close(self):
+        if self.closed:
+            return
+        for i in range(self.num_envs):
+            if self.states[i] == self.RESETTING:
+                self.remotes[i].recv()
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
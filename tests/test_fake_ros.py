@@ -0,0 +1,179 @@
+"""Checks of the env machinery against fake_ros, without ROS or Gazebo.
+
+Run from the repository root with ``python -m pytest tests`` (or
+``make test``).
+"""
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import Process
+
+import numpy as np
+import pytest
+
+from gym_gazebo import fake_ros
+from gym_gazebo.envs.laser import ScanDiscretizer, StateEncoder
+from gym_gazebo.envs.timing import ControlLoop
+from gym_gazebo.obs_transport import SharedObservationBuffer
+
+Scan = namedtuple('Scan', ['ranges', 'range_max'])
+
+
+@pytest.fixture(scope='module')
+def gazebo():
+    # Before anything imports rospy; the env modules keep the fake one
+    gazebo = fake_ros.install(fake_ros.ArenaWorld(scan_rate=30, camera_rate=0))
+    yield gazebo
+    fake_ros.uninstall()
+
+
+@pytest.mark.parametrize('num_rays', [40, 200, 542, 7])
+def test_discretizer_keeps_bins_rays(num_rays):
+    state, done = ScanDiscretizer(bins=5, min_range=0.2, inf_value=6)(Scan([2.5] * num_rays, 10))
+    assert state.tolist() == [2] * 5
+    assert not done
+
+
+def test_discretizer_infinite_nan_and_collision():
+    ranges = [float('inf'), float('nan'), 3.7, 0.1, 9.0, 1.0]
+    state, done = ScanDiscretizer(bins=6, min_range=0.2, inf_value=None, clip=8)(Scan(ranges, 10))
+    assert state.tolist() == [8, 0, 3, 0, 8, 1]
+    assert done
+
+
+def test_state_encoder_round_trip():
+    encoder = StateEncoder([3, 4, 2])
+    states = [[a, b, c] for a in range(3) for b in range(4) for c in range(2)]
+    indices = [encoder.encode(state) for state in states]
+    assert sorted(indices) == list(range(encoder.n))
+    for index, state in zip(indices, states):
+        assert encoder.decode(index).tolist() == state
+
+
+def test_state_encoder_of_discretizer():
+    discretizer = ScanDiscretizer(bins=5, inf_value=6)
+    encoder = StateEncoder.for_discretizer(discretizer)
+    state, _ = discretizer(Scan([float('inf')] * 200, 10))
+    assert encoder.n == 7 ** 5
+    assert encoder.encode(state) == encoder.n - 1
+    assert encoder.decode(encoder.encode(state)).tolist() == state.tolist()
+
+
+@pytest.mark.parametrize('state', [[0] * 4, [0] * 6, [7, 0, 0, 0, 0], [0, 0, -1, 0, 0]])
+def test_state_encoder_rejects_bad_states(state):
+    with pytest.raises(ValueError):
+        StateEncoder([7] * 5).encode(state)
+
+
+def test_control_loop_deadline_misses():
+    clock = [0.0]
+
+    def sleep(seconds):
+        clock[0] += max(seconds, 0)
+
+    loop = ControlLoop(10, lambda: clock[0], sleep)
+    loop.tick()
+    assert clock[0] == pytest.approx(0.1)
+    # An agent that takes half a period keeps the schedule
+    clock[0] += 0.05
+    loop.tick()
+    assert clock[0] == pytest.approx(0.2)
+    assert loop.deadline_misses == 0
+    # One that takes 2.5 periods misses the boundary at 0.3, skips 0.4 too
+    clock[0] += 0.25
+    loop.tick()
+    assert clock[0] == pytest.approx(0.5)
+    stats = loop.stats()
+    assert (stats['ticks'], stats['deadline_misses'], stats['skipped_ticks']) == (3, 1, 2)
+
+
+def test_shared_buffer_ring():
+    buffer = SharedObservationBuffer(2, (3,), np.float32, num_slots=2)
+    slots = [buffer.write(i, [i, i, i]) for i in range(2)]
+    first = buffer.batch(slots)
+    assert slots == [0, 0]
+    assert first.tolist() == [[0, 0, 0], [1, 1, 1]]
+
+    assert [buffer.write(i, [10 + i] * 3) for i in range(2)] == [1, 1]
+    assert first.tolist() == [[0, 0, 0], [1, 1, 1]]
+    # The third write comes round to slot 0, under the first batch
+    assert [buffer.write(i, [20 + i] * 3) for i in range(2)] == [0, 0]
+    assert first.tolist() == [[20, 20, 20], [21, 21, 21]]
+
+    # Envs out of step: a copy gathered from both slots
+    assert buffer.write(0, [30] * 3) == 1
+    assert buffer.batch([1, 0]).tolist() == [[30, 30, 30], [21, 21, 21]]
+    buffer.close()
+
+
+def test_shared_buffer_across_processes():
+    buffer = SharedObservationBuffer(2, (2, 2), np.uint8)
+    workers = [Process(target=buffer.write, args=(i, np.full((2, 2), i + 1))) for i in range(2)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert buffer.batch([0, 0]).tolist() == [[[1, 1], [1, 1]], [[2, 2], [2, 2]]]
+    buffer.close()
+
+
+def test_sensor_cache_waits_for_newer_message(gazebo):
+    import rospy
+    from sensor_msgs.msg import LaserScan
+    from std_msgs.msg import Header
+    from gym_gazebo.envs.gazebo_env import SensorCache
+
+    topic = '/test/scan'
+    publisher = rospy.Publisher(topic, LaserScan, queue_size=1)
+    cache = SensorCache()
+    cache.subscribe(topic, LaserScan)
+
+    def publish(secs):
+        publisher.publish(LaserScan(header=Header(stamp=rospy.Time(secs, 0)), ranges=[float(secs)]))
+
+    publish(1)
+    assert cache.wait_for_message(topic, LaserScan).ranges == [1.0]
+    assert cache.wait_for_message(topic, LaserScan, newer_than=rospy.Time(0, 0)).ranges == [1.0]
+
+    timer = threading.Timer(0.3, publish, [2])
+    timer.start()
+    start = time.time()
+    msg = cache.wait_for_message(topic, LaserScan, newer_than=rospy.Time(1, 0), timeout=5)
+    assert msg.ranges == [2.0]
+    assert time.time() - start >= 0.25
+
+    with pytest.raises(rospy.ROSException):
+        cache.wait_for_message(topic, LaserScan, newer_than=rospy.Time(2, 0), timeout=0.2)
+    cache.close()
+    publisher.unregister()
+
+
+def test_step_after_crash_is_truncated(gazebo):
+    import gym
+    import gym_gazebo
+    from gym_gazebo.fake_ros import graph
+
+    env = gym.make('GazeboCircuit2TurtlebotLidar-v0')
+    try:
+        env.reset()
+        for client in env.services.values():
+            client.timeout = 1
+        env.step(0)
+
+        # Gazebo's services die
+        services = [(s.resolved_name, s.service_class, s.handler) for s in gazebo.services]
+        for service in gazebo.services:
+            service.shutdown()
+        observation, reward, done, info = env.step(0)
+        assert done
+        assert info['TimeLimit.truncated']
+        assert 'simulator_crash' in info
+
+        # ...and come back, as after a restart
+        threading.Timer(0.5, lambda: [graph.Service(*args) for args in services]).start()
+        env.reset()
+        assert env.restarts == 1
+        observation, reward, done, info = env.step(0)
+        assert 'simulator_crash' not in info
+    finally:
+        env.close()